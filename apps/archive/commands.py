@@ -35,7 +35,7 @@ class RemoveExpiredContent(superdesk.Command):
         logger.info('{} Starting to remove expired content at.'.format(self.log_msg))
         lock_name = get_lock_id('archive', 'remove_expired')
 
-        if not lock(lock_name, expire=610):
+        if not lock(lock_name, expire=610, lease=True):
             logger.info('{} Remove expired content task is already running.'.format(self.log_msg))
             return
         try:
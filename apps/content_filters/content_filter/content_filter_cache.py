@@ -0,0 +1,172 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""In-process cache of compiled content filters.
+
+Content filters are compiled into trees of parsed filter conditions and referenced
+content filters, so matching an article doesn't have to load and parse conditions
+for every filter, subscriber or routing rule it's tested against.
+
+Compiled filters are cached by ``_id`` and ``_etag``. The whole cache is invalidated
+in current process when any content filter or filter condition is modified, other
+processes are notified via :class:`superdesk.generation_cache.GenerationCache`.
+"""
+
+import superdesk
+
+from superdesk.generation_cache import GenerationCache
+from apps.content_filters.filter_condition.filter_condition import FilterCondition
+
+
+class ArticleMatch():
+    """Results of filter conditions and content filters for single article.
+
+    Article field values and results of conditions and filters are computed only once
+    and shared by all filters evaluated using the same instance.
+
+    :param article: article to match
+    """
+
+    def __init__(self, article):
+        self.article = article
+        self.values = {}
+        self.results = {}
+
+    def result(self, key, predicate):
+        """Get result of filter condition or content filter.
+
+        :param key: tuple of ``fc`` or ``pf`` and id
+        :param predicate: :class:`FilterCondition` or :class:`CompiledContentFilter`
+        """
+        result = self.results.get(key)
+        if result is None:
+            if key[0] == 'fc':
+                result = predicate.does_match(self.article, self.values)
+            else:
+                result = predicate.evaluate(self)
+            self.results[key] = result
+        return result
+
+
+class CompiledContentFilter():
+    """Content filter with resolved filter conditions and referenced filters.
+
+    Filter matches if all conditions and referenced filters of any of its expressions match,
+    missing filter matches every article.
+
+    :param content_filter: content filter document or ``None``
+    :param cache: cache used to get filter conditions and referenced filters
+    """
+
+    def __init__(self, content_filter, cache):
+        self.expressions = []
+        self.missing = content_filter is None
+        for expression in (content_filter or {}).get('content_filter', []):
+            expression = expression.get('expression', {})
+            predicates = [(('fc', _id), cache.get_condition(_id)) for _id in expression.get('fc', [])]
+            predicates.extend((('pf', _id), cache.get_filter_by_id(_id)) for _id in expression.get('pf', []))
+            self.expressions.append(predicates)
+
+    def does_match(self, article):
+        return self.evaluate(ArticleMatch(article))
+
+    def evaluate(self, match):
+        """Evaluate filter using results shared via ``match``.
+
+        :param match: :class:`ArticleMatch` instance
+        """
+        if self.missing:
+            return True
+        return any(all(match.result(key, predicate) for key, predicate in predicates)
+                   for predicates in self.expressions)
+
+
+class ContentFilterCache(GenerationCache):
+    """Cache of compiled content filters and parsed filter conditions."""
+
+    def __init__(self):
+        super().__init__('content_filters')
+
+    def reset(self):
+        self._filters = {}
+        self._conditions = {}
+
+    def get_filter(self, content_filter):
+        """Get compiled content filter.
+
+        It's cached only if it has ``_id`` and ``_etag``, otherwise it's compiled
+        but referenced filters and conditions are still cached.
+
+        :param content_filter: content filter document
+        """
+        self.check()
+        _id = content_filter.get('_id')
+        etag = content_filter.get('_etag')
+        cached = self._filters.get(_id) if _id is not None else None
+        if cached is not None and etag is not None and cached[0] == etag:
+            return cached[1]
+        version = self.version
+        compiled = CompiledContentFilter(content_filter, self)
+        if _id is not None and etag is not None:
+            with self._lock:
+                if self.is_current(version):
+                    self._filters[_id] = (etag, compiled)
+        return compiled
+
+    def get_filter_by_id(self, _id):
+        """Get compiled content filter by id, it's loaded from db if not cached.
+
+        :param _id: content filter id
+        """
+        cached = self._filters.get(_id)
+        if cached is not None:
+            return cached[1]
+        version = self.version
+        content_filter = superdesk.get_resource_service('content_filters').find_one(req=None, _id=_id)
+        compiled = CompiledContentFilter(content_filter, self)
+        with self._lock:
+            if self.is_current(version):
+                self._filters[_id] = ((content_filter or {}).get('_etag'), compiled)
+        return compiled
+
+    def get_condition(self, _id):
+        """Get parsed filter condition by id, it's loaded from db if not cached.
+
+        :param _id: filter condition id
+        """
+        condition = self._conditions.get(_id)
+        if condition is None:
+            version = self.version
+            doc = superdesk.get_resource_service('filter_conditions').find_one(req=None, _id=_id)
+            condition = FilterCondition.parse(doc)
+            with self._lock:
+                if self.is_current(version):
+                    self._conditions[_id] = condition
+        return condition
+
+    def match_all(self, article, filter_ids):
+        """Get ids of content filters matching given article.
+
+        Each filter condition is evaluated only once, even if it's used by multiple filters.
+
+        :param article: article to match
+        :param filter_ids: content filter ids
+        """
+        self.check()
+        match = ArticleMatch(article)
+        return set(_id for _id in filter_ids if match.result(('pf', _id), self.get_filter_by_id(_id)))
+
+
+content_filter_cache = ContentFilterCache()
+
+
+def invalidate_content_filter_cache():
+    """Invalidate content filter cache in current process and notify other processes."""
+    content_filter_cache.invalidate()
@@ -11,7 +11,10 @@ from superdesk.services import BaseService
 from eve.utils import ParsedRequest
 from superdesk.errors import SuperdeskApiError
 from superdesk import get_resource_service
+from superdesk.publish.routing_index import routing_index
 from apps.content_filters.filter_condition.filter_condition import FilterCondition
+from apps.content_filters.content_filter.content_filter_cache import content_filter_cache, \
+    invalidate_content_filter_cache
 
 
 class ContentFilterService(BaseService):
@@ -191,19 +194,26 @@ class ContentFilterService(BaseService):
     def does_match(self, content_filter, article):
         if not content_filter:
             return True  # a non-existing filter matches every thing
+        return content_filter_cache.get_filter(content_filter).does_match(article)
 
-        filter_condition_service = get_resource_service('filter_conditions')
-        expressions = []
-        for expression in content_filter.get('content_filter', []):
-            filter_conditions = []
-            if 'fc' in expression.get('expression', {}):
-                for f in expression['expression']['fc']:
-                    filter_condition = FilterCondition.parse(filter_condition_service.find_one(req=None, _id=f))
-                    filter_conditions.append(filter_condition.does_match(article))
-            if 'pf' in expression.get('expression', {}):
-                for f in expression['expression']['pf']:
-                    current_filter = super().find_one(req=None, _id=f)
-                    filter_conditions.append(self.does_match(current_filter, article))
+    def match_all(self, article, filter_ids):
+        """Get ids of content filters matching given article.
+
+        Conditions shared by filters are evaluated only once, non-existing filter matches every thing.
+
+        :param article: article to match
+        :param filter_ids: list of content filter ids
+        :return: set of matching filter ids
+        """
+        return content_filter_cache.match_all(article, filter_ids)
+
+    def on_created(self, docs):
+        routing_index.global_filters_changed()
+
+    def on_updated(self, updates, original):
+        invalidate_content_filter_cache()
+        routing_index.global_filters_changed()
 
-            expressions.append(all(filter_conditions))
-        return any(expressions)
+    def on_deleted(self, doc):
+        invalidate_content_filter_cache()
+        routing_index.global_filters_changed()
@@ -9,10 +9,12 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 from eve.utils import ParsedRequest
+from unittest import mock
 import json
 import os
 
 from apps.content_filters.content_filter.content_filter_service import ContentFilterService
+from apps.content_filters.filter_condition.filter_condition import FilterCondition
 from superdesk import get_backend, get_resource_service
 from superdesk.errors import SuperdeskApiError
 from superdesk.publish import SubscribersService
@@ -406,6 +408,43 @@ class FilteringDataTests(ContentFilterTests):
             self.assertFalse(self.f.does_match(doc, self.articles[4]))
             self.assertFalse(self.f.does_match(doc, self.articles[5]))
 
+    def test_does_match_uses_compiled_filter_until_updated(self):
+        doc = {'content_filter': [{"expression": {"pf": [1]}}], 'name': 'pf-1'}
+        with self.app.app_context():
+            self.assertTrue(self.f.does_match(doc, self.articles[0]))
+            filter_conditions = get_resource_service('filter_conditions')
+            with mock.patch.object(filter_conditions, 'find_one') as find_one:
+                self.assertTrue(self.f.does_match(doc, self.articles[1]))
+                self.assertFalse(self.f.does_match(doc, self.articles[3]))
+            find_one.assert_not_called()
+            filter_conditions.patch(1, {'value': 'xyz'})
+            self.assertFalse(self.f.does_match(doc, self.articles[0]))
+
+    def test_match_all(self):
+        with self.app.app_context():
+            with mock.patch.object(FilterCondition, 'does_match', autospec=True,
+                                   side_effect=FilterCondition.does_match) as does_match:
+                self.assertEqual({1, 4}, self.f.match_all(self.articles[0], [1, 2, 3, 4]))
+            self.assertEqual(5, does_match.call_count)  # each condition is evaluated once
+            self.assertEqual({1, 2, 4}, self.f.match_all(self.articles[2], [1, 2, 3, 4]))
+            self.assertEqual(set(), self.f.match_all(self.articles[5], [1, 2, 3, 4]))
+            self.assertEqual({'missing'}, self.f.match_all(self.articles[5], ['missing']))
+
+    def test_skip_caching_condition_loaded_before_invalidate(self):
+        from apps.content_filters.content_filter.content_filter_cache import content_filter_cache
+        with self.app.app_context():
+            filter_conditions = get_resource_service('filter_conditions')
+            find_one = filter_conditions.find_one
+
+            def find_and_invalidate(**kwargs):
+                condition = find_one(**kwargs)
+                content_filter_cache.invalidate()  # updated in other thread meanwhile
+                return condition
+
+            with mock.patch.object(filter_conditions, 'find_one', side_effect=find_and_invalidate):
+                content_filter_cache.get_condition(1)
+            self.assertNotIn(1, content_filter_cache._conditions)
+
     def test_if_pf_is_used(self):
         with self.app.app_context():
             self.assertTrue(self.f._get_content_filters_by_content_filter(1).count() == 1)
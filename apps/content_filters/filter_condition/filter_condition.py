@@ -21,6 +21,7 @@ class FilterCondition:
         self.field = FilterConditionField.factory(field)
         self.operator = FilterConditionOperator.factory(operator)
         self.value = FilterConditionValue(self.operator, value)
+        self._filter_value = None
 
     @staticmethod
     def parse(filter_condition):
@@ -46,13 +47,32 @@ class FilterCondition:
     def contains_not(self):
         return self.operator.contains_not()
 
-    def does_match(self, article):
+    def does_match(self, article, values=None):
+        """Test if article matches the condition.
 
+        :param article: article to test
+        :param values: dict used to share article field values between conditions
+        """
         if not self.field.is_in_article(article):
             return type(self.operator) is NotInOperator or \
                 type(self.operator) is NotLikeOperator or \
                 self.operator.operator is FilterConditionOperatorsEnum.ne
 
-        article_value = self.field.get_value(article)
-        filter_value = self.value.get_value(self.field, self.operator)
-        return self.operator.does_match(article_value, filter_value)
+        if values is None:
+            article_value = self.field.get_value(article)
+        elif self.field.field in values:
+            article_value = values[self.field.field]
+        else:
+            article_value = values[self.field.field] = self.field.get_value(article)
+        return self.operator.does_match(article_value, self.get_filter_value())
+
+    def get_filter_value(self):
+        """Get value used for matching articles, it's computed only once.
+
+        It's a compiled regex for regex operators or a frozenset of lowercased values
+        for ``in``, ``nin`` and ``match`` operators.
+        """
+        if self._filter_value is None:
+            value = self.value.get_value(self.field, self.operator)
+            self._filter_value = self.operator.get_matching_value(value)
+        return self._filter_value
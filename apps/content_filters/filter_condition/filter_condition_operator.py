@@ -65,34 +65,53 @@ class FilterConditionOperator:
     def does_match(self, article_value, filter_value):
         raise NotImplementedError()
 
+    def get_matching_value(self, filter_value):
+        """Get structure used by :meth:`does_match` for given filter value.
+
+        It's computed once per filter condition.
+        """
+        return filter_value
+
     def get_lower_case(self, value):
             return str(value).lower()
 
 
-class InOperator(FilterConditionOperator):
+class SetOperator(FilterConditionOperator):
+    """
+    Base for operators testing if lowercased article values are in filter values
+    """
+
+    def get_matching_value(self, filter_value):
+        if isinstance(filter_value, frozenset):
+            return filter_value
+        return frozenset(self.get_lower_case(v) for v in filter_value)
+
+    def contains_any(self, article_value, filter_value):
+        filter_value = self.get_matching_value(filter_value)
+        if isinstance(article_value, list):
+            return any(self.get_lower_case(v) in filter_value for v in article_value)
+        else:
+            return self.get_lower_case(article_value) in filter_value
+
+
+class InOperator(SetOperator):
     def __init__(self, operator):
         self.operator = FilterConditionOperatorsEnum[operator + '_']
         self.mongo_operator = '$in'
         self.elastic_operator = 'terms'
 
     def does_match(self, article_value, filter_value):
-        if isinstance(article_value, list):
-            return any([self.get_lower_case(v) in map(self.get_lower_case, filter_value) for v in article_value])
-        else:
-            return self.get_lower_case(article_value) in map(self.get_lower_case, filter_value)
+        return self.contains_any(article_value, filter_value)
 
 
-class NotInOperator(FilterConditionOperator):
+class NotInOperator(SetOperator):
     def __init__(self, operator):
         self.operator = FilterConditionOperatorsEnum[operator]
         self.mongo_operator = self._get_default_mongo_operator()
         self.elastic_operator = 'terms'
 
     def does_match(self, article_value, filter_value):
-        if isinstance(article_value, list):
-            return all([self.get_lower_case(v) not in map(self.get_lower_case, filter_value) for v in article_value])
-        else:
-            return self.get_lower_case(article_value) not in map(self.get_lower_case, filter_value)
+        return not self.contains_any(article_value, filter_value)
 
     def contains_not(self):
         return True
@@ -169,14 +188,11 @@ class RegexOperator(FilterConditionOperator):
         return filter_value.match(article_value) is not None
 
 
-class MatchOperator(FilterConditionOperator):
+class MatchOperator(SetOperator):
     def __init__(self, operator):
         self.operator = FilterConditionOperatorsEnum[operator]
         self.mongo_operator = '$in'
         self.elastic_operator = '{{"query_string": {{"{}":"{}"}}}}'
 
     def does_match(self, article_value, filter_value):
-        if isinstance(article_value, list):
-            return any([self.get_lower_case(v) in map(self.get_lower_case, filter_value) for v in article_value])
-        else:
-            return self.get_lower_case(article_value) in map(self.get_lower_case, filter_value)
+        return self.contains_any(article_value, filter_value)
@@ -12,6 +12,7 @@ import re
 from superdesk.errors import SuperdeskApiError
 from superdesk import get_resource_service
 from superdesk.services import BaseService
+from apps.content_filters.content_filter.content_filter_cache import invalidate_content_filter_cache
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,12 @@ class FilterConditionService(BaseService):
         self._check_equals([doc])
         self._check_parameters([doc])
 
+    def on_updated(self, updates, original):
+        invalidate_content_filter_cache()
+
+    def on_deleted(self, doc):
+        invalidate_content_filter_cache()
+
     def delete(self, lookup):
         referenced_filters = self._get_referenced_filter_conditions(lookup.get('_id'))
         if referenced_filters.count() > 0:
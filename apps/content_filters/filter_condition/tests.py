@@ -441,6 +441,15 @@ class FilterConditionTests(TestCase):
         f = FilterCondition('headline', 'endswith', 'test')
         self.assertEqual(f.value.get_mongo_value(f.field), re.compile('.*test', re.IGNORECASE))
 
+    def test_get_filter_value(self):
+        f = FilterCondition('genre', 'in', 'Sidebar,Article')
+        self.assertEqual(frozenset(['sidebar', 'article']), f.get_filter_value())
+        self.assertIs(f.get_filter_value(), f.get_filter_value())
+
+        f = FilterCondition('headline', 'like', 'test')
+        self.assertEqual(re.compile('.*test.*', re.IGNORECASE), f.get_filter_value())
+        self.assertTrue(f.does_match({'headline': 'A Test'}))
+
     def test_does_match_with_eq(self):
         f = FilterCondition('urgency', 'eq', '1')
         self.assertTrue(f.does_match(self.articles[0]))
@@ -10,6 +10,7 @@
 import os
 
 from datetime import timedelta, datetime
+from unittest.mock import patch
 from nose.tools import assert_raises
 from eve.utils import ParsedRequest
 
@@ -586,3 +587,154 @@ class UpdateIngestTest(TestCase):
             mongo_item = ingest_service.get_from_mongo(None, lookup)[0]
             elastic_item = ingest_service.get(None, lookup)[0]
             self.assertEqual(mongo_item['_etag'], elastic_item['_etag'], mongo_item['guid'])
+
+    def test_ingest_items_batch(self):
+        provider, provider_service = self.setup_reuters_provider()
+        items = provider_service.fetch_ingest(reuters_guid)
+        for item in items:
+            item['ingest_provider'] = provider['_id']
+            item['expiry'] = utcnow() + timedelta(hours=11)
+
+        with patch.dict(self.app.config, {'INGEST_BATCH_WRITES': True}):
+            failed = self.ingest_items(items, provider, provider_service)
+        self.assertEqual(set(), failed)
+        original_id = items[0]['_id']
+        ingest_service = get_resource_service('ingest')
+        self.assertEqual(len(items), ingest_service.get_from_mongo(None, {}).count())
+
+        items = provider_service.fetch_ingest(reuters_guid)
+        for item in items:
+            item['ingest_provider'] = provider['_id']
+            item['expiry'] = utcnow() + timedelta(hours=11)
+        items[0]['headline'] = 'Updated headline'
+
+        with patch.dict(self.app.config, {'INGEST_BATCH_WRITES': True}), \
+                patch.object(ingest_service, 'find_one') as find_one:
+            failed = self.ingest_items(items, provider, provider_service)
+        self.assertEqual(set(), failed)
+        self.assertEqual(0, find_one.call_count)
+        self.assertEqual(original_id, items[0]['_id'])
+        self.assertEqual(len(items), ingest_service.get_from_mongo(None, {}).count())
+
+        elastic_item = self.app.data._search_backend('ingest').find_one('ingest', _id=original_id, req=None)
+        self.assertEqual(elastic_item['headline'], 'Updated headline')
+        self.assertEqual(elastic_item['unique_id'], 1)
+
+    def test_ingest_items_batch_isolates_failures(self):
+        provider, provider_service = self.setup_reuters_provider()
+        now = datetime.now()
+        items = [
+            {'guid': 'text_1', 'versioncreated': now, 'headline': 'foo'},
+            {'guid': 'text_2', 'versioncreated': now, 'headline': 'bar'},
+            {
+                'type': 'composite',
+                'guid': 'package',
+                'versioncreated': now,
+                'groups': [{'id': 'main', 'refs': [{'residRef': 'text_1'}, {'residRef': 'text_2'}]}],
+            },
+        ]
+
+        def apply_rule_set(item, provider, rule_set=None):
+            if item['guid'] == 'text_2':
+                raise ValueError('foo')
+
+        with patch.dict(self.app.config, {'INGEST_BATCH_WRITES': True}), \
+                patch.object(ingest, 'apply_rule_set', side_effect=apply_rule_set):
+            failed = self.ingest_items(items, provider, provider_service)
+
+        self.assertEqual({'text_2', 'package'}, failed)
+        ingest_service = get_resource_service('ingest')
+        self.assertEqual(1, ingest_service.get_from_mongo(None, {}).count())
+        self.assertEqual('text_1', ingest_service.get_from_mongo(None, {})[0]['guid'])
+
+    def test_ingest_items_batch_duplicate_guid(self):
+        provider, provider_service = self.setup_reuters_provider()
+        now = datetime.now()
+        items = [
+            {'guid': 'text_1', 'versioncreated': now, 'headline': 'foo'},
+            {'guid': 'text_1', 'versioncreated': now, 'headline': 'bar'},
+        ]
+
+        with patch.dict(self.app.config, {'INGEST_BATCH_WRITES': True}):
+            failed = self.ingest_items(items, provider, provider_service)
+
+        self.assertEqual(set(), failed)
+        ingest_service = get_resource_service('ingest')
+        self.assertEqual(1, ingest_service.get_from_mongo(None, {}).count())
+        self.assertEqual('bar', ingest_service.get_from_mongo(None, {})[0]['headline'])
+
+    def test_ingest_async_renditions(self):
+        provider, provider_service = self.setup_reuters_provider()
+        items = provider_service.fetch_ingest(reuters_guid)
+        for item in items:
+            item['ingest_provider'] = provider['_id']
+            item['expiry'] = utcnow() + timedelta(hours=11)
+
+        with patch.dict(self.app.config, {'INGEST_ASYNC_RENDITIONS': True}), \
+                patch.object(ingest.generate_ingest_renditions, 'apply_async') as apply_async:
+            self.ingest_items(items, provider, provider_service)
+            pending = [item for item in items if item.get('renditions_pending')]
+            self.assertTrue(pending)
+            self.assertEqual(len(pending), apply_async.call_count)
+            self.assertEqual(0, self.app.media.fs('upload').find().count())
+
+            # same item and url is not queued again
+            ingest.schedule_renditions(pending[0], provider_service, 'ingest')
+            self.assertEqual(len(pending), apply_async.call_count)
+
+        resource, item_id, href = apply_async.call_args[1]['args']
+        fetched_ids = self.app.data.insert('archive', [{'ingest_id': item_id, 'type': 'picture',
+                                                        'renditions_pending': True}])
+        package_ids = self.app.data.insert('archive', [{'type': 'composite', 'groups': [
+            {'id': 'main', 'refs': [{'residRef': fetched_ids[0], 'renditions': {'original': {'href': href}}}]},
+        ]}])
+        ingest.generate_ingest_renditions(resource, item_id, href)
+        item = get_resource_service('ingest').find_one(req=None, _id=item_id)
+        self.assertFalse(item['renditions_pending'])
+        self.assertIn('media', item['renditions']['original'])
+        fetched = get_resource_service('archive').find_one(req=None, _id=fetched_ids[0])
+        self.assertFalse(fetched['renditions_pending'])
+        self.assertEqual(item['renditions'], fetched['renditions'])
+        package = get_resource_service('archive').find_one(req=None, _id=package_ids[0])
+        self.assertEqual(item['renditions'], package['groups'][0]['refs'][0]['renditions'])
+        elastic_item = self.app.data._search_backend('ingest').find_one('ingest', _id=item_id, req=None)
+        self.assertEqual(str(item['renditions']['original']['media']),
+                         str(elastic_item['renditions']['original']['media']))
+
+    def test_ingest_async_renditions_stored_per_item(self):
+        provider, provider_service = self.setup_reuters_provider()
+        items = provider_service.fetch_ingest(reuters_guid)
+        for item in items:
+            item['ingest_provider'] = provider['_id']
+            item['expiry'] = utcnow() + timedelta(hours=11)
+
+        with patch.dict(self.app.config, {'INGEST_ASYNC_RENDITIONS': True}), \
+                patch.object(ingest.generate_ingest_renditions, 'apply_async') as apply_async:
+            self.ingest_items(items, provider, provider_service)
+            resource, item_id, href = apply_async.call_args[1]['args']
+            other = {key: value for key, value in get_resource_service('ingest').find_one(req=None, _id=item_id).items()
+                     if not key.startswith('_')}
+            other['guid'] = other['uri'] = 'other'
+            other_id = self.app.data.insert('ingest', [other])[0]
+            other['_id'] = other_id
+            ingest.schedule_renditions(other, provider_service, 'ingest')
+            self.assertEqual(1, apply_async.call_count, 'same url is not queued again')
+
+        fetched_ids = self.app.data.insert('archive', [{'ingest_id': item_id, 'type': 'picture',
+                                                        'renditions_pending': True}])
+        get_resource_service('ingest').patch(item_id, {'archived': utcnow()})
+        ingest.generate_ingest_renditions(resource, item_id, href)
+
+        item = get_resource_service('ingest').find_one(req=None, _id=item_id)
+        other = get_resource_service('ingest').find_one(req=None, _id=other_id)
+        self.assertFalse(other['renditions_pending'])
+        media = [rend['media'] for rend in item['renditions'].values()]
+        other_media = [rend['media'] for rend in other['renditions'].values()]
+        self.assertFalse(set(media) & set(other_media), 'items sharing original have own files')
+        fetched = get_resource_service('archive').find_one(req=None, _id=fetched_ids[0])
+        self.assertEqual(item['renditions'], fetched['renditions'])
+
+        get_resource_service('ingest').delete_action({'_id': other_id})
+        self.assertIsNone(self.app.media.get(other_media[0], 'upload'))
+        for media_id in media:
+            self.assertIsNotNone(self.app.media.get(media_id, 'upload'), 'fetched item files are kept')
@@ -427,7 +427,7 @@ class ImportLegalPublishQueueCommand(superdesk.Command):
         logger.info('Import to Legal Publish Queue')
         lock_name = get_lock_id('legal_archive', 'import_legal_publish_queue')
         page_size = int(page_size) if page_size else self.default_page_size
-        if not lock(lock_name, expire=310):
+        if not lock(lock_name, expire=310, lease=True):
             return
         try:
             LegalArchiveImport().import_legal_publish_queue(page_size=page_size)
@@ -453,7 +453,7 @@ class ImportLegalArchiveCommand(superdesk.Command):
         logger.info('Import to Legal Archive')
         lock_name = get_lock_id('legal_archive', 'import_to_legal_archive')
         page_size = int(page_size) if page_size else self.default_page_size
-        if not lock(lock_name, expire=1810):
+        if not lock(lock_name, expire=1810, lease=True):
             return
         try:
             legal_archive_import = LegalArchiveImport()
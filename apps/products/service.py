@@ -13,13 +13,21 @@ from superdesk.services import BaseService
 from eve.utils import ParsedRequest, config
 from superdesk.errors import SuperdeskApiError
 from superdesk.metadata.utils import ProductTypes
+from superdesk.publish.routing_index import routing_index
 
 
 class ProductsService(BaseService):
 
+    def on_created(self, docs):
+        for doc in docs:
+            routing_index.product_changed(doc[config.ID_FIELD])
+
     def on_update(self, updates, original):
         self._validate_product_type(updates, original)
 
+    def on_updated(self, updates, original):
+        routing_index.product_changed(original[config.ID_FIELD])
+
     def on_delete(self, doc):
         # Check if any subscriber is using the product
         names = get_resource_service('subscribers').get_subscriber_names({'$or': [
@@ -29,6 +37,9 @@ class ProductsService(BaseService):
             raise SuperdeskApiError.badRequestError(
                 message="Product is used by the subscriber(s): {}".format(", ".join(names)))
 
+    def on_deleted(self, doc):
+        routing_index.product_changed(doc[config.ID_FIELD])
+
     def _validate_product_type(self, updates, original):
         """Validates product type field. Raises Bad Request error for following conditions:
         1. new product type is direct and product is assigned as api product.
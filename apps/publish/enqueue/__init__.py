@@ -57,7 +57,7 @@ class EnqueueContent(superdesk.Command):
         """Fetches items from publish queue as per the configuration, calls the transmit function.
         """
         lock_name = get_lock_id('publish', 'enqueue_published')
-        if not lock(lock_name, expire=310):
+        if not lock(lock_name, expire=310, lease=True):
             logger.info('Enqueue Task: {} is already running.'.format(lock_name))
             return
 
@@ -25,6 +25,7 @@ from superdesk.notification import push_notification
 from superdesk.publish import SUBSCRIBER_TYPES
 from superdesk.publish.publish_queue import PUBLISHED_IN_PACKAGE
 from superdesk.publish.formatters import get_formatter
+from superdesk.publish.routing_index import routing_index, get_codes
 from apps.publish.content.common import BasePublishService
 from copy import deepcopy
 from eve.utils import config, ParsedRequest
@@ -249,15 +250,11 @@ class EnqueueService:
 
     def _get_subscriber_codes(self, subscribers):
         subscriber_codes = {}
-        all_products = list(get_resource_service('products').get(req=None, lookup=None))
 
         for subscriber in subscribers:
-            codes = self._get_codes(subscriber)
-            products = [p for p in all_products if p[config.ID_FIELD] in subscriber.get('products', [])]
-
-            for product in products:
-                codes.extend(self._get_codes(product))
-                subscriber_codes[subscriber[config.ID_FIELD]] = list(set(codes))
+            codes = routing_index.get_subscriber_codes(subscriber)
+            if codes is not None:
+                subscriber_codes[subscriber[config.ID_FIELD]] = list(codes)
 
         return subscriber_codes
 
@@ -520,12 +517,9 @@ class EnqueueService:
         """
         filtered_subscribers = []
         subscriber_codes = {}
-        req = ParsedRequest()
-        req.args = {'is_global': True}
-        filter_service = get_resource_service('content_filters')
-        existing_products = {p[config.ID_FIELD]: p for p in
-                             list(get_resource_service('products').get(req=req, lookup=None))}
-        global_filters = list(filter_service.get(req=req, lookup=None))
+        existing_products = routing_index.get_products()
+        global_filters = routing_index.get_global_filters()
+        matching_filters = self._get_matching_filters(doc, subscribers, global_filters)
 
         for subscriber in subscribers:
             if target_media_type and subscriber.get('subscriber_type', '') != SUBSCRIBER_TYPES.ALL:
@@ -538,16 +532,18 @@ class EnqueueService:
             if not conforms:
                 continue
 
-            if not self.conforms_global_filter(subscriber, global_filters, doc):
+            if not self.conforms_global_filter(subscriber, global_filters, doc, matching_filters):
                 continue
 
+            indexed = routing_index.get_subscriber(subscriber)
             product_codes = self._get_codes(subscriber)
             subscriber_added = False
             subscriber['api_enabled'] = False
             # validate against direct products
             result, codes = self._validate_article_for_subscriber(doc,
-                                                                  subscriber.get('products'),
-                                                                  existing_products)
+                                                                  indexed['products'],
+                                                                  existing_products,
+                                                                  matching_filters)
             if result:
                 product_codes.extend(codes)
                 if not subscriber_added:
@@ -557,8 +553,9 @@ class EnqueueService:
             if content_api.is_enabled():
                 # validate against api products
                 result, codes = self._validate_article_for_subscriber(doc,
-                                                                      subscriber.get('api_products'),
-                                                                      existing_products)
+                                                                      indexed['api_products'],
+                                                                      existing_products,
+                                                                      matching_filters)
                 if result:
                     product_codes.extend(codes)
                     subscriber['api_enabled'] = True
@@ -579,7 +576,20 @@ class EnqueueService:
 
         return filtered_subscribers, subscriber_codes
 
-    def _validate_article_for_subscriber(self, doc, products, existing_products):
+    def _get_matching_filters(self, doc, subscribers, global_filters):
+        """Get ids of global and product filters matching the document, all evaluated at once.
+
+        :param doc: Document to test the filters against
+        :param subscribers: List of Subscribers that might potentially get this document
+        :param global_filters: List of all global filters
+        :return: set of matching filter ids
+        """
+        filter_ids = set(global_filter[config.ID_FIELD] for global_filter in global_filters)
+        for subscriber in subscribers:
+            filter_ids.update(routing_index.get_subscriber(subscriber)['filter_ids'])
+        return get_resource_service('content_filters').match_all(doc, filter_ids)
+
+    def _validate_article_for_subscriber(self, doc, products, existing_products, matching_filters=None):
         add_subscriber, product_codes = False, []
 
         if not products:
@@ -595,9 +605,9 @@ class EnqueueService:
             if not self.conforms_product_targets(product, doc):
                 continue
 
-            if self.conforms_content_filter(product, doc):
+            if self.conforms_content_filter(product, doc, matching_filters):
                 # gather the codes of products
-                product_codes.extend(self._get_codes(product))
+                product_codes.extend(routing_index.get_product_codes(product_id))
                 add_subscriber = True
 
         return add_subscriber, product_codes
@@ -664,11 +674,12 @@ class EnqueueService:
         # Nothing matches so this subscriber doesn't conform
         return False, False
 
-    def conforms_content_filter(self, product, doc):
+    def conforms_content_filter(self, product, doc, matching_filters=None):
         """Checks if the document matches the subscriber filter
 
         :param product: Product where the filter is used
         :param doc: Document to test the filter against
+        :param matching_filters: ids of filters matching the document, filter is tested if not set
         :return:
         True if there's no filter
         True if matches and permitting
@@ -681,16 +692,19 @@ class EnqueueService:
         if content_filter is None or 'filter_id' not in content_filter or content_filter['filter_id'] is None:
             return True
 
-        service = get_resource_service('content_filters')
-        filter = service.find_one(req=None, _id=content_filter['filter_id'])
-        does_match = service.does_match(filter, doc)
+        if matching_filters is not None:
+            does_match = content_filter['filter_id'] in matching_filters
+        else:
+            service = get_resource_service('content_filters')
+            filter = service.find_one(req=None, _id=content_filter['filter_id'])
+            does_match = service.does_match(filter, doc)
 
         if does_match:
             return content_filter['filter_type'] == 'permitting'
         else:
             return content_filter['filter_type'] == 'blocking'
 
-    def conforms_global_filter(self, subscriber, global_filters, doc):
+    def conforms_global_filter(self, subscriber, global_filters, doc, matching_filters=None):
         """Check gloval filter
 
         Checks if subscriber has a override rule against each of the
@@ -699,6 +713,7 @@ class EnqueueService:
         :param subscriber: Subscriber to get if the global filter is overriden
         :param global_filters: List of all global filters
         :param doc: Document to test the global filter against
+        :param matching_filters: ids of filters matching the document, filters are tested if not set
         :return: True if at least one global filter is not overriden
         and it matches the document
         False if global filter matches the document or all of them overriden
@@ -708,7 +723,11 @@ class EnqueueService:
         for global_filter in global_filters:
             if gfs.get(str(global_filter[config.ID_FIELD]), True):
                 # Global filter applies to this subscriber
-                if service.does_match(global_filter, doc):
+                if matching_filters is not None:
+                    does_match = global_filter[config.ID_FIELD] in matching_filters
+                else:
+                    does_match = service.does_match(global_filter, doc)
+                if does_match:
                     # All global filters behaves like blocking filters
                     return False
         return True
@@ -731,7 +750,4 @@ class EnqueueService:
                                      'codes': subscriber_codes.get(sid, [])}
 
     def _get_codes(self, item):
-        if item.get('codes'):
-            return [c.strip() for c in item.get('codes').split(',') if c]
-        else:
-            return []
+        return get_codes(item)
@@ -211,13 +211,16 @@ class RoutingRuleSchemeService(BaseService):
         filters_service = superdesk.get_resource_service('content_filters')
 
         now = datetime.utcnow()
+        scheduled_rules = self._get_scheduled_routing_rules(rules, now)
+        matching_filters = filters_service.match_all(ingest_item, [rule['filter'][config.ID_FIELD]
+                                                                   for rule in scheduled_rules if rule.get('filter')])
 
-        for rule in self._get_scheduled_routing_rules(rules, now):
+        for rule in scheduled_rules:
             content_filter = rule.get('filter', {})
             logger.info('Applying rule. Item: %s . Routing Scheme: %s. Rule Name %s.' % (ingest_item.get('guid'),
                                                                                          routing_scheme.get('name'),
                                                                                          rule.get('name')))
-            if filters_service.does_match(content_filter, ingest_item):
+            if not content_filter or content_filter[config.ID_FIELD] in matching_filters:
                 logger.info('Filter matched. Item: %s. Routing Scheme: %s. Rule Name %s.' % (ingest_item.get('guid'),
                                                                                              routing_scheme.get('name'),
                                                                                              rule.get('name')))
@@ -13,6 +13,7 @@ import logging
 from superdesk.resource import Resource
 from superdesk.services import BaseService
 from superdesk.errors import SuperdeskApiError
+from superdesk.io.rule_sets import clear_compiled_rule_set
 
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,12 @@ class RuleSetsService(BaseService):
 
         return super().update(id, updates, original)
 
+    def on_updated(self, updates, original):
+        clear_compiled_rule_set(original.get('_id'))
+
+    def on_deleted(self, doc):
+        clear_compiled_rule_set(doc.get('_id'))
+
     def on_delete(self, doc):
         if self.backend.find_one('ingest_providers', req=None, rule_set=doc['_id']):
             raise SuperdeskApiError.forbiddenError("Cannot delete Rule set as it's associated with channel(s).")
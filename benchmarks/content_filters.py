@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Compare matching of filter conditions parsed for every article and parsed once.
+
+Usage::
+
+    $ python benchmarks/content_filters.py [--number 2000]
+
+Parsing condition for every article is how content filters were matched before
+compiled filters were cached, matching values (compiled regex, set of lowercased
+values) were computed for every match then.
+"""
+
+import timeit
+import argparse
+
+from apps.content_filters.filter_condition.filter_condition import FilterCondition
+
+
+PARAGRAPH = '<p>The minister said on Tuesday that the government will present the budget ' \
+            'to parliament next week, after talks with unions and employers.</p>'
+
+ARTICLE = {
+    'headline': 'Government to present budget after talks with unions',
+    'slugline': 'POLITICS-BUDGET',
+    'body_html': PARAGRAPH * 30,
+    'urgency': 3,
+    'priority': 5,
+    'source': 'AAP',
+    'type': 'text',
+    'anpa_category': [{'qcode': 'a', 'name': 'Australian General News'}],
+    'subject': [{'qcode': code} for code in ('11000000', '11006000', '11006005', '04000000', '04018000',
+                                             '04018002', '09000000', '09002000')],
+    'genre': [{'name': 'Article'}],
+    'place': [{'qcode': 'NSW'}],
+    'keywords': ['budget', 'politics'],
+    'flags': {'marked_for_sms': False},
+}
+
+CONDITIONS = [
+    ('in', 'subject', '15000000,15039000,04018002'),
+    ('nin', 'subject', '15000000,15039000,15054000'),
+    ('in', 'urgency', '1,2,3'),
+    ('in', 'place', 'VIC,QLD,NSW'),
+    ('like', 'headline', 'budget'),
+    ('notlike', 'headline', 'sport'),
+    ('startswith', 'slugline', 'politics'),
+    ('endswith', 'slugline', 'budget'),
+    ('like', 'body_html', 'employers'),
+    ('eq', 'source', 'aap'),
+    ('lte', 'priority', '6'),
+    ('eq', 'sms', 'false'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=2000, help='number of matches per condition')
+    args = parser.parse_args()
+
+    print('{:<12} {:<10} {:>12} {:>12} {:>8}'.format('operator', 'field', 'parsed us', 'compiled us', 'speedup'))
+    for operator, field, value in CONDITIONS:
+        condition = FilterCondition(field, operator, value)
+        assert condition.does_match(ARTICLE) == FilterCondition(field, operator, value).does_match(ARTICLE)
+        parsed = timeit.timeit(lambda: FilterCondition(field, operator, value).does_match(ARTICLE),
+                               number=args.number) / args.number * 1e6
+        compiled = timeit.timeit(lambda: condition.does_match(ARTICLE), number=args.number) / args.number * 1e6
+        print('{:<12} {:<10} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(
+            operator, field, parsed, compiled, parsed / compiled))
+
+
+if __name__ == '__main__':
+    main()
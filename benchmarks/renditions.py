@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Compare rendering of picture renditions decoded per rendition and decoded once.
+
+Usage::
+
+    $ python benchmarks/renditions.py [--pool 4] [--repeat 5] [photo.jpg ...]
+
+Without files it generates a 6000x4000 jpeg similar to camera output.
+"""
+
+import time
+import argparse
+
+from io import BytesIO
+from PIL import Image, ImageDraw
+from superdesk.default_settings import RENDITIONS
+from superdesk.media.image import fix_orientation
+from superdesk.media.media_operations import crop_image
+from superdesk.media.renditions import render_renditions, _resize_image, _get_crop_data
+
+
+CONFIG = dict(RENDITIONS['picture'], **{'16-9': {'ratio': '16:9'}, '4-3': {'ratio': '4:3'}})
+
+
+def camera_jpeg(width=6000, height=4000):
+    img = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(img)
+    for x in range(0, width, 50):
+        draw.line([(x, 0), (width - x, height)], fill=(x % 255, (x * 3) % 255, (x * 7) % 255), width=7)
+    out = BytesIO()
+    img.save(out, 'jpeg', quality=92)
+    return out.getvalue()
+
+
+def render_per_rendition(original, config, ext):
+    """Rendering as it was done before, decoding original for every rendition."""
+    renditions = {}
+    for rendition, rsize in config.items():
+        original.seek(0)
+        fix_orientation(original)
+        if rsize.get('width') or rsize.get('height'):
+            renditions[rendition] = _resize_image(original, (rsize.get('width'), rsize.get('height')), ext)
+        elif rsize.get('ratio'):
+            original.seek(0)
+            width, height = Image.open(original).size
+            _width, _height, cropping_data = _get_crop_data(width, height, rsize['ratio'])
+            renditions[rendition] = crop_image(original, 'crop', cropping_data, image_format=ext)
+    return renditions
+
+
+def measure(name, fn, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.time()
+        fn()
+        timings.append(time.time() - start)
+    print('{:<40} min {:8.3f}s avg {:8.3f}s'.format(name, min(timings), sum(timings) / len(timings)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--pool', type=int, default=4, help='process pool size')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sources = [(path, open(path, 'rb').read()) for path in args.files] or [('generated 6000x4000', camera_jpeg())]
+    resize_only = {key: val for key, val in CONFIG.items() if not val.get('ratio')}
+    for name, data in sources:
+        print(name)
+        for label, config in (('all renditions', CONFIG), ('resize only (draft)', resize_only)):
+            measure('  per rendition, ' + label, lambda: render_per_rendition(BytesIO(data), config, 'jpeg'),
+                    args.repeat)
+            measure('  decode once, ' + label, lambda: render_renditions(BytesIO(data), config, 'jpeg'),
+                    args.repeat)
+            measure('  decode once, pool {}, {}'.format(args.pool, label),
+                    lambda: render_renditions(BytesIO(data), config, 'jpeg', args.pool), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
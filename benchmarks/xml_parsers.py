@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Compare peak memory of parsing large multi item xml files whole and using ``parse_iter``.
+
+Usage::
+
+    $ python benchmarks/xml_parsers.py [--items 2000]
+
+Files are generated from test fixtures by repeating their items, every run is done
+in a new spawned process so its max resident set size can be compared.
+"""
+
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+from copy import deepcopy
+from lxml import etree
+from superdesk.io.feed_parsers.newsml_1_2 import NewsMLOneFeedParser
+from superdesk.io.feed_parsers.newsml_2_0 import NewsMLTwoFeedParser, XMLNS
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'io', 'fixtures')
+BATCH_SIZE = 50
+
+
+def newsml2_file(path, count):
+    xml = etree.parse(os.path.join(FIXTURES, 'tag:reuters.com,0000:newsml_L4N1FL0N0:1132689232')).getroot()
+    item_set = xml.find('{%s}itemSet' % XMLNS)
+    item = item_set[0]
+    for i in range(1, count):
+        copy = deepcopy(item)
+        copy.set('guid', '%s-%d' % (item.get('guid'), i))
+        item_set.append(copy)
+    etree.ElementTree(xml).write(path)
+
+
+def newsml12_file(path, count):
+    xml = etree.parse(os.path.join(FIXTURES, 'afp.xml')).getroot()
+    item = xml.find('NewsItem')
+    for i in range(1, count):
+        copy = deepcopy(item)
+        identifier = copy.find('Identification/NewsIdentifier/PublicIdentifier')
+        identifier.text = '%s-%d' % (identifier.text, i)
+        xml.append(copy)
+    etree.ElementTree(xml).write(path)
+
+
+def parse_whole(parser_class, path):
+    xml = etree.parse(path).getroot()
+    parser = parser_class()
+    if parser_class is NewsMLOneFeedParser:
+        # parse only gets the first item, so parse every item like parse_iter does
+        envelope = xml.find('NewsEnvelope')
+        count = 0
+        for item in xml.findall('NewsItem'):
+            doc = etree.Element(xml.tag, attrib=dict(xml.attrib))
+            doc.append(deepcopy(envelope))
+            doc.append(deepcopy(item))
+            parser.parse(doc)
+            count += 1
+        return count
+    return len(parser.parse(xml))
+
+
+def parse_stream(parser_class, path):
+    count = 0
+    batch = []
+    with open(path, 'rb') as f:
+        for item in parser_class().parse_iter(f):
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                count += len(batch)
+                batch = []  # batch would be ingested here
+    return count + len(batch)
+
+
+def run(args):
+    fn, parser_class, path = args
+    start = time.time()
+    count = fn(parser_class, path)
+    return count, time.time() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=2000, help='number of items in file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = (
+            ('NewsML-G2', NewsMLTwoFeedParser, newsml2_file),
+            ('NewsML 1.2', NewsMLOneFeedParser, newsml12_file),
+        )
+        for name, parser_class, generate in files:
+            path = os.path.join(tmp, '%s.xml' % parser_class.NAME)
+            generate(path, args.items)
+            print('{} {} items, {:.1f} MB'.format(name, args.items, os.path.getsize(path) / 1024 / 1024))
+            for label, fn in (('parse', parse_whole), ('parse_iter', parse_stream)):
+                with multiprocessing.get_context('spawn').Pool(1) as pool:
+                    count, duration, maxrss = pool.map(run, [(fn, parser_class, path)])[0]
+                print('  {:<12} items {:6} time {:7.2f}s max rss {:8.1f} MB'.format(
+                    label, count, duration, maxrss / 1024))
+
+
+if __name__ == '__main__':
+    main()
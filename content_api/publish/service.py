@@ -99,8 +99,9 @@ class PublishService(BaseService):
             return False
 
         filter_service = get_resource_service('content_filters')
+        matching_filters = filter_service.match_all(item, [fc[config.ID_FIELD] for fc in filter_conditions])
         for fc in filter_conditions:
-            if filter_service.does_match(fc, item):
+            if fc[config.ID_FIELD] in matching_filters:
                 logger.info('API Filter block {} matched for item {}.'.format(fc, item.get(config.ID_FIELD)))
                 return True
 
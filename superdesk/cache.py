@@ -1,13 +1,28 @@
 
+import os
+import copy
+import json
+import math
+import time
+import uuid
+import random
 import redis
 import hermes
+import threading
 import hermes.backend
 import hermes.backend.dict
 import hermes.backend.redis
 
+from collections import OrderedDict
+
 from flask import current_app as app
 from superdesk import json_utils
 from superdesk.logging import logger
+from superdesk.stats import stats
+
+
+#: sample rate for sending local cache stats
+STATS_RATE = 0.1
 
 
 class SuperdeskRedisBackend(hermes.backend.redis.Backend):
@@ -18,6 +33,29 @@ class SuperdeskRedisBackend(hermes.backend.redis.Backend):
         self.client = redis.StrictRedis.from_url(kwargs.pop('url'))
         self._options = kwargs
 
+    def load_many(self, keys):
+        """Load multiple keys using single ``MGET``.
+
+        :param keys: list of keys
+        :return: dict with values for keys found in cache
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget(keys)
+        return {key: self.mangler.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def save_many(self, mapping, ttl=None):
+        """Save multiple keys using pipelined ``SET``.
+
+        :param mapping: dict with values to save
+        :param ttl: ttl in seconds
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, self.mangler.dumps(value), ex=ttl)
+        return pipe.execute()
+
 
 class SuperdeskMangler(hermes.Mangler):
     """Implements encoding/decoding for Superdesk data - so handles ObjectIds, dates etc."""
@@ -36,6 +74,210 @@ class SuperdeskMangler(hermes.Mangler):
         return json_utils.loads(value)
 
 
+def _should_refresh(entry, beta):
+    """Decide if entry should be refreshed using XFetch algorithm.
+
+    Probability of refreshing grows as expiry gets closer and with computation time.
+    """
+    early = entry['delta'] * beta * -math.log(1.0 - random.random())
+    return time.time() + early >= entry['expiry']
+
+
+def _is_entry(value):
+    return isinstance(value, dict) and 'expiry' in value and 'delta' in value and 'value' in value
+
+
+class LocalCache():
+    """Thread safe in-process LRU cache with ttl.
+
+    :param size: max number of entries
+    :param ttl: max number of seconds an entry is kept
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.version = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Get copy of value for key, returns ``None`` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] < time.time():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                stats.incr('cache.local.miss', rate=STATS_RATE)
+                return None
+            self._data.move_to_end(key)
+        stats.incr('cache.local.hit', rate=STATS_RATE)
+        return copy.deepcopy(entry[0])
+
+    def set(self, key, value, ttl=None, version=None):
+        """Set value for key.
+
+        :param key: key
+        :param value: value
+        :param ttl: ttl in seconds, can't be longer than cache ttl
+        :param version: value of :attr:`version` before value was read, if there was
+                        an eviction since it's not stored because it might be stale
+        """
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (copy.deepcopy(value), time.time() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+                stats.incr('cache.local.eviction', rate=STATS_RATE)
+
+    def evict(self, keys):
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+
+class SuperdeskTwoTierBackend(hermes.backend.AbstractBackend):
+    """Redis backend with in-process LRU cache in front of it.
+
+    Local cache is used for loads, when there is a change in one process
+    it will send keys via redis pub/sub to other processes so these can
+    evict it from their local caches.
+
+    :param mangler: hermes mangler
+    :param remote: redis backend
+    :param size: max number of entries in local cache
+    :param ttl: max number of seconds an entry is kept in local cache
+    """
+
+    channel = 'superdesk:cache:invalidate'
+
+    def __init__(self, mangler, remote, size, ttl):
+        self.mangler = mangler
+        self.remote = remote
+        self.local = LocalCache(size, ttl)
+        self.node = uuid.uuid4().hex
+        self._pid = None
+        self._pid_lock = threading.Lock()
+        self._subscribed = False
+
+    def _listen(self):
+        """Listen for invalidation messages from other processes.
+
+        When connection is lost local cache is not used till it's subscribed again.
+        """
+        while True:
+            try:
+                pubsub = self.remote.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.local.clear()
+                self._subscribed = True
+                for message in pubsub.listen():
+                    data = json.loads(message['data'].decode('utf-8'))
+                    if data.get('node') == self.node:
+                        continue
+                    if data.get('keys') is None:
+                        self.local.clear()
+                    else:
+                        self.local.evict(data['keys'])
+            except Exception as ex:
+                self._subscribed = False
+                logger.warning('cache invalidation listener failed error=%s', ex)
+                time.sleep(1)
+
+    def _use_local(self):
+        if self._pid != os.getpid():  # start listener after fork
+            with self._pid_lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._subscribed = False
+                    thread = threading.Thread(target=self._listen, daemon=True)
+                    thread.start()
+        return self._subscribed
+
+    def _publish(self, keys):
+        try:
+            self.remote.client.publish(self.channel, json.dumps({'node': self.node, 'keys': keys}))
+        except redis.RedisError as ex:
+            logger.warning('cache invalidation publish failed error=%s', ex)
+
+    def lock(self, key):
+        return self.remote.lock(key)
+
+    def save(self, key=None, value=None, mapping=None, ttl=None):
+        res = self.remote.save(key, value, mapping, ttl)
+        keys = list(mapping.keys()) if mapping else [key]
+        self.local.evict(keys)
+        self._publish(keys)
+        return res
+
+    def load(self, keys):
+        if not self._use_local():
+            return self.remote.load(keys)
+
+        if isinstance(keys, (str, bytes)):
+            value = self.local.get(keys)
+            if value is None:
+                version = self.local.version
+                value = self.remote.load(keys)
+                if value is not None:
+                    self.local.set(keys, value, version=version)
+            return value
+
+        return self.load_many(keys)
+
+    def load_many(self, keys):
+        if not self._use_local():
+            return self.remote.load_many(keys)
+
+        values = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+        if missing:
+            version = self.local.version
+            for key, value in self.remote.load_many(missing).items():
+                self.local.set(key, value, version=version)
+                values[key] = value
+        return values
+
+    def save_many(self, mapping, ttl=None):
+        res = self.remote.save_many(mapping, ttl)
+        keys = list(mapping.keys())
+        self.local.evict(keys)
+        self._publish(keys)
+        return res
+
+    def remove(self, keys):
+        res = self.remote.remove(keys)
+        keys = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        self.local.evict(keys)
+        self._publish(keys)
+        return res
+
+    def clean(self):
+        res = self.remote.clean()
+        self.local.clear()
+        self._publish(None)
+        return res
+
+
 class SuperdeskCacheBackend(hermes.backend.AbstractBackend):
     """Proxy for hermes cache backend.
 
@@ -43,7 +285,8 @@ class SuperdeskCacheBackend(hermes.backend.AbstractBackend):
     so we can use @cache decorator before the app starts.
 
     Later it reads ``CACHE_URL`` config to figure out if we want to use redis backend
-    or memcached.
+    or memcached. With redis backend and ``CACHE_LOCAL_SIZE`` set it will also use
+    in-process cache.
     """
 
     @property
@@ -56,6 +299,11 @@ class SuperdeskCacheBackend(hermes.backend.AbstractBackend):
             if 'redis' in cache_url or 'unix' in cache_url:
                 app.cache = SuperdeskRedisBackend(self.mangler, url=cache_url)
                 logger.info('using redis cache backend')
+                if app.config.get('CACHE_LOCAL_SIZE'):
+                    app.cache = SuperdeskTwoTierBackend(self.mangler, app.cache,
+                                                        size=app.config['CACHE_LOCAL_SIZE'],
+                                                        ttl=app.config.get('CACHE_LOCAL_TTL', 30))
+                    logger.info('using local cache')
             elif cache_url:
                 import hermes.backend.memcached
                 app.cache = hermes.backend.memcached.Backend(self.mangler, servers=[cache_url])
@@ -76,6 +324,72 @@ class SuperdeskCacheBackend(hermes.backend.AbstractBackend):
         val = self._backend.load(keys)
         return val
 
+    def load_many(self, keys):
+        """Load multiple keys at once.
+
+        :param keys: list of keys
+        :return: dict with values for keys found in cache
+        """
+        backend = self._backend
+        if hasattr(backend, 'load_many'):
+            return backend.load_many(keys)
+        values = {key: backend.load(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def save_many(self, mapping, ttl=None):
+        """Save multiple keys at once.
+
+        :param mapping: dict with values to save
+        :param ttl: ttl in seconds
+        """
+        backend = self._backend
+        if hasattr(backend, 'save_many'):
+            return backend.save_many(mapping, ttl)
+        for key, value in mapping.items():
+            backend.save(key, value, ttl=ttl)
+
+    def fetch(self, key, compute, ttl=600, stale_ttl=None, beta=1.0):
+        """Get value from cache or compute it.
+
+        It uses probabilistic early expiration, so hot keys are refreshed before they expire,
+        and only single process computes the value while others wait or use stale value.
+
+        :param key: cache key
+        :param compute: function to compute value
+        :param ttl: how long value is fresh in seconds
+        :param stale_ttl: how long stale value can be used while other process computes new one, defaults to ttl
+        :param beta: early expiration factor, ``0`` disables it and higher values make it more eager
+        """
+        entry = self.load(key)
+        if not _is_entry(entry):
+            entry = None  # missing or saved without fetch
+        if entry is not None and not _should_refresh(entry, beta):
+            return entry['value']
+
+        lock = self.lock(key)
+        if lock.acquire(False):
+            try:
+                return self._compute(key, compute, ttl, stale_ttl)
+            finally:
+                lock.release()
+
+        if entry is not None:
+            return entry['value']  # other process is computing it
+
+        with lock:
+            entry = self.load(key)
+            if _is_entry(entry):
+                return entry['value']
+            return self._compute(key, compute, ttl, stale_ttl)
+
+    def _compute(self, key, compute, ttl, stale_ttl):
+        start = time.time()
+        value = compute()
+        now = time.time()
+        entry = {'value': value, 'delta': now - start, 'expiry': now + ttl}
+        self.save(key, entry, ttl=int(ttl + (ttl if stale_ttl is None else stale_ttl)))
+        return value
+
     def remove(self, keys):
         return self._backend.remove(keys)
 
@@ -83,4 +397,29 @@ class SuperdeskCacheBackend(hermes.backend.AbstractBackend):
         return self._backend.clean()
 
 
-cache = hermes.Hermes(SuperdeskCacheBackend, SuperdeskMangler, ttl=600)
+class SuperdeskCached(hermes.Cached):
+    """Cached callable using :meth:`SuperdeskCacheBackend.fetch`.
+
+    Hot entries are refreshed early by single process while others keep using
+    current value, so there is no stampede when entry expires.
+    """
+
+    def _entry_key(self, key):
+        """Get key including tags hash, missing tags are created."""
+        if self._tags:
+            named_tags = tuple(map(self._mangler.nameTag, self._tags))
+            tag_map = self._backend.load(named_tags)
+            missing_tags = set(named_tags) - set(tag_map.keys())
+            if missing_tags:
+                missing_tag_map = self._mangler.mapTags(missing_tags)
+                self._backend.save(mapping=missing_tag_map, ttl=None)
+                tag_map.update(missing_tag_map)
+            key += ':' + self._mangler.hashTags(tag_map)
+        return key
+
+    def __call__(self, *args, **kwargs):
+        key = self._entry_key(self._keyFunc(self._callable, *args, **kwargs))
+        return self._backend.fetch(key, lambda: self._callable(*args, **kwargs), ttl=self._ttl)
+
+
+cache = hermes.Hermes(SuperdeskCacheBackend, SuperdeskMangler, cachedClass=SuperdeskCached, ttl=600)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Per resource change markers used for conditional GET requests.
+
+For resources listed in ``CHANGE_MARKERS`` config the time of last write is kept
+in redis, so ``If-Modified-Since`` requests can be answered without querying
+mongo/elastic if there was no change since.
+
+Markers are updated by :class:`superdesk.eve_backend.EveBackend` on every write,
+so it only works for resources which are not modified directly via pymongo.
+"""
+
+import calendar
+
+from flask import current_app as app
+from superdesk.utc import utcnow
+from superdesk.logging import logger
+
+
+KEY_PREFIX = 'change_marker:'
+
+
+def is_tracked(endpoint_name):
+    """Test if change marker is enabled for given resource.
+
+    :param endpoint_name: resource name
+    """
+    enabled = app.config.get('CHANGE_MARKERS')
+    if enabled is True:
+        return True
+    return bool(enabled) and endpoint_name in enabled
+
+
+def _timestamp(date):
+    return calendar.timegm(date.utctimetuple()) + date.microsecond / 1e6
+
+
+def _key(endpoint_name):
+    # resources sharing the same collection share the marker
+    return KEY_PREFIX + app.data.datasource(endpoint_name)[0]
+
+
+def mark_changed(endpoint_name, updated=None):
+    """Store current time as last change of given resource.
+
+    :param endpoint_name: resource name
+    :param updated: ``_updated`` value of modified document, used if it's in the future
+    """
+    if not is_tracked(endpoint_name):
+        return
+    timestamp = _timestamp(utcnow())
+    if updated is not None:
+        timestamp = max(timestamp, _timestamp(updated))
+    try:
+        app.redis.set(_key(endpoint_name), timestamp)
+    except Exception as ex:
+        # if we can't set it better remove it so it won't return wrong not modified response
+        logger.exception('failed to set change marker for %s error=%s', endpoint_name, ex)
+        try:
+            app.redis.delete(_key(endpoint_name))
+        except Exception:
+            pass
+
+
+def is_not_modified(endpoint_name, since):
+    """Test if there was no change of given resource since given time.
+
+    Returns ``None`` if it's not known, so query must be used.
+
+    :param endpoint_name: resource name
+    :param since: datetime
+    """
+    if not is_tracked(endpoint_name):
+        return None
+    try:
+        last_change = app.redis.get(_key(endpoint_name))
+    except Exception as ex:
+        logger.exception('failed to get change marker for %s error=%s', endpoint_name, ex)
+        return None
+    if last_change is None:
+        return None
+    return float(last_change) <= _timestamp(since)
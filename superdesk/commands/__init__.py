@@ -1,6 +1,7 @@
 from .clean_images import CleanImages  # noqa
 from .rebuild_elastic_index import RebuildElasticIndex  # noqa
 from .index_from_mongo import IndexFromMongo  # noqa
+from .reconcile_search import ReconcileSearch  # noqa
 from .run_macro import RunMacro  # noqa
 from .data_updates import *  # noqa
 from .delete_archived_document import *  # noqa
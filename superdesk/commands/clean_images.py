@@ -18,6 +18,8 @@ class CleanImages(superdesk.Command):
 
     It checks the media type and calls the correspoinding function as s3 and mongo
     requires different approaches for handling multiple files.
+    With ``MEDIA_CONTENT_ADDRESSED`` it's the only way content addressed files get removed,
+    as those can be shared by multiple items.
     Probably running db.repairDatabase() is needed in Mongo to shring the DB size.
     """
 
@@ -60,14 +62,14 @@ class CleanImages(superdesk.Command):
                 used_images.add(str(item['media']))
 
             if item.get('renditions', {}):
-                used_images.add([str(rend.get('media')) for rend in item.get('renditions', {}).values()
-                                 if rend.get('media')])
+                used_images.update([str(rend.get('media')) for rend in item.get('renditions', {}).values()
+                                    if rend.get('media')])
 
             associations = [assoc.get('renditions') for assoc in (item.get(ASSOCIATIONS) or {}).values()
                             if assoc and assoc.get('renditions')]
             if associations:
                 for renditions in associations:
-                    used_images.add([str(rend.get('media')) for rend in renditions.values() if rend.get('media')])
+                    used_images.update([str(rend.get('media')) for rend in renditions.values() if rend.get('media')])
 
 
 superdesk.command('app:clean_images', CleanImages())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import pymongo
+import superdesk
+
+from flask import current_app as app
+from superdesk import config
+from superdesk.celery_app import celery
+from superdesk.logging import logger
+from superdesk.stats import stats
+
+
+class ReconcileSearch(superdesk.Command):
+    """Check sample of latest documents in mongo against elastic and fix divergences.
+
+    Documents missing in elastic or having different ``_etag`` there are indexed again.
+    It's meant to run periodically as a replacement of fixing elastic on every read,
+    so it's possible to use ``primary`` or ``search`` consistency for ``find_one``.
+
+    Example:
+    ::
+
+        $ python manage.py app:reconcile_search --resource archive --sample 1000
+
+    """
+
+    option_list = [
+        superdesk.Option('--resource', '-r', dest='resource', required=True),
+        superdesk.Option('--sample', '-s', dest='sample'),
+    ]
+
+    default_sample = 500
+
+    def run(self, resource, sample=None):
+        return reconcile_resource(resource, int(sample) if sample else self.default_sample)
+
+
+def reconcile_resource(resource, sample):
+    """Reconcile latest documents of given resource.
+
+    :param resource: resource name
+    :param sample: number of latest updated documents to check
+    :return: dict with number of checked, missing and stale documents
+    """
+    search_backend = app.data._search_backend(resource)
+    if search_backend is None:
+        return {'checked': 0, 'missing': 0, 'stale': 0}
+
+    backend = app.data._backend(resource)
+    source = app.data.datasource(resource)[0]
+    cursor = backend.pymongo(resource).db[source].find({}, {config.ID_FIELD: 1, config.ETAG: 1})
+    docs = list(cursor.sort(config.LAST_UPDATED, pymongo.DESCENDING).limit(sample))
+    if not docs:
+        return {'checked': 0, 'missing': 0, 'stale': 0}
+
+    es_args = search_backend._es_args(resource)
+    hits = search_backend.es.mget(body={'ids': [str(doc[config.ID_FIELD]) for doc in docs]},
+                                  index=es_args['index'], doc_type=es_args['doc_type'],
+                                  _source_include=config.ETAG)
+    indexed = {hit['_id']: hit.get('_source', {}).get(config.ETAG) for hit in hits['docs'] if hit.get('found')}
+
+    missing = [doc[config.ID_FIELD] for doc in docs if str(doc[config.ID_FIELD]) not in indexed]
+    stale = [doc[config.ID_FIELD] for doc in docs
+             if str(doc[config.ID_FIELD]) in indexed and indexed[str(doc[config.ID_FIELD])] != doc.get(config.ETAG)]
+
+    stats.incr('search.reconcile.checked.{}'.format(resource), len(docs))
+    stats.incr('search.reconcile.missing.{}'.format(resource), len(missing))
+    stats.incr('search.reconcile.stale.{}'.format(resource), len(stale))
+
+    if missing or stale:
+        logger.warning('search divergence resource=%s missing=%d stale=%d', resource, len(missing), len(stale))
+        ids = missing + stale
+        items = list(superdesk.get_resource_service(resource).find({config.ID_FIELD: {'$in': ids}},
+                                                                   max_results=len(ids)))
+        search_backend.bulk_insert(resource, items)
+
+    return {'checked': len(docs), 'missing': len(missing), 'stale': len(stale)}
+
+
+@celery.task(soft_time_limit=600)
+def reconcile_search():
+    """Reconcile resources configured via ``SEARCH_RECONCILE_RESOURCES``."""
+    for resource in app.config.get('SEARCH_RECONCILE_RESOURCES', []):
+        try:
+            reconcile_resource(resource, app.config.get('SEARCH_RECONCILE_SAMPLE', ReconcileSearch.default_sample))
+        except Exception as ex:
+            logger.exception('search reconcile failed resource=%s error=%s', resource, ex)
+
+
+superdesk.command('app:reconcile_search', ReconcileSearch())
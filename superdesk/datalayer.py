@@ -17,6 +17,9 @@ from eve_elastic import Elastic, InvalidSearchString  # noqa
 from flask import current_app
 from superdesk.lock import lock, unlock
 from superdesk.json_utils import SuperdeskJSONEncoder
+from superdesk.index_queue import flush_index_queue
+from superdesk.change_markers import mark_changed
+from superdesk.services import report_identity_map
 
 
 class SuperdeskDataLayer(DataLayer):
@@ -36,6 +39,8 @@ class SuperdeskDataLayer(DataLayer):
         self.driver = self.mongo.driver
         self.storage = self.driver
         self.elastic = Elastic(app, serializer=SuperdeskJSONEncoder(), skip_index_init=True, retry_on_timeout=True)
+        app.teardown_appcontext(flush_index_queue)
+        app.teardown_appcontext(report_identity_map)
 
     def pymongo(self, resource=None, prefix=None):
         return self.mongo.pymongo(resource, prefix)
@@ -80,6 +85,7 @@ class SuperdeskDataLayer(DataLayer):
         datasource = self.datasource(resource)
         driver = self._backend(resource).driver
         collection = driver.db[datasource[0]]
+        mark_changed(resource)
         return collection.update(query, {'$set': updates}, multi=True)
 
     def replace(self, resource, id_, document, original):
@@ -148,6 +148,39 @@ ELASTICSEARCH_SETTINGS = {
     }
 }
 
+#: resources indexed using write-behind queue, list of resource names or ``True`` for all
+ELASTIC_WRITE_BEHIND = False
+
+#: max number of documents waiting in write-behind queue before it's flushed
+ELASTIC_WRITE_BEHIND_SIZE = int(env('ELASTIC_WRITE_BEHIND_SIZE', 500))
+
+#: max number of seconds a document can wait in write-behind queue
+ELASTIC_WRITE_BEHIND_INTERVAL = int(env('ELASTIC_WRITE_BEHIND_INTERVAL', 5))
+
+#: number of retries for documents which failed to index from write-behind queue
+ELASTIC_WRITE_BEHIND_RETRIES = int(env('ELASTIC_WRITE_BEHIND_RETRIES', 3))
+
+#: number of documents removed from elastic/mongo at once when deleting by query
+DELETE_CHUNK_SIZE = int(env('DELETE_CHUNK_SIZE', 500))
+
+#: resources using change markers for ``If-Modified-Since`` requests, list of resource names or ``True`` for all
+CHANGE_MARKERS = False
+
+#: resources using identity map for ``find_one`` by ``_id`` within a request/celery task
+IDENTITY_MAP_RESOURCES = []
+
+#: default ``find_one`` consistency mode - ``primary``, ``search`` or ``reconcile``
+FIND_ONE_CONSISTENCY = env('FIND_ONE_CONSISTENCY', 'reconcile')
+
+#: ``find_one`` consistency mode per resource, eg. ``{'archive': 'primary'}``
+FIND_ONE_CONSISTENCY_RESOURCES = {}
+
+#: resources checked by ``reconcile_search`` celery task
+SEARCH_RECONCILE_RESOURCES = []
+
+#: number of latest updated documents checked by ``reconcile_search`` celery task
+SEARCH_RECONCILE_SAMPLE = int(env('SEARCH_RECONCILE_SAMPLE', 500))
+
 #: redis url
 REDIS_URL = env('REDIS_URL', 'redis://localhost:6379')
 if env('REDIS_PORT'):
@@ -156,6 +189,21 @@ if env('REDIS_PORT'):
 #: cache url - superdesk will try to figure out if it's redis or memcached
 CACHE_URL = env('SUPERDESK_CACHE_URL', REDIS_URL)
 
+#: max number of entries in in-process cache in front of redis cache, ``0`` to disable it
+CACHE_LOCAL_SIZE = int(env('CACHE_LOCAL_SIZE', 0))
+
+#: max number of seconds an entry is kept in in-process cache
+CACHE_LOCAL_TTL = int(env('CACHE_LOCAL_TTL', 30))
+
+#: max number of seconds in-process caches of vocabularies, content filters etc. are kept if not invalidated
+GENERATION_CACHE_TTL = int(env('GENERATION_CACHE_TTL', 300))
+
+#: lock backend - ``mongo`` or ``redis``
+LOCK_BACKEND = env('LOCK_BACKEND', 'mongo')
+
+#: lock lease in seconds, leased task locks with longer expiry are renewed by heartbeat, ``0`` to disable it
+LOCK_LEASE = int(env('LOCK_LEASE', 0))
+
 #: celery broker
 BROKER_URL = env('CELERY_BROKER_URL', REDIS_URL)
 CELERY_BROKER_URL = BROKER_URL
@@ -177,6 +225,7 @@ CELERY_TASK_QUEUES = (
     Queue(celery_queue('expiry'), Exchange(celery_queue('expiry'), type='topic'), routing_key='expiry.#'),
     Queue(celery_queue('legal'), Exchange(celery_queue('legal'), type='topic'), routing_key='legal.#'),
     Queue(celery_queue('publish'), Exchange(celery_queue('publish'), type='topic'), routing_key='publish.#'),
+    Queue(celery_queue('renditions'), Exchange(celery_queue('renditions'), type='topic'), routing_key='renditions.#'),
 )
 
 CELERY_TASK_ROUTES = {
@@ -223,6 +272,10 @@ CELERY_TASK_ROUTES = {
     'apps.legal_archive.import_legal_archive': {
         'queue': celery_queue('legal'),
         'routing_key': 'legal.archive'
+    },
+    'superdesk.io.commands.update_ingest.generate_ingest_renditions': {
+        'queue': celery_queue('renditions'),
+        'routing_key': 'renditions.ingest'
     }
 }
 
@@ -428,6 +481,15 @@ RENDITIONS = {
     }
 }
 
+#: Number of processes used to encode picture renditions, ``0`` to encode them in current process
+RENDITIONS_POOL_SIZE = int(env('RENDITIONS_POOL_SIZE', 0))
+
+#: Store media using id derived from content hash, so duplicates are stored and rendered once
+MEDIA_CONTENT_ADDRESSED = (env('MEDIA_CONTENT_ADDRESSED', 'false').lower() == 'true')
+
+#: Minutes while unreferenced content addressed media is kept after it was uploaded or reused
+MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES = int(env('MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES', 60))
+
 SERVER_DOMAIN = 'localhost'
 
 
@@ -482,6 +544,21 @@ CONTENT_EXPIRY_MINUTES = int(env('CONTENT_EXPIRY_MINUTES', 0))
 #: The number of minutes before ingest items are purged
 INGEST_EXPIRY_MINUTES = int(env('INGEST_EXPIRY_MINUTES', 2 * 24 * 60))
 
+#: Save ingested items using bulk writes instead of one by one
+INGEST_BATCH_WRITES = (env('INGEST_BATCH_WRITES', 'false').lower() == 'true')
+
+#: Generate renditions of ingested pictures in ``renditions`` celery queue after items are saved
+INGEST_ASYNC_RENDITIONS = (env('INGEST_ASYNC_RENDITIONS', 'false').lower() == 'true')
+
+#: Number of seconds another renditions task for the same original url is not queued
+INGEST_RENDITIONS_TASK_TTL = int(env('INGEST_RENDITIONS_TASK_TTL', 3600))
+
+#: Number of threads ingesting fetched items while provider is fetching next ones, ``0`` to disable it
+INGEST_PIPELINE_WORKERS = int(env('INGEST_PIPELINE_WORKERS', 0))
+
+#: Max number of fetched batches of items waiting to be ingested
+INGEST_PIPELINE_QUEUE_SIZE = int(env('INGEST_PIPELINE_QUEUE_SIZE', 2))
+
 #: The number of minutes before published content items are purged
 PUBLISHED_CONTENT_EXPIRY_MINUTES = int(env('PUBLISHED_CONTENT_EXPIRY_MINUTES', 0))
 
@@ -510,6 +587,10 @@ WS_PORT = env('WSPORT', '5100')
 #: Defines the maximum value of Publish Sequence Number after which the value will start from 1
 MAX_VALUE_OF_PUBLISH_SEQUENCE = int(env('MAX_VALUE_OF_PUBLISH_SEQUENCE', 9999))
 
+#: Sequences which can have gaps reserved in blocks per process, sequence key prefix -> block size.
+#: Sequences not listed here are strictly contiguous.
+SEQUENCE_BLOCK_SIZES = {}
+
 #: Defines default value for Source to be set for manually created articles
 DEFAULT_SOURCE_VALUE_FOR_MANUAL_ARTICLES = env('DEFAULT_SOURCE_VALUE_FOR_MANUAL_ARTICLES', 'AAP')
 
@@ -562,6 +643,18 @@ ENABLE_PROFILING = False
 #: default timeout for ftp connections
 FTP_TIMEOUT = 300
 
+#: Number of items per batch when xml files are ingested using streaming parser, ``0`` to parse whole files
+INGEST_XML_STREAMING_BATCH_SIZE = int(env('INGEST_XML_STREAMING_BATCH_SIZE', 0))
+
+#: Watch file ingest directories using inotify instead of listing them on every update
+FILE_INGEST_WATCH = (env('FILE_INGEST_WATCH', 'false').lower() == 'true')
+
+#: Minutes after which watched file ingest directory is scanned again
+FILE_INGEST_RESCAN_MINUTES = int(env('FILE_INGEST_RESCAN_MINUTES', 10))
+
+#: Number of connections used by ftp ingest to download new files, ``0`` to download all files changed since last update
+FTP_INGEST_CONNECTIONS = int(env('FTP_INGEST_CONNECTIONS', 0))
+
 #: This setting is used to overide the desk/stage expiry for items when spiked
 SPIKE_EXPIRY_MINUTES = None
 
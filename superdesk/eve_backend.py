@@ -17,29 +17,67 @@ from eve.io.mongo import MongoJSONEncoder
 from superdesk.utc import utcnow
 from superdesk.logging import logger, item_msg
 from eve.methods.common import resolve_document_etag
-from elasticsearch.exceptions import RequestError, NotFoundError
+from elasticsearch.exceptions import RequestError
+from elasticsearch.helpers import bulk
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from superdesk.errors import SuperdeskApiError
+from superdesk.index_queue import is_write_behind, get_index_queue
+from superdesk.change_markers import mark_changed, is_not_modified
+from superdesk.services import get_identity_map
+from superdesk.stats import stats
+from eve_elastic.elastic import ElasticCursor
+
+
+CONSISTENCY_PRIMARY = 'primary'
+CONSISTENCY_SEARCH = 'search'
+CONSISTENCY_RECONCILE = 'reconcile'
 
 
 class EveBackend():
     """Superdesk data backend, handles mongodb/elastic data storage."""
 
-    def find_one(self, endpoint_name, req, **lookup):
+    def find_one(self, endpoint_name, req, consistency=None, **lookup):
         """Find single item.
 
+        There are 3 consistency modes:
+
+        - ``primary`` - read only from mongo
+        - ``search`` - read only from elastic (or mongo if there is no search backend)
+        - ``reconcile`` - read from both and fix elastic if item is missing there
+
+        Mode is taken from ``consistency`` param, ``FIND_ONE_CONSISTENCY_RESOURCES`` config
+        for given resource or ``FIND_ONE_CONSISTENCY`` config.
+
         :param endpoint_name: resource name
         :param req: parsed request
+        :param consistency: consistency mode
         :param lookup: additional filter
         """
+        if consistency is None:
+            consistency = self._get_consistency(endpoint_name)
+
+        if consistency == CONSISTENCY_SEARCH:
+            search_backend = self._lookup_backend(endpoint_name)
+            if search_backend and not self._is_index_pending(endpoint_name, lookup.get(config.ID_FIELD)):
+                return search_backend.find_one(endpoint_name, req=req, **lookup)
+
         backend = self._backend(endpoint_name)
         item = backend.find_one(endpoint_name, req=req, **lookup)
-        search_backend = self._lookup_backend(endpoint_name, fallback=True)
+        if consistency != CONSISTENCY_RECONCILE:
+            return item
+
+        search_backend = self._lookup_backend(endpoint_name)
         if search_backend:
             item_search = search_backend.find_one(endpoint_name, req=req, **lookup)
             if item is None and item_search:
                 item = item_search
+                stats.incr('find_one.divergence.only_search')
                 logger.warn(item_msg('item is only in elastic', item))
+            elif item_search is None and item and self._is_index_pending(endpoint_name, item[config.ID_FIELD]):
+                pass  # item is waiting in write-behind queue
             elif item_search is None and item:
+                stats.incr('find_one.divergence.only_mongo')
                 logger.warn(item_msg('item is only in mongo', item))
                 try:
                     logger.info(item_msg('trying to add item to elastic', item))
@@ -48,6 +86,10 @@ class EveBackend():
                     logger.error(item_msg('failed to add item into elastic error={}'.format(str(e)), item))
         return item
 
+    def _get_consistency(self, endpoint_name):
+        resources = app.config.get('FIND_ONE_CONSISTENCY_RESOURCES', {})
+        return resources.get(endpoint_name, app.config.get('FIND_ONE_CONSISTENCY', CONSISTENCY_RECONCILE))
+
     def find(self, endpoint_name, where, max_results=0):
         """Find items for given endpoint using mongo query in python dict object.
 
@@ -72,6 +114,7 @@ class EveBackend():
         req.args = {'source': json.dumps(source)}
         search_backend = self._lookup_backend(endpoint_name)
         if search_backend:
+            self._flush_pending(endpoint_name)
             return search_backend.find(endpoint_name, req, {})
         else:
             logger.warn('there is no search backend for %s' % endpoint_name)
@@ -79,11 +122,22 @@ class EveBackend():
     def get(self, endpoint_name, req, lookup):
         """Get list of items.
 
+        If there is change marker for resource it will use it for ``If-Modified-Since`` requests
+        to avoid querying if there was no change.
+
         :param endpoint_name: resource name
         :param req: parsed request
         :param lookup: additional filter
         """
+        self._flush_pending(endpoint_name)
         backend = self._lookup_backend(endpoint_name, fallback=True)
+        if req.if_modified_since:
+            not_modified = is_not_modified(endpoint_name, req.if_modified_since)
+            if not_modified:
+                return ElasticCursor([])  # return 304 without querying
+            elif not_modified is not None:
+                req.if_modified_since = None
+                return backend.find(endpoint_name, req, lookup)
         cursor = backend.find(endpoint_name, req, lookup)
         if not cursor.count():
             return cursor  # return 304 if not modified
@@ -116,6 +170,8 @@ class EveBackend():
         if kwargs.get('query'):
             kwargs['query'] = backend._mongotize(kwargs['query'], endpoint_name)
 
+        self._invalidate_identity_map(endpoint_name)
+        mark_changed(endpoint_name)
         return backend.driver.db[endpoint_name].find_and_modify(**kwargs)
 
     def create(self, endpoint_name, docs, **kwargs):
@@ -141,8 +197,40 @@ class EveBackend():
 
         backend = self._backend(endpoint_name)
         ids = backend.insert(endpoint_name, docs)
+        mark_changed(endpoint_name, max(doc[config.LAST_UPDATED] for doc in docs) if docs else None)
         return ids
 
+    def create_many_in_mongo(self, endpoint_name, docs):
+        """Create items in mongo using single unordered bulk insert.
+
+        Unlike :meth:`create_in_mongo` it doesn't stop on first error,
+        so documents which can't be inserted don't affect the others.
+
+        :param endpoint_name: resource name
+        :param docs: list of docs to create
+        :return: tuple of inserted ids and list of ``(doc, error)`` tuples for failed docs
+        """
+        if not docs:
+            return [], []
+
+        for doc in docs:
+            self.set_default_dates(doc)
+            if not doc.get(config.ETAG):
+                doc[config.ETAG] = document_etag(doc)
+
+        backend = self._backend(endpoint_name)
+        collection = backend.pymongo(endpoint_name).db[self._datasource(endpoint_name)]
+        errors = {}
+        try:
+            collection.insert_many(docs, ordered=False)
+        except BulkWriteError as ex:
+            errors = {error['index']: error.get('errmsg') for error in ex.details.get('writeErrors', [])}
+
+        inserted = [doc for i, doc in enumerate(docs) if i not in errors]
+        if inserted:
+            mark_changed(endpoint_name, max(doc[config.LAST_UPDATED] for doc in inserted))
+        return [doc[config.ID_FIELD] for doc in inserted], [(docs[i], errors[i]) for i in sorted(errors)]
+
     def create_in_search(self, endpoint_name, docs, **kwargs):
         """Create items in elastic.
 
@@ -150,7 +238,11 @@ class EveBackend():
         :param docs: list of docs
         """
         search_backend = self._lookup_backend(endpoint_name)
-        if search_backend:
+        if search_backend and is_write_behind(endpoint_name):
+            queue = get_index_queue()
+            for doc in docs:
+                queue.push(endpoint_name, doc[config.ID_FIELD])
+        elif search_backend:
             search_backend.insert(endpoint_name, docs, **kwargs)
 
     def update(self, endpoint_name, id, updates, original):
@@ -188,6 +280,7 @@ class EveBackend():
     def _change_request(self, endpoint_name, id, updates, original):
         backend = self._backend(endpoint_name)
         search_backend = self._lookup_backend(endpoint_name)
+        self._invalidate_identity_map(endpoint_name, id)
 
         try:
             backend.update(endpoint_name, id, updates, original)
@@ -203,7 +296,10 @@ class EveBackend():
                              'Updates are : {}'.format(id, endpoint_name, updates))
                 return updates
 
-        if search_backend:
+        mark_changed(endpoint_name, updates.get(config.LAST_UPDATED))
+        if search_backend and is_write_behind(endpoint_name):
+            get_index_queue().push(endpoint_name, id)
+        elif search_backend:
             doc = backend.find_one(endpoint_name, req=None, _id=id)
             if not doc:  # there is no doc in mongo, remove it from elastic
                 logger.warn("Item is missing in mongo resource=%s id=%s".format(endpoint_name, id))
@@ -242,9 +338,47 @@ class EveBackend():
             resolve_document_etag(updated, endpoint_name)
             updates[config.ETAG] = updated[config.ETAG]
         backend = self._backend(endpoint_name)
+        self._invalidate_identity_map(endpoint_name, id)
         res = backend.update(endpoint_name, id, updates, original)
+        mark_changed(endpoint_name, updates.get(config.LAST_UPDATED))
         return res if res is not None else updates
 
+    def update_many_in_mongo(self, endpoint_name, changes):
+        """Update items in mongo using single unordered bulk write.
+
+        Modifies ``_updated`` timestamp and ``_etag`` like :meth:`update_in_mongo`.
+
+        :param endpoint_name: resource name
+        :param changes: list of ``(id, updates, original)`` tuples
+        :return: list of ``(id, error)`` tuples for failed updates
+        """
+        if not changes:
+            return []
+
+        requests = []
+        for id, updates, original in changes:
+            updates.setdefault(config.LAST_UPDATED, utcnow())
+            if config.ETAG not in updates:
+                updated = original.copy()
+                updated.update(updates)
+                resolve_document_etag(updated, endpoint_name)
+                updates[config.ETAG] = updated[config.ETAG]
+            updates = {key: val for key, val in updates.items() if key != config.ID_FIELD}
+            requests.append(UpdateOne({config.ID_FIELD: id}, {'$set': updates}))
+            self._invalidate_identity_map(endpoint_name, id)
+
+        backend = self._backend(endpoint_name)
+        collection = backend.pymongo(endpoint_name).db[self._datasource(endpoint_name)]
+        errors = {}
+        try:
+            collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as ex:
+            errors = {error['index']: error.get('errmsg') for error in ex.details.get('writeErrors', [])}
+
+        if len(errors) < len(changes):
+            mark_changed(endpoint_name, max(updates[config.LAST_UPDATED] for _id, updates, _orig in changes))
+        return [(changes[i][0], errors[i]) for i in sorted(errors)]
+
     def replace_in_mongo(self, endpoint_name, id, document, original):
         """Replace item in mongo.
 
@@ -254,7 +388,9 @@ class EveBackend():
         :param original: current version of item
         """
         backend = self._backend(endpoint_name)
+        self._invalidate_identity_map(endpoint_name, id)
         res = backend.replace(endpoint_name, id, document, original)
+        mark_changed(endpoint_name, document.get(config.LAST_UPDATED))
         return res
 
     def replace_in_search(self, endpoint_name, id, document, original):
@@ -266,38 +402,101 @@ class EveBackend():
         :param original: current version of item
         """
         search_backend = self._lookup_backend(endpoint_name)
-        if search_backend is not None:
+        if search_backend is not None and is_write_behind(endpoint_name):
+            get_index_queue().push(endpoint_name, id)
+        elif search_backend is not None:
             search_backend.replace(endpoint_name, id, document)
 
     def delete(self, endpoint_name, lookup):
         """Delete method to delete by using mongo query syntax.
 
+        Matching ids are streamed from mongo in chunks of ``DELETE_CHUNK_SIZE``,
+        each chunk is removed from elastic using bulk api first and then
+        ids confirmed by elastic are removed from mongo.
+
         :param endpoint_name: Name of the endpoint
         :param lookup: User mongo query syntax. example 1. ``{'_id':123}``, 2. ``{'item_id': {'$in': [123, 234]}}``
-        :returns: Returns the mongo remove command response. {'n': 12, 'ok': 1}
+        :returns: Number of removed documents
         """
         backend = self._backend(endpoint_name)
         search_backend = self._lookup_backend(endpoint_name)
-        docs = self.get_from_mongo(endpoint_name, lookup=lookup, req=ParsedRequest())
-        ids = [doc[config.ID_FIELD] for doc in docs]
-        removed_ids = ids
-        logger.info("total documents to be removed {}".format(len(ids)))
-        if search_backend and ids:
-            removed_ids = []
-            # first remove it from search backend, so it won't show up. when this is done - remove it from mongo
+        queue = get_index_queue(create=False)
+        total = 0
+        removed = 0
+        for ids in self._get_ids_chunks(endpoint_name, lookup, app.config.get('DELETE_CHUNK_SIZE', 500)):
+            total += len(ids)
             for _id in ids:
-                try:
-                    self.remove_from_search(endpoint_name, _id)
-                    removed_ids.append(_id)
-                except NotFoundError:
-                    logger.warning('item missing from elastic _id=%s' % (_id, ))
-                    removed_ids.append(_id)
-                except:
-                    logger.exception('item can not be removed from elastic _id=%s' % (_id, ))
-        backend.remove(endpoint_name, {config.ID_FIELD: {'$in': removed_ids}})
-        logger.info("Removed {} documents from {}.".format(len(ids), endpoint_name))
-        if not ids:
+                self._invalidate_identity_map(endpoint_name, _id)
+            if queue:
+                for _id in ids:
+                    queue.discard(endpoint_name, _id)
+            if search_backend:
+                # first remove it from search backend, so it won't show up. when this is done - remove it from mongo
+                ids = self._remove_from_search_bulk(endpoint_name, ids)
+            if ids:
+                backend.remove(endpoint_name, {config.ID_FIELD: {'$in': ids}})
+                removed += len(ids)
+                mark_changed(endpoint_name)
+            logger.info("Removed {} of {} documents from {}.".format(removed, total, endpoint_name))
+        if not total:
             logger.warn("No documents for {} resource were deleted using lookup {}".format(endpoint_name, lookup))
+        elif removed < total:
+            logger.error("Failed to remove {} documents from {}.".format(total - removed, endpoint_name))
+        return removed
+
+    def _get_ids_chunks(self, endpoint_name, lookup, chunk_size):
+        """Generate lists of ids matching lookup, reading only ``_id`` from mongo.
+
+        :param endpoint_name: resource name
+        :param lookup: mongo query
+        :param chunk_size: max length of list
+        """
+        backend = self._backend(endpoint_name)
+        source, datasource_filter, _projection, _sort = app.data.datasource(endpoint_name)
+        query = backend._mongotize(lookup or {}, endpoint_name)
+        if datasource_filter:
+            query = {'$and': [datasource_filter, query]}
+        cursor = backend.pymongo(endpoint_name).db[source].find(query, {config.ID_FIELD: 1}, batch_size=chunk_size)
+        ids = []
+        for doc in cursor:
+            ids.append(doc[config.ID_FIELD])
+            if len(ids) == chunk_size:
+                yield ids
+                ids = []
+        if ids:
+            yield ids
+
+    def _remove_from_search_bulk(self, endpoint_name, ids):
+        """Remove documents from search backend using bulk api.
+
+        :param endpoint_name: resource name
+        :param ids: list of ids to remove
+        :returns: list of ids which were removed or were missing in elastic
+        """
+        search_backend = app.data._search_backend(endpoint_name)
+        es_args = search_backend._es_args(endpoint_name)
+        actions = [{
+            '_op_type': 'delete',
+            '_index': es_args['index'],
+            '_type': es_args['doc_type'],
+            '_id': str(_id),
+        } for _id in ids]
+
+        try:
+            _success, errors = bulk(search_backend.es, actions, raise_on_error=False, refresh=True)
+        except Exception:
+            logger.exception('items can not be removed from elastic resource=%s' % (endpoint_name, ))
+            return []
+
+        failed = set()
+        for error in errors:
+            info = error.get('delete', {})
+            if info.get('status') == 404:
+                logger.warning('item missing from elastic _id=%s' % (info.get('_id'), ))
+            else:
+                failed.add(info.get('_id'))
+                logger.error('item can not be removed from elastic _id=%s error=%s' % (info.get('_id'), info))
+        return [_id for _id in ids if str(_id) not in failed]
 
     def remove_from_search(self, endpoint_name, _id):
         """Remove document from search backend.
@@ -305,11 +504,48 @@ class EveBackend():
         :param endpoint_name
         :param _id
         """
+        queue = get_index_queue(create=False)
+        if queue:
+            queue.discard(endpoint_name, _id)
         app.data._search_backend(endpoint_name).remove(endpoint_name, {'_id': str(_id)})
 
+    def flush(self, endpoint_name=None):
+        """Index documents waiting in write-behind queue.
+
+        It's done automatically at the end of request/task, but it can be used
+        in tests or commands which need search to be up to date.
+
+        :param endpoint_name: resource name, flush all resources if not set
+        :return: number of indexed documents
+        """
+        queue = get_index_queue(create=False)
+        if queue:
+            return queue.flush(endpoint_name)
+        return 0
+
+    def _flush_pending(self, endpoint_name):
+        """Flush write-behind queue for resource before searching it to read own writes."""
+        queue = get_index_queue(create=False)
+        if queue and queue.is_pending(endpoint_name):
+            queue.flush(endpoint_name)
+
+    def _is_index_pending(self, endpoint_name, _id):
+        queue = get_index_queue(create=False)
+        return bool(queue) and queue.is_pending(endpoint_name, _id)
+
     def _datasource(self, endpoint_name):
         return app.data._datasource(endpoint_name)[0]
 
+    def _invalidate_identity_map(self, endpoint_name, _id=None):
+        """Remove document from identity map of current app context, all collection documents if no id given.
+
+        :param endpoint_name: resource name
+        :param _id: document id
+        """
+        identity_map = get_identity_map(create=False)
+        if identity_map is not None:
+            identity_map.invalidate(self._datasource(endpoint_name), _id)
+
     def _backend(self, endpoint_name):
         return app.data._backend(endpoint_name)
 
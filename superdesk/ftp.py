@@ -1,24 +1,101 @@
-
+import queue
 import ftplib
+import threading
 
 from contextlib import contextmanager
 from flask import current_app as app
 
 
-@contextmanager
-def ftp_connect(config):
-    """Get ftp connection for given config.
+def ftp_open(config, timeout=None):
+    """Open ftp connection for given config.
 
-    use with `with`
-
-    :param config: dict with `host`, `username`, `password`, `path` and `passive`
+    :param config: dict with `host`, `port`, `username`, `password`, `path` and `passive`
+    :param timeout: connection timeout, ``FTP_TIMEOUT`` setting is used if not set
     """
-    ftp = ftplib.FTP(config.get('host'), timeout=app.config.get('FTP_TIMEOUT', 300))
+    if timeout is None:
+        timeout = app.config.get('FTP_TIMEOUT', 300)
+    ftp = ftplib.FTP(timeout=timeout)
+    ftp.connect(config.get('host'), int(config.get('port') or 21))
     if config.get('username'):
         ftp.login(config.get('username'), config.get('password'))
     if config.get('path'):
         ftp.cwd(config.get('path', '').lstrip('/'))
     if config.get('passive') is False:  # only set this when not active, it's passive by default
         ftp.set_pasv(False)
-    yield ftp
-    ftp.close()
+    return ftp
+
+
+@contextmanager
+def ftp_connect(config):
+    """Get ftp connection for given config.
+
+    use with `with`
+
+    :param config: dict with `host`, `port`, `username`, `password`, `path` and `passive`
+    """
+    ftp = ftp_open(config)
+    try:
+        yield ftp
+    finally:
+        ftp.close()
+
+
+class FTPConnectionPool():
+    """Pool of ftp connections which are reused until the pool is closed.
+
+    Connections are opened when needed, so there are never more connections
+    than threads using the pool at the same time. It can be used from threads
+    without app context.
+
+    use with `with`
+
+    :param config: dict with `host`, `port`, `username`, `password`, `path` and `passive`
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.timeout = app.config.get('FTP_TIMEOUT', 300)
+        self._idle = queue.LifoQueue()
+        self._opened = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Get connection from pool, it's returned to the pool when done unless there was an ftp error."""
+        try:
+            ftp = self._idle.get_nowait()
+        except queue.Empty:
+            ftp = ftp_open(self.config, self.timeout)
+            with self._lock:
+                self._opened.append(ftp)
+        try:
+            yield ftp
+        except ftplib.all_errors:
+            self._discard(ftp)
+            raise
+        else:
+            self._idle.put(ftp)
+
+    def _discard(self, ftp):
+        with self._lock:
+            self._opened.remove(ftp)
+        try:
+            ftp.close()
+        except ftplib.all_errors:
+            pass
+
+    def close(self):
+        """Close all connections."""
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for ftp in opened:
+            try:
+                ftp.close()
+            except ftplib.all_errors:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""In-process caches invalidated across processes via generation counter.
+
+When cached data is modified the cache is cleared in current process and its
+generation counter in redis is incremented. Other processes compare it with
+the generation their data was loaded at and clear it when it differs.
+
+Generation is checked at most once per app context, so it's a single redis ``GET``
+per request or celery task no matter how many lookups are done. If redis is not
+available cached data expires after ``GENERATION_CACHE_TTL`` seconds.
+"""
+
+import time
+import threading
+
+from flask import g, has_app_context, current_app as app
+from superdesk.logging import logger
+
+
+class GenerationCache():
+    """Base class for in-process caches.
+
+    Subclasses implement :meth:`reset` which drops cached data
+    and call :meth:`check` before reading it. Data loaded outside of the lock
+    should be stored only if :attr:`version` read before loading is still current,
+    otherwise it could store data loaded before concurrent :meth:`invalidate`.
+
+    :param name: cache name, used for redis key
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.generation_key = '{}:generation'.format(name)
+        self._lock = threading.RLock()
+        self._generation = None
+        self._loaded = time.time()
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Drop cached data."""
+        raise NotImplementedError()
+
+    def clear(self):
+        """Clear cached data in current process."""
+        with self._lock:
+            self.reset()
+            self.version += 1
+            self._loaded = time.time()
+
+    def check(self):
+        """Clear cached data if it was modified in other process or if it's expired."""
+        expired = time.time() - self._loaded >= app.config.get('GENERATION_CACHE_TTL', 300)
+        checked = _get_checked()
+        if expired or checked is None or self.name not in checked:
+            generation = self._get_generation()
+            if expired or generation != self._generation:
+                with self._lock:
+                    self.clear()
+                    self._generation = generation
+            if checked is not None:
+                checked.add(self.name)
+
+    def is_current(self, version):
+        """Test if cached data was not changed since ``version``, use it while holding the lock.
+
+        :param version: :attr:`version` read before loading data
+        """
+        return version == self.version
+
+    def invalidate(self):
+        """Clear cached data in current process and notify other processes."""
+        self.clear()
+        self.notify()
+
+    def notify(self):
+        """Notify other processes about change.
+
+        Returns ``True`` if there was no other change since generation was checked
+        in current process, so cached data can be updated instead of cleared.
+        """
+        redis = getattr(app, 'redis', None)
+        if redis is None:
+            return True
+        try:
+            generation = redis.incr(self.generation_key)
+        except Exception as ex:
+            logger.warning('failed to update generation cache=%s error=%s', self.name, ex)
+            return False
+        with self._lock:
+            in_sync = self._generation is not None and generation == self._generation + 1
+            self._generation = generation
+        return in_sync
+
+    def _get_generation(self):
+        redis = getattr(app, 'redis', None)
+        if redis is None:
+            return None
+        try:
+            return int(redis.get(self.generation_key) or 0)
+        except Exception as ex:
+            logger.warning('failed to get generation cache=%s error=%s', self.name, ex)
+            return None
+
+
+def _get_checked():
+    """Get names of caches checked in current app context."""
+    if not has_app_context():
+        return None
+    checked = getattr(g, '_generation_caches_checked', None)
+    if checked is None:
+        checked = g._generation_caches_checked = set()
+    return checked
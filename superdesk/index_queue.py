@@ -0,0 +1,226 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Write-behind queue for search index operations.
+
+When enabled via ``ELASTIC_WRITE_BEHIND`` config, :class:`superdesk.eve_backend.EveBackend`
+will write to mongo right away but only queue the document id for indexing. Queued ids
+are coalesced, so when there are multiple writes to the same document within a request
+it will be indexed only once, using its latest version from mongo.
+
+The queue is stored in app context, so it is per request or per celery task, and it gets
+flushed when it reaches ``ELASTIC_WRITE_BEHIND_SIZE`` items, when the oldest item waits longer
+than ``ELASTIC_WRITE_BEHIND_INTERVAL`` seconds and always when the app context is torn down.
+
+Documents which fail to index are retried up to ``ELASTIC_WRITE_BEHIND_RETRIES`` times with
+backoff. If those still fail they are put back to the queue and :class:`IndexQueueError` is raised,
+so the error is not lost and documents are retried on next flush.
+"""
+
+import time
+
+from collections import OrderedDict
+from flask import g, current_app as app
+from eve.utils import config
+from elasticsearch.exceptions import NotFoundError
+from superdesk.logging import logger
+from superdesk.stats import stats
+
+
+BACKOFF = 0.1
+
+
+class IndexQueueError(Exception):
+    """Raised when documents could not be indexed, those are queued again."""
+
+    def __init__(self, resource, ids):
+        super().__init__('failed to index {} documents resource={} ids={}'.format(len(ids), resource, ids))
+        self.resource = resource
+        self.ids = ids
+
+
+class IndexQueue():
+    """Coalescing queue of documents waiting to be indexed.
+
+    :param size: max number of pending documents before flush
+    :param interval: max number of seconds a document can wait for flush
+    """
+
+    def __init__(self, size, interval):
+        self.size = size
+        self.interval = interval
+        self._pending = OrderedDict()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, resource, _id):
+        """Add document to queue, if it's there already keep its original position.
+
+        :param resource: resource name
+        :param _id: document id
+        """
+        key = (resource, str(_id))
+        if key not in self._pending:
+            self._pending[key] = (_id, time.time())
+        if self.should_flush():
+            self.flush()
+
+    def discard(self, resource, _id):
+        """Remove document from queue.
+
+        :param resource: resource name
+        :param _id: document id
+        """
+        self._pending.pop((resource, str(_id)), None)
+
+    def is_pending(self, resource, _id=None):
+        """Test if there are pending changes for given resource/document.
+
+        :param resource: resource name
+        :param _id: document id, if not set it checks any document for resource
+        """
+        if _id is not None:
+            return (resource, str(_id)) in self._pending
+        return any(key[0] == resource for key in self._pending)
+
+    def should_flush(self):
+        if len(self._pending) >= self.size:
+            return True
+        if self._pending:
+            oldest = next(iter(self._pending.values()))[1]
+            return time.time() - oldest >= self.interval
+        return False
+
+    def flush(self, resource=None):
+        """Index pending documents using bulk api.
+
+        Documents are fetched from mongo using single query per resource,
+        those which are not there anymore are removed from search.
+
+        :param resource: only flush given resource, flush all if not set
+        :return: number of indexed documents
+        :raises IndexQueueError: if some documents failed to index, those are queued again
+        """
+        grouped = OrderedDict()
+        for key in list(self._pending.keys()):
+            if resource is None or key[0] == resource:
+                _id, queued = self._pending.pop(key)
+                grouped.setdefault(key[0], []).append((_id, queued))
+
+        indexed = 0
+        errors = []
+        for endpoint_name, pending in grouped.items():
+            try:
+                indexed += self._flush_resource(endpoint_name, pending)
+            except IndexQueueError as error:
+                errors.append(error)
+        if errors:
+            raise errors[0]
+        return indexed
+
+    def _flush_resource(self, endpoint_name, pending):
+        start = time.time()
+        search_backend = app.data._search_backend(endpoint_name)
+        if search_backend is None:
+            return 0
+
+        ids = [_id for _id, queued in pending]
+        backend = app.data._backend(endpoint_name)
+        collection = backend.pymongo(endpoint_name).db[app.data.datasource(endpoint_name)[0]]
+        docs = list(collection.find(backend._mongotize({config.ID_FIELD: {'$in': ids}}, endpoint_name)))
+        found = set(str(doc[config.ID_FIELD]) for doc in docs)
+
+        failed = []
+        if docs:
+            failed = self._bulk_insert(search_backend, endpoint_name, docs)
+            retries = app.config.get('ELASTIC_WRITE_BEHIND_RETRIES', 3)
+            for attempt in range(retries):
+                if not failed:
+                    break
+                time.sleep(BACKOFF * 2 ** attempt)
+                failed = self._bulk_insert(search_backend, endpoint_name, failed)
+
+        for _id in ids:
+            if str(_id) not in found:  # there is no doc in mongo, remove it from elastic
+                try:
+                    search_backend.remove(endpoint_name, {config.ID_FIELD: str(_id)})
+                except NotFoundError:
+                    pass
+
+        oldest = min(queued for _id, queued in pending)
+        stats.incr('elastic.write_behind.flushed', len(docs) - len(failed))
+        stats.incr('elastic.write_behind.failed', len(failed))
+        stats.timing('elastic.write_behind.lag', int((start - oldest) * 1000))
+        stats.timing('elastic.write_behind.flush', int((time.time() - start) * 1000))
+
+        if failed:
+            failed_ids = [doc[config.ID_FIELD] for doc in failed]
+            now = time.time()
+            for _id in failed_ids:
+                self._pending.setdefault((endpoint_name, str(_id)), (_id, now))
+            raise IndexQueueError(endpoint_name, failed_ids)
+        return len(docs)
+
+    def _bulk_insert(self, search_backend, endpoint_name, docs):
+        """Index docs using bulk api.
+
+        :return: list of docs which failed to index
+        """
+        try:
+            # bulk insert can modify docs, keep originals for retry
+            _success, errors = search_backend.bulk_insert(endpoint_name, [doc.copy() for doc in docs])
+        except Exception as ex:
+            logger.exception('bulk index failed resource=%s error=%s', endpoint_name, ex)
+            return docs
+        if not errors:
+            return []
+        logger.error('failed to index %d items resource=%s errors=%s', len(errors), endpoint_name, errors)
+        failed_ids = set()
+        for error in errors:
+            info = next(iter(error.values()), {}) if isinstance(error, dict) else {}
+            if not isinstance(info, dict) or info.get('_id') is None:
+                return docs  # can't tell which docs failed
+            failed_ids.add(str(info['_id']))
+        return [doc for doc in docs if str(doc[config.ID_FIELD]) in failed_ids]
+
+
+def is_write_behind(endpoint_name):
+    """Test if write-behind indexing is enabled for given resource.
+
+    :param endpoint_name: resource name
+    """
+    enabled = app.config.get('ELASTIC_WRITE_BEHIND')
+    if enabled is True:
+        return True
+    return bool(enabled) and endpoint_name in enabled
+
+
+def get_index_queue(create=True):
+    """Get index queue for current app context.
+
+    :param create: create new queue if there is none yet
+    """
+    queue = getattr(g, '_index_queue', None)
+    if queue is None and create:
+        queue = IndexQueue(app.config.get('ELASTIC_WRITE_BEHIND_SIZE', 500),
+                           app.config.get('ELASTIC_WRITE_BEHIND_INTERVAL', 5))
+        g._index_queue = queue
+    return queue
+
+
+def flush_index_queue(exception=None):
+    """Flush index queue for current app context if there is any.
+
+    It's registered as app context teardown handler.
+    """
+    queue = get_index_queue(create=False)
+    if queue:
+        queue.flush()
@@ -25,6 +25,7 @@ from superdesk.io.commands.add_provider import AddProvider  # noqa
 from superdesk.io.commands.update_ingest import UpdateIngest, update_provider  # noqa
 from superdesk.io.commands.remove_expired_content import RemoveExpiredContent
 from superdesk.io.ingest_provider_model import IngestProviderResource, IngestProviderService
+from superdesk.io.ingest_provider_files import IngestProviderFilesResource, IngestProviderFilesService
 
 
 logger = logging.getLogger(__name__)
@@ -35,6 +36,10 @@ def init_app(app):
     service = IngestProviderService(endpoint_name, backend=superdesk.get_backend())
     IngestProviderResource(endpoint_name, app=app, service=service)
 
+    endpoint_name = 'ingest_provider_files'
+    service = IngestProviderFilesService(endpoint_name, backend=superdesk.get_backend())
+    IngestProviderFilesResource(endpoint_name, app=app, service=service)
+
     from .io_errors import IOErrorsService, IOErrorsResource
     endpoint_name = 'io_errors'
     service = IOErrorsService(endpoint_name, backend=superdesk.get_backend())
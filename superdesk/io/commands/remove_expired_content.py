@@ -36,7 +36,7 @@ class RemoveExpiredContent(superdesk.Command):
     def remove_expired(self, provider):
         lock_name = 'ingest:gc'
 
-        if not lock(lock_name, expire=300):
+        if not lock(lock_name, expire=300, lease=True):
             return
 
         try:
@@ -9,10 +9,15 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 
+import json
+import time
+import hashlib
 import logging
 from datetime import timedelta, timezone, datetime
 
+from bson import ObjectId
 from flask import current_app as app
+from celery.exceptions import SoftTimeLimitExceeded
 from werkzeug.exceptions import HTTPException
 
 import superdesk
@@ -21,19 +26,23 @@ from superdesk.celery_app import celery
 from superdesk.celery_task_utils import get_lock_id
 from superdesk.errors import ProviderError
 from superdesk.io.registry import registered_feeding_services, registered_feed_parsers
+from superdesk.io.ingest_pipeline import IngestPipeline
 from superdesk.io.iptc import subject_codes
 from superdesk.lock import lock, unlock
 from superdesk.media.media_operations import download_file_from_url, process_file
 from superdesk.media.renditions import generate_renditions, get_renditions_spec
 from superdesk.metadata.item import GUID_NEWSML, GUID_FIELD, FAMILY_ID, ITEM_TYPE, CONTENT_TYPE, CONTENT_STATE, \
-    ITEM_STATE
+    ITEM_STATE, INGEST_ID
 from superdesk.metadata.utils import generate_guid
 from superdesk.notification import push_notification
 from superdesk.stats import stats
 from superdesk.upload import url_for_media
 from superdesk.utc import utcnow, get_expiry_date
 from superdesk.workflow import set_default_state
+from superdesk.io.rule_sets import get_compiled_rule_set
+from superdesk.vocabularies.cache import get_active_categories, get_categories_for_subjects
 from copy import deepcopy
+from collections import OrderedDict
 from superdesk.filemeta import set_filemeta
 
 UPDATE_SCHEDULE_DEFAULT = {'minutes': 5}
@@ -41,6 +50,8 @@ LAST_UPDATED = 'last_updated'
 LAST_INGESTED_ID = 'last_ingested_id'
 LAST_ITEM_UPDATE = 'last_item_update'
 IDLE_TIME_DEFAULT = {'hours': 0, 'minutes': 0}
+RENDITIONS_PENDING = 'renditions_pending'
+ARCHIVE = 'archive'
 
 logger = logging.getLogger(__name__)
 
@@ -194,13 +205,21 @@ class UpdateIngest(superdesk.Command):
         lookup = {} if not provider_name else {'name': provider_name}
         for provider in superdesk.get_resource_service('ingest_providers').get(req=None, lookup=lookup):
             if not is_closed(provider) and is_service_and_parser_registered(provider) and is_scheduled(provider):
-                kwargs = {
-                    'provider': provider,
-                    'rule_set': get_provider_rule_set(provider),
-                    'routing_scheme': get_provider_routing_scheme(provider)
-                }
+                schedule_provider_update(provider)
 
-                update_provider.apply_async(expires=get_task_ttl(provider), kwargs=kwargs)
+
+def schedule_provider_update(provider):
+    """Schedule update of given provider now.
+
+    :param provider: Ingest Provider data
+    """
+    kwargs = {
+        'provider': provider,
+        'rule_set': get_provider_rule_set(provider),
+        'routing_scheme': get_provider_routing_scheme(provider)
+    }
+
+    update_provider.apply_async(expires=get_task_ttl(provider), kwargs=kwargs)
 
 
 @celery.task(soft_time_limit=1800)
@@ -213,7 +232,7 @@ def update_provider(provider, rule_set=None, routing_scheme=None):
     """
     lock_name = get_lock_id('ingest', provider['name'], provider[superdesk.config.ID_FIELD])
 
-    if not lock(lock_name, expire=1810):
+    if not lock(lock_name, expire=1810, lease=True):
         return
 
     try:
@@ -222,11 +241,23 @@ def update_provider(provider, rule_set=None, routing_scheme=None):
 
         update = {LAST_UPDATED: utcnow()}
 
-        for items in feeding_service.update(provider, update):
-            ingest_items(items, provider, feeding_service, rule_set, routing_scheme)
-            stats.incr('ingest.ingested_items', len(items))
-            if items:
+        workers = app.config.get('INGEST_PIPELINE_WORKERS', 0)
+        if workers:
+            def ingest(items):
+                ingest_items(items, provider, feeding_service, rule_set, routing_scheme)
+                stats.incr('ingest.ingested_items', len(items))
+
+            pipeline = IngestPipeline(workers, app.config.get('INGEST_PIPELINE_QUEUE_SIZE', 2))
+            if pipeline.run(feeding_service.update(provider, update), ingest):
                 update[LAST_ITEM_UPDATE] = utcnow()
+        else:
+            for items in feeding_service.update(provider, update):
+                ingest_items(items, provider, feeding_service, rule_set, routing_scheme)
+                stats.incr('ingest.ingested_items', len(items))
+                if items:
+                    update[LAST_ITEM_UPDATE] = utcnow()
+
+        feeding_service.after_update(provider, update)
 
         # Some Feeding Services update the collection and by this time the _etag might have been changed.
         # So it's necessary to fetch it once again. Otherwise, OriginalChangedError is raised.
@@ -252,18 +283,18 @@ def update_provider(provider, rule_set=None, routing_scheme=None):
 
 def process_anpa_category(item, provider):
     try:
-        anpa_categories = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='categories')
-        if anpa_categories:
+        anpa_categories = get_active_categories()
+        if anpa_categories is not None:
+            categories = []
             for item_category in item['anpa_category']:
-                mapped_category = [c for c in anpa_categories['items'] if
-                                   c['is_active'] is True and item_category['qcode'].lower() == c['qcode'].lower()]
+                mapped_category = anpa_categories.get(item_category['qcode'].lower())
                 # if the category is not known to the system remove it from the item
-                if len(mapped_category) == 0:
-                    item['anpa_category'].remove(item_category)
-                else:
-                    item_category['name'] = mapped_category[0]['name']
+                if mapped_category:
+                    item_category['name'] = mapped_category['name']
                     # make the case of the qcode match what we hold in our dictionary
-                    item_category['qcode'] = mapped_category[0]['qcode']
+                    item_category['qcode'] = mapped_category['qcode']
+                    categories.append(item_category)
+            item['anpa_category'] = categories
     except Exception as ex:
         raise ProviderError.anpaError(ex, provider)
 
@@ -275,17 +306,10 @@ def derive_category(item, provider):
     :return: An item with a category if possible
     """
     try:
-        categories = []
-        subject_map = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='iptc_category_map')
-        if subject_map:
-            for entry in (map_entry for map_entry in subject_map['items'] if map_entry['is_active']):
-                for subject in item.get('subject', []):
-                    if subject['qcode'] == entry['qcode']:
-                        if not any(c['qcode'] == entry['category'] for c in categories):
-                            categories.append({'qcode': entry['category']})
-            if len(categories):
-                item['anpa_category'] = categories
-                process_anpa_category(item, provider)
+        categories = get_categories_for_subjects([subject['qcode'] for subject in item.get('subject', [])])
+        if categories:
+            item['anpa_category'] = [{'qcode': category} for category in categories]
+            process_anpa_category(item, provider)
     except Exception as ex:
         logger.exception(ex)
 
@@ -300,21 +324,7 @@ def process_iptc_codes(item, provider):
     :return: A story item with possible expanded subjects
     """
     try:
-        def iptc_already_exists(code):
-            for entry in item['subject']:
-                if 'qcode' in entry and code == entry['qcode']:
-                    return True
-            return False
-
-        for subject in item['subject']:
-            if 'qcode' in subject and len(subject['qcode']) == 8 and subject['qcode'].isdigit():
-                top_qcode = subject['qcode'][:2] + '000000'
-                if not iptc_already_exists(top_qcode):
-                    item['subject'].append({'qcode': top_qcode, 'name': subject_codes[top_qcode]})
-
-                mid_qcode = subject['qcode'][:5] + '000'
-                if not iptc_already_exists(mid_qcode):
-                    item['subject'].append({'qcode': mid_qcode, 'name': subject_codes[mid_qcode]})
+        item['subject'] = app.subjects.expand_with_ancestors(item['subject'])
     except Exception as ex:
         raise ProviderError.iptcError(ex, provider)
 
@@ -326,13 +336,11 @@ def derive_subject(item):
     :return:
     """
     try:
-        category_map = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='categories')
-        if category_map:
+        category_map = get_active_categories()
+        if category_map is not None:
             for cat in item['anpa_category']:
-                map_entry = next(
-                    (code for code in category_map['items'] if code['qcode'] == cat['qcode'] and code['is_active']),
-                    None)
-                if map_entry and 'subject' in map_entry:
+                map_entry = category_map.get(cat['qcode'].lower())
+                if map_entry and map_entry['qcode'] == cat['qcode'] and 'subject' in map_entry:
                     item['subject'] = [
                         {'qcode': map_entry.get('subject'), 'name': subject_codes[map_entry.get('subject')]}]
     except Exception as ex:
@@ -354,12 +362,7 @@ def apply_rule_set(item, provider, rule_set=None):
             rule_set = superdesk.get_resource_service('rule_sets').find_one(_id=provider['rule_set'], req=None)
 
         if rule_set and 'body_html' in item:
-            body = item['body_html']
-
-            for rule in rule_set['rules']:
-                body = body.replace(rule['old'], rule['new'])
-
-            item['body_html'] = body
+            item['body_html'] = get_compiled_rule_set(rule_set).apply(item['body_html'])
 
         return item
     except Exception as ex:
@@ -385,6 +388,9 @@ def ingest_cancel(item, feeding_service):
 
 def ingest_items(items, provider, feeding_service, rule_set=None, routing_scheme=None):
     all_items = filter_expired_items(provider, items)
+    if rule_set is None:
+        # get it once instead of for every item
+        rule_set = get_provider_rule_set(provider)
     items_dict = {doc[GUID_FIELD]: doc for doc in all_items}
     items_in_package = []
     failed_items = set()
@@ -393,13 +399,35 @@ def ingest_items(items, provider, feeding_service, rule_set=None, routing_scheme
         items_in_package = [ref['residRef'] for group in item.get('groups', [])
                             for ref in group.get('refs', []) if 'residRef' in ref]
 
-    for item in [doc for doc in all_items if doc.get(ITEM_TYPE) != CONTENT_TYPE.COMPOSITE]:
-        ingested, ids = ingest_item(item, provider, feeding_service, rule_set,
-                                    routing_scheme=routing_scheme if not item[GUID_FIELD] in items_in_package else None)
-        if ingested:
-            created_ids = created_ids + ids
-        else:
-            failed_items.add(item[GUID_FIELD])
+    ingest_collection = feeding_service.service if hasattr(feeding_service, 'service') else 'ingest'
+    ingest_service = superdesk.get_resource_service(ingest_collection)
+    batch = app.config.get('INGEST_BATCH_WRITES', False)
+    if batch:
+        old_items = get_ingested_items(ingest_service, list(items_dict.keys()))
+        for item in all_items:
+            # set ids upfront so package refs can be resolved before items are saved
+            if item[GUID_FIELD] in old_items:
+                item[superdesk.config.ID_FIELD] = old_items[item[GUID_FIELD]][superdesk.config.ID_FIELD]
+            else:
+                item.setdefault(superdesk.config.ID_FIELD, generate_guid(type=GUID_NEWSML))
+
+    items = [doc for doc in all_items if doc.get(ITEM_TYPE) != CONTENT_TYPE.COMPOSITE]
+    if batch:
+        routing_schemes = {item[GUID_FIELD]: routing_scheme for item in items
+                           if item[GUID_FIELD] not in items_in_package}
+        ids, failed = ingest_items_batch(items, provider, feeding_service, rule_set, routing_schemes, old_items)
+        created_ids.extend(ids)
+        failed_items.update(failed)
+    else:
+        for item in items:
+            ingested, ids = ingest_item(item, provider, feeding_service, rule_set,
+                                        routing_scheme=routing_scheme if not item[GUID_FIELD] in items_in_package
+                                        else None)
+            if ingested:
+                created_ids = created_ids + ids
+            else:
+                failed_items.add(item[GUID_FIELD])
+    packages = []
     for item in [doc for doc in all_items if doc.get(ITEM_TYPE) == CONTENT_TYPE.COMPOSITE]:
         for ref in [ref for group in item.get('groups', [])
                     for ref in group.get('refs', []) if 'residRef' in ref]:
@@ -416,14 +444,20 @@ def ingest_items(items, provider, feeding_service, rule_set=None, routing_scheme
                 ref['residRef'] = items_dict.get(ref['residRef'], {}).get(superdesk.config.ID_FIELD)
         if item[GUID_FIELD] in failed_items:
             continue
+        if batch:
+            packages.append(item)
+            continue
         ingested, ids = ingest_item(item, provider, feeding_service, rule_set, routing_scheme)
         if ingested:
             created_ids = created_ids + ids
         else:
             failed_items.add(item[GUID_FIELD])
+    if packages:
+        ids, failed = ingest_items_batch(packages, provider, feeding_service, rule_set,
+                                         {item[GUID_FIELD]: routing_scheme for item in packages}, old_items)
+        created_ids.extend(ids)
+        failed_items.update(failed)
     # sync mongo with ingest after all changes
-    ingest_collection = feeding_service.service if hasattr(feeding_service, 'service') else 'ingest'
-    ingest_service = superdesk.get_resource_service(ingest_collection)
     updated_items = ingest_service.find({'_id': {'$in': created_ids}}, max_results=len(created_ids))
     app.data._search_backend(ingest_collection).bulk_insert(ingest_collection, list(updated_items))
     if failed_items:
@@ -439,52 +473,15 @@ def ingest_item(item, provider, feeding_service, rule_set=None, routing_scheme=N
         # determine if we already have this item
         old_item = ingest_service.find_one(guid=item[GUID_FIELD], req=None)
 
-        if not old_item:
-            item.setdefault(superdesk.config.ID_FIELD, generate_guid(type=GUID_NEWSML))
-            item[FAMILY_ID] = item[superdesk.config.ID_FIELD]
-
-        item['ingest_provider'] = str(provider[superdesk.config.ID_FIELD])
-        item.setdefault('source', provider.get('source', ''))
-        set_default_state(item, CONTENT_STATE.INGESTED)
-        item['expiry'] = get_expiry_date(provider.get('content_expiry', app.config['INGEST_EXPIRY_MINUTES']),
-                                         item.get('versioncreated'))
-
-        if 'anpa_category' in item:
-            process_anpa_category(item, provider)
-
-        if 'subject' in item:
-            if not app.config.get('INGEST_SKIP_IPTC_CODES', False):
-                # FIXME: temporary fix for SDNTB-344, need to be removed once SDESK-439 is implemented
-                process_iptc_codes(item, provider)
-            if 'anpa_category' not in item:
-                derive_category(item, provider)
-        elif 'anpa_category' in item:
-            derive_subject(item)
-
-        apply_rule_set(item, provider, rule_set)
-
-        if item.get('pubstatus', '') == 'canceled':
-            item[ITEM_STATE] = CONTENT_STATE.KILLED
-            ingest_cancel(item, feeding_service)
-
-        rend = item.get('renditions', {})
-        if rend:
-            baseImageRend = rend.get('baseImage') or next(iter(rend.values()))
-            if baseImageRend:
-                href = feeding_service.prepare_href(baseImageRend['href'], rend.get('mimetype'))
-                update_renditions(item, href, old_item)
+        prepare_item(item, provider, feeding_service, rule_set, old_item)
 
         new_version = True
         items_ids = []
         if old_item:
             updates = deepcopy(item)
             ingest_service.patch_in_mongo(old_item[superdesk.config.ID_FIELD], updates, old_item)
-            item.update(old_item)
-            item.update(updates)
+            new_version = merge_updated_item(item, updates, old_item)
             items_ids = [item['_id']]
-            # if the feed is versioned and this is not a new version
-            if 'version' in item and 'version' in old_item and item.get('version') == old_item.get('version'):
-                new_version = False
         else:
             if item.get('ingest_provider_sequence') is None:
                 ingest_service.set_ingest_provider_sequence(item, provider)
@@ -493,6 +490,9 @@ def ingest_item(item, provider, feeding_service, rule_set=None, routing_scheme=N
             except HTTPException as e:
                 logger.error('Exception while persisting item in %s collection: %s', ingest_collection, e)
 
+        if items_ids:
+            schedule_renditions(item, feeding_service, ingest_collection)
+
         if routing_scheme and new_version:
             routed = ingest_service.find_one(_id=item[superdesk.config.ID_FIELD], req=None)
             superdesk.get_resource_service('routing_schemes').apply_routing_scheme(routed, provider, routing_scheme)
@@ -503,32 +503,231 @@ def ingest_item(item, provider, feeding_service, rule_set=None, routing_scheme=N
     return True, items_ids
 
 
+def prepare_item(item, provider, feeding_service, rule_set=None, old_item=None):
+    """Enrich parsed item before it gets saved.
+
+    :param item: parsed item
+    :param provider: ingest provider
+    :param feeding_service: feeding service
+    :param rule_set: rule set to apply
+    :param old_item: already ingested version of the item if any
+    """
+    if not old_item:
+        item.setdefault(superdesk.config.ID_FIELD, generate_guid(type=GUID_NEWSML))
+        item[FAMILY_ID] = item[superdesk.config.ID_FIELD]
+
+    item['ingest_provider'] = str(provider[superdesk.config.ID_FIELD])
+    item.setdefault('source', provider.get('source', ''))
+    set_default_state(item, CONTENT_STATE.INGESTED)
+    item['expiry'] = get_expiry_date(provider.get('content_expiry', app.config['INGEST_EXPIRY_MINUTES']),
+                                     item.get('versioncreated'))
+
+    if 'anpa_category' in item:
+        process_anpa_category(item, provider)
+
+    if 'subject' in item:
+        if not app.config.get('INGEST_SKIP_IPTC_CODES', False):
+            # FIXME: temporary fix for SDNTB-344, need to be removed once SDESK-439 is implemented
+            process_iptc_codes(item, provider)
+        if 'anpa_category' not in item:
+            derive_category(item, provider)
+    elif 'anpa_category' in item:
+        derive_subject(item)
+
+    apply_rule_set(item, provider, rule_set)
+
+    if item.get('pubstatus', '') == 'canceled':
+        item[ITEM_STATE] = CONTENT_STATE.KILLED
+        ingest_cancel(item, feeding_service)
+
+    href = get_renditions_href(item, feeding_service)
+    if href:
+        update_renditions(item, href, old_item)
+
+
+def get_renditions_href(item, feeding_service):
+    """Get link to the original of item renditions if there is any.
+
+    :param item: parsed item
+    :param feeding_service: feeding service
+    """
+    rend = item.get('renditions', {})
+    if rend:
+        baseImageRend = rend.get('baseImage') or next(iter(rend.values()))
+        if baseImageRend:
+            return feeding_service.prepare_href(baseImageRend['href'], rend.get('mimetype'))
+
+
+def merge_updated_item(item, updates, old_item):
+    """Merge saved updates with old item and test if it is a new version.
+
+    :param item: ingested item
+    :param updates: updates saved to db
+    :param old_item: previous version of the item
+    """
+    item.update(old_item)
+    item.update(updates)
+    # if the feed is versioned and this is not a new version
+    return not ('version' in item and 'version' in old_item and item.get('version') == old_item.get('version'))
+
+
+def get_ingested_items(ingest_service, guids):
+    """Get already ingested items for given guids using single query.
+
+    :param ingest_service: ingest service
+    :param guids: list of guids
+    :return: dict of items by guid
+    """
+    if not guids:
+        return {}
+    old_items = ingest_service.get_from_mongo(req=None, lookup={GUID_FIELD: {'$in': list(guids)}})
+    return {old_item[GUID_FIELD]: old_item for old_item in old_items}
+
+
+def ingest_items_batch(items, provider, feeding_service, rule_set=None, routing_schemes=None, old_items=None):
+    """Ingest multiple items using bulk writes.
+
+    Works like :func:`ingest_item` called for every item, but new items are inserted
+    using single bulk insert, existing items are updated using single bulk write
+    and routed items are fetched using single query. Failure of an item doesn't
+    affect other items. If there are multiple items with the same guid only the last
+    one is ingested, like if it was updating the previous ones.
+
+    :param items: list of parsed items
+    :param provider: ingest provider
+    :param feeding_service: feeding service
+    :param rule_set: rule set to apply
+    :param routing_schemes: dict of routing schemes to apply by item guid
+    :param old_items: dict of already ingested items by guid, see :func:`get_ingested_items`
+    :return: tuple of list of ingested ids and set of failed guids
+    """
+    ingest_collection = feeding_service.service if hasattr(feeding_service, 'service') else 'ingest'
+    ingest_service = superdesk.get_resource_service(ingest_collection)
+    routing_schemes = routing_schemes or {}
+    items = list(OrderedDict((item[GUID_FIELD], item) for item in items).values())
+    if old_items is None:
+        old_items = get_ingested_items(ingest_service, [item[GUID_FIELD] for item in items])
+    failed_items = set()
+    new_items = []
+    changes = []
+    for item in items:
+        old_item = old_items.get(item[GUID_FIELD])
+        try:
+            prepare_item(item, provider, feeding_service, rule_set, old_item)
+            if old_item:
+                changes.append((item, deepcopy(item), old_item))
+            else:
+                if item.get('ingest_provider_sequence') is None:
+                    ingest_service.set_ingest_provider_sequence(item, provider)
+                new_items.append(item)
+        except Exception as ex:
+            logger.exception(ex)
+            failed_items.add(item[GUID_FIELD])
+
+    ids = []
+    to_route = []
+    if new_items:
+        created, failed = ingest_service.post_many_in_mongo(new_items)
+        for item, error in failed:
+            logger.error('Exception while persisting item in %s collection: %s', ingest_collection, error)
+        ids.extend(created)
+        created = set(created)
+        to_route.extend(item for item in new_items if item[superdesk.config.ID_FIELD] in created)
+
+    if changes:
+        failed = ingest_service.patch_many_in_mongo([(old_item[superdesk.config.ID_FIELD], updates, old_item)
+                                                    for item, updates, old_item in changes])
+        failed = {_id: error for _id, error in failed}
+        for item, updates, old_item in changes:
+            if old_item[superdesk.config.ID_FIELD] in failed:
+                logger.error('Exception while updating item in %s collection: %s',
+                             ingest_collection, failed[old_item[superdesk.config.ID_FIELD]])
+                failed_items.add(item[GUID_FIELD])
+                continue
+            if merge_updated_item(item, updates, old_item):
+                to_route.append(item)
+            ids.append(item[superdesk.config.ID_FIELD])
+
+    saved = set(ids)
+    for item in items:
+        if item[superdesk.config.ID_FIELD] in saved:
+            schedule_renditions(item, feeding_service, ingest_collection)
+
+    to_route = [item for item in to_route if routing_schemes.get(item[GUID_FIELD])]
+    if to_route:
+        routed_items = ingest_service.get_from_mongo(req=None, lookup={
+            superdesk.config.ID_FIELD: {'$in': [item[superdesk.config.ID_FIELD] for item in to_route]}})
+        routed_items = {routed[superdesk.config.ID_FIELD]: routed for routed in routed_items}
+        for item in to_route:
+            try:
+                superdesk.get_resource_service('routing_schemes').apply_routing_scheme(
+                    routed_items.get(item[superdesk.config.ID_FIELD]), provider, routing_schemes[item[GUID_FIELD]])
+            except Exception as ex:
+                logger.exception(ex)
+                failed_items.add(item[GUID_FIELD])
+
+    return ids, failed_items
+
+
 def update_renditions(item, href, old_item):
     """Update renditions for an item.
 
     If the old_item has renditions uploaded in to media then the old rendition details are
     assigned to the item, this avoids repeatedly downloading the same image and leaving the media entries orphaned.
     If there is no old_item the original is downloaded and renditions are
-    generated.
+    generated, or if ``INGEST_ASYNC_RENDITIONS`` is enabled item is only marked
+    with ``renditions_pending`` and renditions are generated after it's saved.
     :param item: parsed item from source
     :param href: reference to original
     :param old_item: the item that we have already ingested, if it exists
     :return: item with renditions
     """
-    inserted = []
-    try:
-        # If there is an existing set of renditions we keep those
-        if old_item:
-            media = old_item.get('renditions', {}).get('original', {}).get('media', {})
-            if media:
-                item['renditions'] = old_item['renditions']
-                item['mimetype'] = old_item.get('mimetype')
-                item['filemeta'] = old_item.get('filemeta')
-                item['filemeta_json'] = old_item.get('filemeta_json')
-                return
+    # If there is an existing set of renditions we keep those
+    if old_item:
+        media = old_item.get('renditions', {}).get('original', {}).get('media', {})
+        if media:
+            item['renditions'] = old_item['renditions']
+            item['mimetype'] = old_item.get('mimetype')
+            item['filemeta'] = old_item.get('filemeta')
+            item['filemeta_json'] = old_item.get('filemeta_json')
+            return
+
+    if app.config.get('INGEST_ASYNC_RENDITIONS', False):
+        item[RENDITIONS_PENDING] = True
+        return
+
+    download_renditions(item, href)
 
+
+def download_renditions(item, href):
+    """Download original and generate renditions for an item.
+
+    :param item: item or updates to be saved
+    :param href: reference to original
+    """
+    try:
         content, filename, content_type = download_file_from_url(href)
+    except Exception as e:
+        logger.exception(e)
+        raise
+    store_renditions(item, content, content_type)
+
+
+def store_renditions(item, content, content_type):
+    """Store original and generate renditions for an item.
+
+    Files are stored under new names for every call, so items sharing the original
+    don't share files and those can be removed together with the item.
+
+    :param item: item or updates to be saved
+    :param content: original byte stream
+    :param content_type: original mime type
+    """
+    inserted = []
+    try:
+        content.seek(0)
         file_type, ext = content_type.split('/')
+        filename = str(ObjectId()) + ext
         metadata = process_file(content, file_type)
         file_guid = app.media.put(content, filename, content_type, metadata)
         inserted.append(file_guid)
@@ -545,4 +744,168 @@ def update_renditions(item, href, old_item):
         raise
 
 
+def _get_renditions_task_key(href):
+    return 'ingest_renditions:{}'.format(hashlib.sha1(href.encode('utf-8')).hexdigest())
+
+
+def schedule_renditions(item, feeding_service, resource):
+    """Schedule renditions generation for saved item marked with ``renditions_pending``.
+
+    There is only one task queued for the same original url, items sharing it
+    while the task is pending are added to it.
+
+    :param item: saved item
+    :param feeding_service: feeding service
+    :param resource: ingest resource name
+    """
+    if not item.get(RENDITIONS_PENDING):
+        return
+    href = get_renditions_href(item, feeding_service)
+    if not href:
+        return
+    item_id = str(item[superdesk.config.ID_FIELD])
+    try:
+        key = _get_renditions_task_key(href)
+        ttl = app.config.get('INGEST_RENDITIONS_TASK_TTL', 3600)
+        pipe = app.redis.pipeline()
+        pipe.sadd(key + ':items', json.dumps([resource, item_id]))
+        pipe.expire(key + ':items', ttl)
+        pipe.set(key, 1, nx=True, ex=ttl)
+        if not pipe.execute()[-1]:
+            stats.incr('ingest.renditions.deduplicated')
+            return
+    except Exception as ex:
+        logger.warning('failed to check pending renditions task item=%s error=%s', item_id, ex)
+    generate_ingest_renditions.apply_async(args=(resource, item_id, href))
+    stats.incr('ingest.renditions.scheduled')
+
+
+@celery.task(bind=True, max_retries=3, default_retry_delay=30, soft_time_limit=300)
+def generate_ingest_renditions(self, resource, item_id, href):
+    """Generate renditions for ingested items sharing the same original and save them.
+
+    Renditions are also set on items fetched or routed from these items
+    and on package refs, which were saved while renditions were pending.
+
+    :param resource: ingest resource name of item which scheduled the task
+    :param item_id: id of item which scheduled the task
+    :param href: reference to original
+    """
+    start = time.time()
+    items = [(resource, item_id)] + _get_renditions_task_items(href)
+    if not any(_get_pending_item(*item) for item in items):
+        items = _release_renditions_task(href)
+        if not any(_get_pending_item(*item) for item in items):
+            return
+
+    try:
+        content, filename, content_type = download_file_from_url(href)
+        original = (content, content_type)
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception as ex:
+        if self.request.retries < self.max_retries:
+            stats.incr('ingest.renditions.retry')
+            raise self.retry(exc=ex, countdown=self.default_retry_delay * 2 ** self.request.retries)
+        logger.error('failed to download original item=%s href=%s', item_id, href)
+        stats.incr('ingest.renditions.failed')
+        original = None  # keep renditions from the feed
+
+    # release it first so items added from now on will schedule new task
+    items.extend(_release_renditions_task(href))
+    _save_renditions(items, original)
+    stats.timing('ingest.renditions.task', int((time.time() - start) * 1000))
+
+
+def _get_pending_item(resource, item_id):
+    item = superdesk.get_resource_service(resource).find_one(req=None, _id=item_id)
+    return item if item and item.get(RENDITIONS_PENDING) else None
+
+
+def _save_renditions(items, original):
+    """Save renditions to pending items and to items fetched or routed from them.
+
+    The original is downloaded only once, but files are stored for every item,
+    so removing an item never removes files used by other items sharing the original.
+
+    :param items: list of ``(resource, item_id)`` tuples
+    :param original: tuple of ``(content, content_type)`` or ``None`` if download failed
+    """
+    for resource, item_id in OrderedDict.fromkeys(tuple(item) for item in items):
+        try:
+            item = _get_pending_item(resource, item_id)
+            if item is None:
+                continue
+            updates = {RENDITIONS_PENDING: False}
+            if original:
+                try:
+                    store_renditions(updates, *original)
+                except Exception:
+                    logger.error('failed to generate renditions item=%s', item_id)
+                    stats.incr('ingest.renditions.failed')
+                    updates = {RENDITIONS_PENDING: False}  # keep renditions from the feed
+                else:
+                    stats.incr('ingest.renditions.generated')
+            superdesk.get_resource_service(resource).system_update(item_id, deepcopy(updates), item)
+            update_fetched_renditions(resource, item_id, updates)
+        except Exception as ex:
+            logger.exception(ex)
+
+
+def update_fetched_renditions(resource, item_id, updates):
+    """Set renditions on archive items fetched or routed from ingested item and on package refs.
+
+    :param resource: ingest resource name
+    :param item_id: ingested item id
+    :param updates: renditions updates
+    """
+    archive_service = superdesk.get_resource_service(ARCHIVE)
+    fetched = list(archive_service.get_from_mongo(req=None, lookup={INGEST_ID: item_id, RENDITIONS_PENDING: True}))
+    for item in fetched:
+        archive_service.system_update(item[superdesk.config.ID_FIELD], deepcopy(updates), item)
+    if updates.get('renditions'):
+        _update_package_refs(resource, [item_id], updates['renditions'])
+        if fetched:
+            _update_package_refs(ARCHIVE, [item[superdesk.config.ID_FIELD] for item in fetched], updates['renditions'])
+
+
+def _update_package_refs(resource, item_ids, renditions):
+    service = superdesk.get_resource_service(resource)
+    for package in service.get_from_mongo(req=None, lookup={'groups.refs.residRef': {'$in': item_ids}}):
+        groups = deepcopy(package.get('groups', []))
+        for ref in [ref for group in groups for ref in group.get('refs', [])]:
+            if ref.get('residRef') in item_ids and 'renditions' in ref:
+                ref['renditions'] = renditions
+        service.system_update(package[superdesk.config.ID_FIELD], {'groups': groups}, package)
+
+
+def _get_renditions_task_items(href):
+    try:
+        members = app.redis.smembers(_get_renditions_task_key(href) + ':items')
+    except Exception as ex:
+        logger.warning('failed to get renditions task items href=%s error=%s', href, ex)
+        return []
+    return [tuple(json.loads(member.decode('utf-8') if isinstance(member, bytes) else member))
+            for member in members]
+
+
+def _release_renditions_task(href):
+    """Release task for given original and get items added to it meanwhile.
+
+    :param href: reference to original
+    """
+    key = _get_renditions_task_key(href)
+    try:
+        app.redis.delete(key)
+        pipe = app.redis.pipeline()
+        pipe.smembers(key + ':items')
+        pipe.delete(key + ':items')
+        members = pipe.execute()[0]
+    except Exception as ex:
+        logger.warning('failed to release renditions task href=%s error=%s', href, ex)
+        return []
+    return [tuple(json.loads(member.decode('utf-8') if isinstance(member, bytes) else member))
+            for member in members]
+
+
 superdesk.command('ingest:update', UpdateIngest())
@@ -12,6 +12,7 @@ from abc import ABCMeta, abstractmethod
 
 from superdesk.etree import etree
 from flask import current_app as app
+from superdesk.errors import SuperdeskIngestError
 from superdesk.metadata.item import Priority
 
 
@@ -116,6 +117,41 @@ class XMLFeedParser(FeedParser, metaclass=ABCMeta):
 
         return str(etree.QName(ns, tag))
 
+    def parse_iter(self, source, provider=None):
+        """Parse items from xml source one by one.
+
+        Parsers which can get multiple items from single document should override it
+        to parse it using :func:`iterparse` and clear parsed elements, so memory used
+        doesn't grow with the number of items. This implementation parses whole document.
+
+        :param source: file name or binary file object
+        :param provider: Ingest Provider Details, defaults to None
+        :raises SuperdeskIngestError.parserNotFoundError: if parser can't parse the document
+        :return: generator of parsed items
+        """
+        xml = etree.parse(source).getroot()
+        self.check_can_parse(xml, provider)
+        parsed = self.parse(xml, provider)
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        yield from parsed
+
+    def check_can_parse(self, xml, provider=None):
+        """Raise error if document with given root element can't be parsed using this parser.
+
+        :param xml: root element
+        :param provider: Ingest Provider Details, defaults to None
+        """
+        if not self.can_parse(xml):
+            raise SuperdeskIngestError.parserNotFoundError(provider=provider)
+
+    def clear_element(self, elem):
+        """Free memory used by parsed element and elements before it."""
+        elem.clear()
+        parent = elem.getparent()
+        while parent is not None and elem.getprevious() is not None:
+            del parent[0]
+
 
 class FileFeedParser(FeedParser, metaclass=ABCMeta):
     """
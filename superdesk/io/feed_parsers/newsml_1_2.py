@@ -10,11 +10,12 @@
 
 import datetime
 
+from copy import deepcopy
 from superdesk.etree import etree
 from superdesk.io.registry import register_feed_parser
 from superdesk.io.feed_parsers import XMLFeedParser
 from superdesk.io.iptc import subject_codes
-from superdesk.errors import ParserError
+from superdesk.errors import ParserError, SuperdeskIngestError
 from superdesk.metadata.item import ITEM_TYPE
 from superdesk.metadata.item import CONTENT_TYPE
 from superdesk.utc import utc
@@ -92,6 +93,36 @@ class NewsMLOneFeedParser(XMLFeedParser):
         except Exception as ex:
             raise ParserError.newsmlOneParserError(ex, provider)
 
+    def parse_iter(self, source, provider=None):
+        """Parse every NewsItem of NewsML document one by one, clearing parsed elements.
+
+        Unlike :meth:`parse` which only parses the first NewsItem, it yields all of them.
+        Every NewsItem is parsed using :meth:`parse` with document containing just
+        the NewsEnvelope and the NewsItem.
+        """
+        root = None
+        envelope = None
+        try:
+            for _event, elem in etree.iterparse(source, events=('end', ), tag=('NewsEnvelope', 'NewsItem')):
+                if root is None:
+                    root = elem.getroottree().getroot()
+                    self.check_can_parse(root, provider)
+                if elem.getparent() is None or elem.getparent().tag != root.tag:
+                    continue
+                if elem.tag == 'NewsEnvelope':
+                    envelope = elem
+                    continue
+                xml = etree.Element(root.tag, attrib=dict(root.attrib))
+                if envelope is not None:
+                    xml.append(deepcopy(envelope))
+                xml.append(deepcopy(elem))
+                self.clear_element(elem)
+                yield self.parse(xml, provider)
+        except SuperdeskIngestError:
+            raise
+        except Exception as ex:
+            raise ParserError.newsmlOneParserError(ex, provider)
+
     def parse_elements(self, tree):
         items = {}
         for item in tree:
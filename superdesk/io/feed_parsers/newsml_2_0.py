@@ -12,7 +12,8 @@
 import datetime
 import logging
 
-from superdesk.errors import ParserError
+from superdesk.errors import ParserError, SuperdeskIngestError
+from superdesk.etree import etree
 from superdesk.io.registry import register_feed_parser
 from superdesk.io.feed_parsers import XMLFeedParser
 from superdesk.io.iptc import subject_codes
@@ -34,6 +35,9 @@ class NewsMLTwoFeedParser(XMLFeedParser):
 
     label = 'News ML 2.0 Parser'
 
+    HEADER_TAG = 'header'
+    ITEM_TAGS = ('newsItem', 'packageItem', 'conceptItem', 'knowledgeItem', 'planningItem')
+
     def can_parse(self, xml):
         return xml.tag.endswith('newsMessage')
 
@@ -44,13 +48,51 @@ class NewsMLTwoFeedParser(XMLFeedParser):
             header = self.parse_header(xml)
             for item_set in xml.findall(self.qname('itemSet')):
                 for item_tree in item_set:
-                    item = self.parse_item(item_tree)
-                    item['priority'] = header['priority']
-                    items.append(item)
+                    item = self.parse_set_item(item_tree, header)
+                    if item is not None:
+                        items.append(item)
             return items
         except Exception as ex:
             raise ParserError.newsmlTwoParserError(ex, provider)
 
+    def parse_iter(self, source, provider=None):
+        """Parse items from newsMessage one by one, clearing parsed item elements."""
+        header_tag = '{%s}%s' % (XMLNS, self.HEADER_TAG)
+        tags = [header_tag] + ['{%s}%s' % (XMLNS, tag) for tag in self.ITEM_TAGS]
+        self.root = None
+        header = None
+        try:
+            for _event, elem in etree.iterparse(source, events=('end', ), tag=tags):
+                if self.root is None:
+                    self.root = elem.getroottree().getroot()
+                    self.check_can_parse(self.root, provider)
+                if elem.tag == header_tag:
+                    header = self.parse_header(self.root)
+                    continue
+                if elem.getparent().tag != self.qname('itemSet'):
+                    continue  # item nested in another item
+                if header is None:
+                    header = self.parse_header(self.root)
+                item = self.parse_set_item(elem, header)
+                self.clear_element(elem)
+                if item is not None:
+                    yield item
+        except SuperdeskIngestError:
+            raise
+        except Exception as ex:
+            raise ParserError.newsmlTwoParserError(ex, provider)
+
+    def parse_set_item(self, tree, header):
+        """Parse item from itemSet.
+
+        :param tree: item element
+        :param header: parsed header
+        :return: parsed item or ``None`` if it should be skipped
+        """
+        item = self.parse_item(tree)
+        item['priority'] = header['priority']
+        return item
+
     def parse_item(self, tree):
         item = dict()
         item['guid'] = tree.attrib['guid'] + ':' + tree.attrib['version']
@@ -74,7 +116,7 @@ class NewsMLTwoFeedParser(XMLFeedParser):
         :param tree:
         :return: dict
         """
-        header = tree.find(self.qname('header'))
+        header = tree.find(self.qname(self.HEADER_TAG))
         priority = 5
         if header is not None:
             priority = self.map_priority(header.find(self.qname('priority')).text)
@@ -13,7 +13,6 @@ import pytz
 import datetime
 from .newsml_2_0 import NewsMLTwoFeedParser
 from superdesk.io.registry import register_feed_parser
-from superdesk.errors import ParserError
 from superdesk.metadata.item import ITEM_TYPE
 from superdesk.io.iptc import subject_codes
 from superdesk.etree import get_word_count
@@ -25,11 +24,14 @@ class ScoopNewsMLTwoFeedParser(NewsMLTwoFeedParser):
 
     label = 'Scoop Media News ML-G2 Parser'
 
+    # it seems that the header tag is in camel case
+    HEADER_TAG = 'Header'
+
     def can_parse(self, xml):
         if xml.tag.endswith('newsMessage'):
             try:
                 self.root = xml
-                header = xml.find(self.qname('Header'))
+                header = xml.find(self.qname(self.HEADER_TAG))
                 origin = header.find(self.qname('origin')).text
                 if origin == 'BusinessDesk':
                     return True
@@ -37,37 +39,15 @@ class ScoopNewsMLTwoFeedParser(NewsMLTwoFeedParser):
                 return False
         return False
 
-    def parse(self, xml, provider=None):
-        self.root = xml
-        items = []
-        try:
-            header = self.parse_header(xml)
-            for item_set in xml.findall(self.qname('itemSet')):
-                for item_tree in item_set:
-                    # Ignore the packageItem, it has no guid
-                    if 'guid' in item_tree.attrib:
-                        item = self.parse_item(item_tree)
-                        item['priority'] = header['priority']
-                        item['anpa_category'] = [{'qcode': 'f'}]
-                        item['subject'] = [{'qcode': '04000000', 'name': subject_codes['04000000']}]
-                        item.setdefault('word_count', get_word_count(item['body_html']))
-                        items.append(item)
-            return items
-        except Exception as ex:
-            raise ParserError.newsmlTwoParserError(ex, provider)
-
-    def parse_header(self, tree):
-        """Parse header element, it seems that the header tag is in camel case
-
-        :param tree:
-        :return: dict
-        """
-        header = tree.find(self.qname('Header'))
-        priority = 5
-        if header is not None:
-            priority = self.map_priority(header.find(self.qname('priority')).text)
-
-        return {'priority': priority}
+    def parse_set_item(self, tree, header):
+        # Ignore the packageItem, it has no guid
+        if 'guid' not in tree.attrib:
+            return None
+        item = super().parse_set_item(tree, header)
+        item['anpa_category'] = [{'qcode': 'f'}]
+        item['subject'] = [{'qcode': '04000000', 'name': subject_codes['04000000']}]
+        item.setdefault('word_count', get_word_count(item['body_html']))
+        return item
 
     def parse_item_meta(self, tree, item):
         """Parse itemMeta tag"""
@@ -75,6 +75,16 @@ class FeedingService(metaclass=ABCMeta):
                 self.close_provider(provider, error)
                 raise error
 
+    def after_update(self, provider, update):
+        """Called when items returned by :meth:`update` were ingested, before provider update is saved.
+
+        Subclasses can override it to save state which should be kept only if ingest didn't fail.
+
+        :param provider: Ingest Provider Details.
+        :param update: provider update
+        """
+        pass
+
     def close_provider(self, provider, error, force=False):
         """Closes the provider and uses error as reason for closing.
 
@@ -128,6 +138,24 @@ class FeedingService(metaclass=ABCMeta):
         """
         return href
 
+    def parse_xml_batches(self, provider, source, batch_size):
+        """Parse items from xml source using streaming parser of provider.
+
+        :param provider: Ingest Provider Details.
+        :param source: file name or binary file object
+        :param batch_size: max number of items in batch
+        :return: generator of lists of parsed items
+        """
+        parser = self.get_feed_parser(provider).__class__()
+        batch = []
+        for item in parser.parse_iter(source, provider):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def get_feed_parser(self, provider, article=None):
         """
         Returns instance of configured feed parser for the given provider.
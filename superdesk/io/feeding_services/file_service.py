@@ -13,11 +13,15 @@ import os
 import shutil
 from datetime import timedelta, datetime
 
+from flask import current_app as app
 from lxml import etree
+from superdesk import get_resource_service
 from superdesk.errors import IngestFileError, ParserError, ProviderError
 from superdesk.io.registry import register_feeding_service
 from superdesk.io.feed_parsers import XMLFeedParser
 from superdesk.io.feeding_services import FeedingService
+from superdesk.io.feeding_services.file_watcher import get_watcher
+from superdesk.io.commands.update_ingest import is_closed, schedule_provider_update
 from superdesk.notification import push_notification
 from superdesk.utc import utc, utcnow
 from superdesk.utils import get_sorted_files, FileSortAttributes
@@ -51,39 +55,93 @@ class FileFeedingService(FeedingService):
             return []
 
         registered_parser = self.get_feed_parser(provider)
-        for filename in get_sorted_files(self.path, sort_by=FileSortAttributes.created):
-            try:
-                last_updated = None
-                file_path = os.path.join(self.path, filename)
-                if os.path.isfile(file_path):
-                    stat = os.lstat(file_path)
-                    last_updated = datetime.fromtimestamp(stat.st_mtime, tz=utc)
-
-                    if self.is_latest_content(last_updated, provider.get('last_updated')):
-                        if isinstance(registered_parser, XMLFeedParser):
-                            with open(file_path, 'rb') as f:
-                                xml = etree.parse(f)
-                                parser = self.get_feed_parser(provider, xml.getroot())
-                                item = parser.parse(xml.getroot(), provider)
+        filenames = self.get_watched_files(provider) if app.config.get('FILE_INGEST_WATCH') else None
+        watched = filenames is not None
+        if filenames is None:
+            filenames = get_sorted_files(self.path, sort_by=FileSortAttributes.created)
+        done = 0
+        try:
+            for done, filename in enumerate(filenames):
+                try:
+                    last_updated = None
+                    file_path = os.path.join(self.path, filename)
+                    if os.path.isfile(file_path):
+                        stat = os.lstat(file_path)
+                        last_updated = datetime.fromtimestamp(stat.st_mtime, tz=utc)
+
+                        if self.is_latest_content(last_updated, provider.get('last_updated')):
+                            batch_size = app.config.get('INGEST_XML_STREAMING_BATCH_SIZE')
+                            if isinstance(registered_parser, XMLFeedParser) and batch_size:
+                                with open(file_path, 'rb') as f:
+                                    for items in self.parse_xml_batches(provider, f, batch_size):
+                                        for item in items:
+                                            self.after_extracting(item, provider)
+                                        yield items
+                                self.move_file(self.path, filename, provider=provider, success=True)
+                                continue
+                            elif isinstance(registered_parser, XMLFeedParser):
+                                with open(file_path, 'rb') as f:
+                                    xml = etree.parse(f)
+                                    parser = self.get_feed_parser(provider, xml.getroot())
+                                    item = parser.parse(xml.getroot(), provider)
+                            else:
+                                parser = self.get_feed_parser(provider, file_path)
+                                item = parser.parse(file_path, provider)
+
+                            self.after_extracting(item, provider)
+                            self.move_file(self.path, filename, provider=provider, success=True)
+
+                            if isinstance(item, list):
+                                yield item
+                            else:
+                                yield [item]
                         else:
-                            parser = self.get_feed_parser(provider, file_path)
-                            item = parser.parse(file_path, provider)
+                            self.move_file(self.path, filename, provider=provider, success=True)
+                except Exception as ex:
+                    if last_updated and self.is_old_content(last_updated):
+                        self.move_file(self.path, filename, provider=provider, success=False)
+                    raise ParserError.parseFileError('{}-{}'.format(provider['name'], self.NAME),
+                                                     filename, ex, provider)
+            done = len(filenames)
+        finally:
+            if watched and done < len(filenames):
+                # failed or interrupted, keep the rest for next update
+                self.requeue_watched_files(filenames[done:])
 
-                        self.after_extracting(item, provider)
-                        self.move_file(self.path, filename, provider=provider, success=True)
+        push_notification('ingest:update')
 
-                        if isinstance(item, list):
-                            yield item
-                        else:
-                            yield [item]
-                    else:
-                        self.move_file(self.path, filename, provider=provider, success=True)
-            except Exception as ex:
-                if last_updated and self.is_old_content(last_updated):
-                    self.move_file(self.path, filename, provider=provider, success=False)
-                raise ParserError.parseFileError('{}-{}'.format(provider['name'], self.NAME), filename, ex, provider)
+    def get_watched_files(self, provider):
+        """Get files written to provider path since last update using directory watcher.
 
-        push_notification('ingest:update')
+        Watcher is started on first call and schedules provider update when there are new files,
+        it returns ``None`` when directory should be scanned instead.
+
+        :param provider: dict - Ingest provider details
+        """
+        watcher = get_watcher(self.path, on_change=self._get_update_trigger(provider))
+        if watcher is None:
+            return None
+        return watcher.pop_files(rescan_after=app.config.get('FILE_INGEST_RESCAN_MINUTES', 10) * 60)
+
+    def requeue_watched_files(self, filenames):
+        """Put back watched files which were not processed, so those are not lost till next rescan.
+
+        :param filenames: list of file names
+        """
+        watcher = get_watcher(self.path)
+        if watcher is not None:
+            watcher.requeue_files(filenames)
+
+    def _get_update_trigger(self, provider):
+        current_app = app._get_current_object()
+        provider_id = provider.get('_id')
+
+        def trigger():
+            with current_app.app_context():
+                current = get_resource_service('ingest_providers').find_one(req=None, _id=provider_id)
+                if current and not is_closed(current):
+                    schedule_provider_update(current)
+        return trigger
 
     def after_extracting(self, article, provider):
         """Sub-classes should override this method if something needs to be done to the given article.
@@ -0,0 +1,220 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Directory watching using linux inotify, used by file ingest when ``FILE_INGEST_WATCH`` is on.
+
+Watcher queues names of files which were closed after writing or moved into the directory,
+so ingest can process just those instead of listing the whole directory. When events
+can't be trusted (watcher was just started, kernel queue overflowed or it's time for
+periodic rescan) :meth:`DirectoryWatcher.pop_files` returns ``None`` and directory
+must be scanned. Periodic rescan is needed on network filesystems, where inotify
+doesn't get events for files written by other hosts.
+"""
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+import threading
+
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+READ_SIZE = 64 * 1024
+MAX_QUEUED = 50000
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    return _libc
+
+
+def _check(result):
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+def parse_events(data):
+    """Parse inotify events data.
+
+    :param bytes data: data read from inotify file descriptor
+    :return: list of ``(mask, name)``
+    """
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        events.append((mask, os.fsdecode(name)))
+    return events
+
+
+class DirectoryWatcher():
+    """Watch directory for new files in background thread.
+
+    :param path: directory path
+    :param on_change: callable called from watcher thread when files are queued,
+                      it's called again only after queued files were popped
+    :param max_queued: max number of queued files, when reached directory will be scanned instead
+    :raises OSError: if inotify is not available
+    """
+
+    def __init__(self, path, on_change=None, max_queued=MAX_QUEUED):
+        self.path = path
+        self.on_change = on_change
+        self.max_queued = max_queued
+        self._files = OrderedDict()
+        self._needs_scan = True
+        self._notified = False
+        self._scanned = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        libc = _get_libc()
+        self._fd = _check(libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+        try:
+            _check(libc.inotify_add_watch(self._fd, os.fsencode(path), IN_CLOSE_WRITE | IN_MOVED_TO))
+        except OSError:
+            os.close(self._fd)
+            raise
+
+        self._thread = threading.Thread(target=self._run, name='watcher-%s' % path, daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def pop_files(self, rescan_after=None):
+        """Get names of files queued since last call, in order of events.
+
+        Returns ``None`` if directory should be scanned instead, queue is emptied.
+
+        :param rescan_after: seconds after which directory should be scanned again
+        """
+        with self._lock:
+            self._notified = False
+            now = time.time()
+            if self._needs_scan or (rescan_after and now - self._scanned > rescan_after):
+                self._needs_scan = False
+                self._scanned = now
+                self._files.clear()
+                return None
+            files = list(self._files)
+            self._files.clear()
+            return files
+
+    def requeue_files(self, files):
+        """Put back popped files which were not processed, next :meth:`pop_files` returns them first.
+
+        :param files: list of file names
+        """
+        with self._lock:
+            if self._needs_scan:
+                return
+            queued = list(self._files)
+            self._files.clear()
+            for name in files + queued:
+                self._files.pop(name, None)
+                self._files[name] = None
+            if len(self._files) > self.max_queued:
+                self._needs_scan = True
+                self._files.clear()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if readable:
+                    self._queue(parse_events(self._read()))
+        except Exception:
+            logger.exception('Directory watcher failed path=%s', self.path)
+        finally:
+            os.close(self._fd)
+
+    def _read(self):
+        try:
+            return os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return b''
+
+    def _queue(self, events):
+        notify = False
+        with self._lock:
+            for mask, name in events:
+                if mask & (IN_Q_OVERFLOW | IN_IGNORED):
+                    # events were lost or directory is not watched anymore
+                    self._needs_scan = True
+                    if mask & IN_IGNORED:
+                        self._stop.set()
+                elif name and not mask & IN_ISDIR:
+                    self._files.pop(name, None)
+                    self._files[name] = None
+            if len(self._files) > self.max_queued:
+                self._needs_scan = True
+                self._files.clear()
+            if (self._files or self._needs_scan) and not self._notified:
+                self._notified = notify = True
+        if notify and self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception('Directory watcher callback failed path=%s', self.path)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(path, on_change=None):
+    """Get running watcher for given path, it's started if needed.
+
+    Returns ``None`` if inotify is not available for path.
+
+    :param path: directory path
+    :param on_change: callable used when new watcher is started
+    """
+    with _watchers_lock:
+        watcher = _watchers.get(path)
+        if watcher is not None and watcher.is_alive():
+            return watcher
+        try:
+            watcher = _watchers[path] = DirectoryWatcher(path, on_change)
+        except (OSError, AttributeError) as ex:
+            # AttributeError when libc has no inotify functions
+            logger.warning('Failed to watch directory, it will be scanned path=%s error=%s', path, ex)
+            _watchers.pop(path, None)
+            return None
+        return watcher
@@ -14,15 +14,20 @@ import ftplib
 import logging
 import tempfile
 
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from flask import current_app as app
 
+from superdesk import get_resource_service
 from superdesk.io.registry import register_feeding_service
 from superdesk.io.feed_parsers import XMLFeedParser
 from superdesk.utc import utc
 from superdesk.etree import etree
 from superdesk.io.feeding_services import FeedingService
 from superdesk.errors import IngestFtpError
-from superdesk.ftp import ftp_connect
+from superdesk.ftp import ftp_connect, FTPConnectionPool
 from superdesk.io.commands.update_ingest import LAST_UPDATED
 
 try:
@@ -60,6 +65,10 @@ class FTPFeedingService(FeedingService):
         }
 
     def _update(self, provider, update):
+        if app.config.get('FTP_INGEST_CONNECTIONS'):
+            yield from self._update_indexed(provider, update, app.config['FTP_INGEST_CONNECTIONS'])
+            return
+
         config = provider.get('config', {})
         last_updated = provider.get('last_updated')
         crt_last_updated = None
@@ -68,8 +77,9 @@ class FTPFeedingService(FeedingService):
             config['dest_path'] = tempfile.mkdtemp(prefix='superdesk_ingest_')
 
         try:
+            # download all files first so connection is not idle while items are ingested
+            local_file_paths = []
             with ftp_connect(config) as ftp:
-                items = []
                 for filename, facts in ftp.mlsd():
                     if facts.get('type', '') != 'file':
                         continue
@@ -97,26 +107,146 @@ class FTPFeedingService(FeedingService):
                         logger.error('Exception retrieving from FTP server, file already exists (%s)', local_file_path)
                         continue
 
-                    registered_parser = self.get_feed_parser(provider)
-                    if isinstance(registered_parser, XMLFeedParser):
-                        xml = etree.parse(local_file_path).getroot()
-                        parser = self.get_feed_parser(provider, xml)
-                        parsed = parser.parse(xml, provider)
-                    else:
-                        parser = self.get_feed_parser(provider, local_file_path)
-                        parsed = parser.parse(local_file_path, provider)
+                    local_file_paths.append(local_file_path)
+
+            registered_parser = self.get_feed_parser(provider)
+            batch_size = app.config.get('INGEST_XML_STREAMING_BATCH_SIZE')
+            for local_file_path in local_file_paths:
+                if isinstance(registered_parser, XMLFeedParser) and batch_size:
+                    yield from self.parse_xml_batches(provider, local_file_path, batch_size)
+                    continue
+                elif isinstance(registered_parser, XMLFeedParser):
+                    xml = etree.parse(local_file_path).getroot()
+                    parser = self.get_feed_parser(provider, xml)
+                    parsed = parser.parse(xml, provider)
+                else:
+                    parser = self.get_feed_parser(provider, local_file_path)
+                    parsed = parser.parse(local_file_path, provider)
+
+                if isinstance(parsed, dict):
+                    parsed = [parsed]
 
-                    if isinstance(parsed, dict):
-                        parsed = [parsed]
+                yield parsed
 
-                    items.append(parsed)
             if crt_last_updated:
                 update[LAST_UPDATED] = crt_last_updated
-            return items
         except IngestFtpError:
             raise
         except Exception as ex:
             raise IngestFtpError.ftpError(ex, provider)
 
+    def _update_indexed(self, provider, update, connections):
+        """Fetch only files which are not in the index of files seen in previous updates.
+
+        Files are downloaded into memory using pool of ``connections`` while already
+        downloaded files are parsed, batches of items are yielded in order of files
+        modification time. Index of seen files is kept in ``ingest_provider_files``
+        and it's saved in :meth:`after_update`, so if ingest fails files are fetched again.
+
+        On first update files older than provider ``last_updated`` are only added to index.
+
+        :param provider: ingest provider
+        :param update: provider update
+        :param connections: max number of connections used for download
+        """
+        config = provider.get('config', {})
+        seen = get_resource_service('ingest_provider_files').get_index(provider.get('_id'))
+        watermark = provider.get(LAST_UPDATED) if not seen else None
+        registered_parser = self.get_feed_parser(provider)
+
+        try:
+            with FTPConnectionPool(config) as pool:
+                with pool.connection() as ftp:
+                    listing = self._list_files(ftp)
+
+                index = {}
+                new_files = []
+                for filename, size, modify in listing:
+                    index[filename] = [size, modify]
+                    if seen.get(filename) == [size, modify]:
+                        continue
+                    if watermark and modify and self._get_modify_date(modify) < watermark:
+                        continue
+                    new_files.append(filename)
+
+                with ThreadPoolExecutor(max_workers=connections) as executor:
+                    pending = deque()
+                    files = iter(new_files)
+                    for filename in files:
+                        pending.append((filename, executor.submit(self._retrieve, pool, filename)))
+                        if len(pending) >= connections * 2:
+                            break
+                    while pending:
+                        filename, future = pending.popleft()
+                        next_filename = next(files, None)
+                        if next_filename is not None:
+                            pending.append((next_filename, executor.submit(self._retrieve, pool, next_filename)))
+                        try:
+                            content = future.result()
+                        except ftplib.all_errors:
+                            logger.exception('Exception retrieving file from FTP server (%s)', filename)
+                            index.pop(filename, None)
+                            continue
+                        yield from self._parse_content(provider, registered_parser, filename, content)
+
+            self._seen_files = (seen, index)
+        except IngestFtpError:
+            raise
+        except Exception as ex:
+            raise IngestFtpError.ftpError(ex, provider)
+
+    def after_update(self, provider, update):
+        """Save index of seen files once fetched files were ingested."""
+        seen_files = getattr(self, '_seen_files', None)
+        if seen_files is not None:
+            previous, index = seen_files
+            get_resource_service('ingest_provider_files').save_index(provider.get('_id'), index, previous)
+            self._seen_files = None
+
+    def _list_files(self, ftp):
+        """Get list of ``(filename, size, modify)`` for files with ``FILE_SUFFIX`` sorted by modify."""
+        files = []
+        for filename, facts in ftp.mlsd():
+            if facts.get('type', '') != 'file':
+                continue
+            if not filename.lower().endswith(self.FILE_SUFFIX):
+                continue
+            files.append((filename, int(facts.get('size') or 0), facts.get('modify')))
+        return sorted(files, key=lambda entry: (entry[2] or '', entry[0]))
+
+    def _get_modify_date(self, modify):
+        return datetime.strptime(modify[:14], self.DATE_FORMAT).replace(tzinfo=utc)
+
+    def _retrieve(self, pool, filename):
+        """Download file into memory using connection from pool."""
+        content = BytesIO()
+        with pool.connection() as ftp:
+            ftp.retrbinary('RETR %s' % filename, content.write)
+        return content.getvalue()
+
+    def _parse_content(self, provider, registered_parser, filename, content):
+        """Parse downloaded file content, file based parsers get it via temporary file.
+
+        :return: generator of lists of parsed items
+        """
+        batch_size = app.config.get('INGEST_XML_STREAMING_BATCH_SIZE')
+        if isinstance(registered_parser, XMLFeedParser) and batch_size:
+            yield from self.parse_xml_batches(provider, BytesIO(content), batch_size)
+            return
+        elif isinstance(registered_parser, XMLFeedParser):
+            xml = etree.fromstring(content)
+            parser = self.get_feed_parser(provider, xml)
+            parsed = parser.parse(xml, provider)
+        else:
+            with tempfile.NamedTemporaryFile(prefix='superdesk_ingest_', suffix=os.path.splitext(filename)[1]) as f:
+                f.write(content)
+                f.flush()
+                parser = self.get_feed_parser(provider, f.name)
+                parsed = parser.parse(f.name, provider)
+
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        yield parsed
+
 
 register_feeding_service(FTPFeedingService.NAME, FTPFeedingService(), FTPFeedingService.ERRORS)
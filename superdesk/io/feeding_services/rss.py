@@ -15,6 +15,7 @@ import requests
 from calendar import timegm
 from collections import namedtuple
 from datetime import datetime
+from http.cookiejar import DefaultCookiePolicy
 
 from superdesk.errors import IngestApiError, ParserError
 from superdesk.io.registry import register_feeding_service
@@ -22,12 +23,30 @@ from superdesk.io.feeding_services import FeedingService
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, GUID_TAG
 from superdesk.utils import merge_dicts
 from superdesk.metadata.utils import generate_guid, generate_tag
+from superdesk.stats import stats
 
 from urllib.parse import quote as urlquote, urlsplit, urlunsplit
 
 
 utcfromtimestamp = datetime.utcfromtimestamp
 
+#: number of hosts with connections kept alive by :data:`session`
+POOL_CONNECTIONS = 100
+
+
+def _create_session():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_CONNECTIONS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # session is shared by all providers so don't let cookies leak between them
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+#: session shared by rss providers so connections to feed hosts are reused between polls
+session = _create_session()
+
 
 class RSSFeedingService(FeedingService):
     """
@@ -45,6 +64,9 @@ class RSSFeedingService(FeedingService):
 
     label = 'RSS'
 
+    #: key in provider ``private`` data with validators of last fetched feed
+    VALIDATORS = 'rss_validators'
+
     ItemField = namedtuple('ItemField', ['name', 'name_in_data', 'type'])
 
     item_fields = [
@@ -131,7 +153,9 @@ class RSSFeedingService(FeedingService):
                 'password': config.get('password', '')
             }
 
-        xml_data = self._fetch_data(config, provider)
+        xml_data = self._fetch_data(config, provider, update)
+        if xml_data is None:
+            return []  # feed was not modified since last fetch
 
         try:
             data = feedparser.parse(xml_data)
@@ -175,13 +199,18 @@ class RSSFeedingService(FeedingService):
 
         return [new_items]
 
-    def _fetch_data(self, config, provider):
+    def _fetch_data(self, config, provider, update=None):
         """Fetch the latest feed data.
 
+        If feed was fetched before, the ``ETag`` and ``Last-Modified`` values it was served with
+        are sent in a conditional request, so unchanged feed is not downloaded again. Values
+        of the new response are stored in provider ``private`` data via ``update``.
+
         :param dict config: RSS resource configuration
         :param provider: data provider instance, needed as an argument when
             raising ingest errors
-        :return: fetched RSS data
+        :param dict update: provider update, validators are not used if not set
+        :return: fetched RSS data or ``None`` if it was not modified
         :rtype: str
 
         :raises IngestApiError: if fetching data fails for any reason
@@ -194,9 +223,32 @@ class RSSFeedingService(FeedingService):
         else:
             auth = None
 
-        response = requests.get(url, auth=auth, timeout=30)
-
-        if response.ok:
+        headers = {}
+        if update is not None:
+            private = dict(provider.get('private') or {})
+            validators = private.get(self.VALIDATORS) or {}
+            if validators.get('url') == url:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+
+        response = session.get(url, auth=auth, headers=headers, timeout=30)
+
+        if headers and response.status_code == 304:
+            stats.incr('ingest.rss.not_modified')
+            return None
+        elif response.ok:
+            stats.incr('ingest.rss.fetched')
+            if update is not None:
+                validators = {
+                    'url': url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                if validators['etag'] or validators['last_modified'] or private.get(self.VALIDATORS):
+                    private[self.VALIDATORS] = validators
+                    update['private'] = private
             return response.content
         else:
             if response.status_code in (401, 403):
@@ -56,6 +56,29 @@ class IngestService(BaseService):
         res = self.backend.update_in_mongo(self.datasource, id, document, original)
         return res
 
+    def post_many_in_mongo(self, docs):
+        """Create multiple items using single bulk insert.
+
+        :param docs: list of items
+        :return: tuple of inserted ids and list of ``(doc, error)`` tuples for failed items
+        """
+        for doc in docs:
+            resolve_default_values(doc, app.config['DOMAIN'][self.datasource]['defaults'])
+        self.on_create(docs)
+        resolve_document_etag(docs, self.datasource)
+        ids, failed = self.backend.create_many_in_mongo(self.datasource, docs)
+        inserted = set(ids)
+        self.on_created([doc for doc in docs if doc[config.ID_FIELD] in inserted])
+        return ids, failed
+
+    def patch_many_in_mongo(self, changes):
+        """Update multiple items using single bulk write.
+
+        :param changes: list of ``(id, updates, original)`` tuples
+        :return: list of ``(id, error)`` tuples for failed items
+        """
+        return self.backend.update_many_in_mongo(self.datasource, changes)
+
     def set_ingest_provider_sequence(self, item, provider):
         """Sets the value of ingest_provider_sequence in item.
 
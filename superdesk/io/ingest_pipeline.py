@@ -0,0 +1,140 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Staged pipeline used by ingest task when ``INGEST_PIPELINE_WORKERS`` is set.
+
+Feeding service fetches and parses items in a background thread, parsed batches
+are passed via bounded queue to a thread pool which enriches and saves them.
+When the queue is full fetching waits, so there are never more than
+``INGEST_PIPELINE_QUEUE_SIZE`` batches buffered in memory.
+
+Batches containing the same guid are never ingested in parallel,
+so updates of an item are saved in the order they were fetched.
+"""
+
+import time
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app as app
+from superdesk.logging import logger
+from superdesk.metadata.item import GUID_FIELD
+from superdesk.stats import stats
+
+
+DONE = object()
+
+#: max number of seconds to wait for fetching thread to stop
+JOIN_TIMEOUT = 60
+
+
+def _ms(start):
+    return int((time.time() - start) * 1000)
+
+
+class IngestPipeline():
+    """Fetch and ingest batches of items concurrently.
+
+    :param workers: number of threads ingesting batches
+    :param queue_size: max number of fetched batches waiting for ingest
+    """
+
+    def __init__(self, workers, queue_size):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+
+    def run(self, batches, ingest):
+        """Consume batches in background thread and ingest them using thread pool.
+
+        Error raised when fetching or ingesting is raised here, pending batches
+        are ingested and fetching is stopped before that.
+
+        :param batches: iterable of lists of items, eg. ``feeding_service.update(provider, update)``
+        :param ingest: callable which gets list of items
+        :return: number of ingested items
+        """
+        current_app = app._get_current_object()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._fetch, args=(current_app, batches, fetched, stop), daemon=True)
+        thread.start()
+
+        total = 0
+        pending = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                try:
+                    while True:
+                        start = time.time()
+                        items, error = fetched.get()
+                        stats.timing('ingest.pipeline.wait', _ms(start))
+                        stats.gauge('ingest.pipeline.queue', fetched.qsize())
+                        if error is not None:
+                            raise error
+                        if items is DONE:
+                            break
+                        guids = set(item.get(GUID_FIELD) for item in items)
+                        while pending and (len(pending) >= self.workers or
+                                           any(guids & running for running in pending.values())):
+                            done, _running = wait(list(pending), return_when=FIRST_COMPLETED)
+                            for future in done:
+                                pending.pop(future)
+                                total += future.result()
+                        future = executor.submit(self._ingest, current_app, ingest, items)
+                        pending[future] = guids
+                    for future in list(pending):
+                        total += future.result()
+                finally:
+                    stop.set()
+        finally:
+            # don't let it fetch after provider update lock is released
+            thread.join(JOIN_TIMEOUT)
+            if thread.is_alive():
+                logger.warning('ingest pipeline fetching did not stop in %ds', JOIN_TIMEOUT)
+        return total
+
+    def _fetch(self, current_app, batches, fetched, stop):
+        with current_app.app_context():
+            try:
+                iterator = iter(batches)
+                while not stop.is_set():
+                    start = time.time()
+                    try:
+                        items = next(iterator)
+                    except StopIteration:
+                        break
+                    stats.timing('ingest.pipeline.fetch', _ms(start))
+                    self._put(fetched, (items, None), stop)
+            except Exception as ex:
+                self._put(fetched, (None, ex), stop)
+            else:
+                self._put(fetched, (DONE, None), stop)
+            finally:
+                # generator can be only closed by thread iterating it
+                close = getattr(batches, 'close', None)
+                if close is not None:
+                    close()
+
+    def _put(self, fetched, entry, stop):
+        """Put entry to queue, wait while it's full unless pipeline is stopped."""
+        while not stop.is_set():
+            try:
+                fetched.put(entry, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _ingest(self, current_app, ingest, items):
+        with current_app.app_context():
+            start = time.time()
+            ingest(items)
+            stats.timing('ingest.pipeline.ingest', _ms(start))
+        return len(items)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Index of remote files seen by ingest providers.
+
+There is one document per provider and file name, so the index size is not limited
+by provider document size and it's not part of provider data sent via api or celery.
+"""
+
+from flask import current_app as app
+from pymongo import UpdateOne, DeleteMany
+
+from superdesk.resource import Resource
+from superdesk.services import BaseService
+
+
+class IngestProviderFilesResource(Resource):
+    schema = {
+        'provider': Resource.rel('ingest_providers', required=True),
+        'name': {'type': 'string', 'required': True},
+        'size': {'type': 'integer'},
+        'modify': {'type': 'string', 'nullable': True},
+    }
+    internal_resource = True
+    resource_methods = []
+    item_methods = []
+    mongo_indexes = {
+        'provider_1_name_1': ([('provider', 1), ('name', 1)], {'unique': True}),
+    }
+
+
+class IngestProviderFilesService(BaseService):
+
+    def get_index(self, provider_id):
+        """Get files seen by provider.
+
+        :param provider_id: provider id
+        :return: dict of ``[size, modify]`` by file name
+        """
+        cursor = self._get_collection().find({'provider': provider_id}, {'name': 1, 'size': 1, 'modify': 1})
+        return {doc['name']: [doc.get('size'), doc.get('modify')] for doc in cursor}
+
+    def save_index(self, provider_id, index, previous=None):
+        """Save files seen by provider, only changed entries are written.
+
+        :param provider_id: provider id
+        :param index: dict of ``[size, modify]`` by file name
+        :param previous: index loaded before, if ``None`` it's loaded
+        """
+        if previous is None:
+            previous = self.get_index(provider_id)
+        requests = []
+        for name, (size, modify) in index.items():
+            if previous.get(name) != [size, modify]:
+                requests.append(UpdateOne({'provider': provider_id, 'name': name},
+                                          {'$set': {'size': size, 'modify': modify}},
+                                          upsert=True))
+        removed = [name for name in previous if name not in index]
+        if removed:
+            requests.append(DeleteMany({'provider': provider_id, 'name': {'$in': removed}}))
+        if requests:
+            self._get_collection().bulk_write(requests, ordered=False)
+
+    def delete_index(self, provider_id):
+        """Remove index of deleted provider.
+
+        :param provider_id: provider id
+        """
+        self._get_collection().delete_many({'provider': provider_id})
+
+    def _get_collection(self):
+        return app.data.mongo.pymongo(self.datasource).db[self.datasource]
@@ -52,6 +52,7 @@ class IngestProviderResource(Resource):
     :param last_closed: info when and by whom provider was closed last time
     :param last_opened: info when and by whom provider was opened last time
     :param critical_errors: error codes which are considered critical and should close provider
+    :param private: feeding service internal data, eg. index of files seen already
     """
 
     def __init__(self, endpoint_name, app, service, endpoint_schema=None):
@@ -153,11 +154,15 @@ class IngestProviderResource(Resource):
                     'type': 'boolean'
                 }
             },
+            'private': {
+                'type': 'dict',
+                'readonly': True,
+            },
         }
 
         self.item_methods = ['GET', 'PATCH', 'DELETE']
         self.privileges = {'POST': 'ingest_providers', 'PATCH': 'ingest_providers', 'DELETE': 'ingest_providers'}
-        self.etag_ignore_fields = ['last_updated', 'last_item_update', 'last_closed', 'last_opened']
+        self.etag_ignore_fields = ['last_updated', 'last_item_update', 'last_closed', 'last_opened', 'private']
 
         super().__init__(endpoint_name, app, service, endpoint_schema=endpoint_schema)
 
@@ -253,6 +258,7 @@ class IngestProviderService(BaseService):
                                 user_list=self.user_service.get_users_by_user_type('administrator'),
                                 name=doc.get('name'), provider_id=doc.get(config.ID_FIELD))
         push_notification('ingest_provider:delete', provider_id=str(doc.get(config.ID_FIELD)))
+        get_resource_service('ingest_provider_files').delete_index(doc.get(config.ID_FIELD))
         get_resource_service('sequences').delete(lookup={
             'key': 'ingest_providers_{_id}'.format(_id=doc[config.ID_FIELD])
         })
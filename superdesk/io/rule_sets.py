@@ -0,0 +1,126 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Compiled translation rule sets applied to ingested items.
+
+Rules of a rule set are applied in order, each rule replacing all occurrences
+of ``old`` with ``new`` in the output of previous rules. Instead of scanning text
+once per rule, consecutive rules which can't affect each other are compiled into
+a single regex alternation and applied in one pass. Rules can affect each other if
+their ``old`` values overlap, or if ``old`` of a later rule overlaps ``new`` of an earlier
+one or could span over text removed by it. Such rule starts a new group, groups are
+applied one after another, so output is the same as when rules are applied one by one.
+
+Compiled rule sets are cached per rule set ``_id`` and ``_etag``.
+"""
+
+import re
+import threading
+
+
+def _overlaps(first, second):
+    """Test if there is text where occurrences of ``first`` and ``second`` overlap."""
+    if not first or not second:
+        return False
+    if first in second or second in first:
+        return True
+    for size in range(1, min(len(first), len(second))):
+        if first.endswith(second[:size]) or second.endswith(first[:size]):
+            return True
+    return False
+
+
+def _conflicts(rule, group):
+    """Test if ``rule`` can't be applied in same pass with rules in ``group`` which precede it."""
+    old, new = rule
+    for prev_old, prev_new in group:
+        if _overlaps(old, prev_old) or _overlaps(old, prev_new):
+            return True
+        if not prev_new and len(old) > 1:
+            # text around removed occurrence could match
+            return True
+    return False
+
+
+class CompiledRuleSet():
+    """Rules compiled into groups applied one after another.
+
+    :param rules: list of rules with ``old`` and ``new`` values
+    """
+
+    def __init__(self, rules):
+        groups = []
+        group = []
+        for rule in rules:
+            rule = (rule['old'], rule['new'] or '')
+            if not rule[0]:
+                # replacing empty string inserts text between all characters, keep it as is
+                groups.extend([group, [rule]])
+                group = []
+            elif group and _conflicts(rule, group):
+                groups.append(group)
+                group = [rule]
+            else:
+                group.append(rule)
+        groups.append(group)
+        self.groups = [self._compile(group) for group in groups if group]
+
+    def _compile(self, group):
+        if len(group) == 1:
+            return group[0]
+        replacements = dict(group)
+        pattern = re.compile('|'.join(re.escape(old) for old, new in group))
+        return pattern, lambda match: replacements[match.group(0)]
+
+    def apply(self, text):
+        """Apply rules to given text.
+
+        :param text: text to modify
+        """
+        for old, new in self.groups:
+            if isinstance(old, str):
+                text = text.replace(old, new)
+            else:
+                text = old.sub(new, text)
+        return text
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_rule_set(rule_set):
+    """Get compiled rule set, it's compiled only if it's not cached for current ``_etag``.
+
+    :param rule_set: rule set document
+    """
+    key = rule_set.get('_id')
+    etag = rule_set.get('_etag')
+    if key is None or etag is None:
+        return CompiledRuleSet(rule_set.get('rules') or [])
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    compiled = CompiledRuleSet(rule_set.get('rules') or [])
+    with _compiled_lock:
+        _compiled[key] = (etag, compiled)
+    return compiled
+
+
+def clear_compiled_rule_set(_id=None):
+    """Remove compiled rule set from cache.
+
+    :param _id: rule set id, all are removed if not set
+    """
+    with _compiled_lock:
+        if _id is None:
+            _compiled.clear()
+        else:
+            _compiled.pop(_id, None)
@@ -20,13 +20,23 @@ bp = Blueprint('subjectcodes', __name__)
 
 
 class SubjectIndex():
-    """Subjects index."""
+    """Subjects index.
+
+    Parents and ancestors of registered subjects are computed once and kept
+    until other subjects are registered.
+    """
 
     newscode_pattern = re.compile('[0-9]{8,9}')
 
     def __init__(self):
         self.subjects = {}
         self.last_modified = datetime.fromtimestamp(0)
+        self._reset()
+
+    def _reset(self):
+        self._parents = None
+        self._ancestors = {}
+        self._response = None
 
     def register(self, subjects, last_modified=None):
         """Register subjects.
@@ -37,16 +47,60 @@ class SubjectIndex():
         self.subjects.update(subjects)
         if last_modified is not None:
             self.last_modified = max(self.last_modified, last_modified)
+        self._reset()
 
     def get_items(self):
         """Get list of all subjects.
 
         Each subject is a dict with `qcode`, `name` and `parent` keys.
         """
-        items = []
-        for code in sorted(self.subjects):
-            items.append({'qcode': code, 'name': self.subjects[code], 'parent': self._get_parent_code(code)})
-        return items
+        parents = self._get_parents()
+        return [{'qcode': code, 'name': self.subjects[code], 'parent': parents[code]} for code in sorted(self.subjects)]
+
+    def get_response(self):
+        """Get response data with all subjects, it's computed only once."""
+        if self._response is None:
+            items = self.get_items()
+            self._response = {'_items': items, '_meta': {'total': len(items)}}
+        return self._response
+
+    def get_ancestors(self, code):
+        """Get ancestors of given code, starting with top level one.
+
+        :param code: iptc newscode without `subj:` prefix
+        """
+        ancestors = self._ancestors.get(code)
+        if ancestors is None:
+            parent = self._get_parent_code(code)
+            ancestors = self.get_ancestors(parent) + (parent, ) if parent else ()
+            if code in self.subjects:
+                self._ancestors[code] = ancestors
+        return ancestors
+
+    def expand_with_ancestors(self, subjects):
+        """Add ancestors of iptc subject codes which are missing in given subjects.
+
+        Missing ancestors are appended after existing subjects, with `qcode` and `name`.
+
+        :param subjects: list of subjects with `qcode`
+        :raises KeyError: if ancestor is not registered
+        """
+        codes = set(subject['qcode'] for subject in subjects if 'qcode' in subject)
+        missing = []
+        for subject in subjects:
+            code = subject.get('qcode')
+            if not code or len(code) != 8 or not code.isdigit():
+                continue
+            for ancestor in self.get_ancestors(code):
+                if ancestor not in codes:
+                    codes.add(ancestor)
+                    missing.append({'qcode': ancestor, 'name': self.subjects[ancestor]})
+        return subjects + missing
+
+    def _get_parents(self):
+        if self._parents is None:
+            self._parents = {code: self._get_parent_code(code) for code in self.subjects}
+        return self._parents
 
     def _get_parent_code(self, code):
         """Compute parent code for iptc newscode.
@@ -65,9 +119,7 @@ class SubjectIndex():
 
 @bp.route('/subjectcodes/', methods=['GET', 'OPTIONS'])
 def render_subjectcodes():
-    items = get_subjectcodeitems()
-    response_data = {'_items': items, '_meta': {'total': len(items)}}
-    return send_response(None, (response_data, app.subjects.last_modified, None, 200))
+    return send_response(None, (app.subjects.get_response(), app.subjects.last_modified, None, 200))
 
 
 def get_subjectcodeitems():
@@ -38,3 +38,22 @@ class SubjectcodeTestCase(unittest.TestCase):
     def test_iptc_init(self):
         init_app(self)
         self.assertEqual(1404, len(self.subjects.get_items()))
+
+    def test_expand_with_ancestors(self):
+        init_app(self)
+        subjects = [{'qcode': '15039001', 'name': 'formula one'}, {'qcode': '15000000', 'name': 'sport'},
+                    {'qcode': 'foo'}, {'qcode': '15039002'}]
+        expanded = self.subjects.expand_with_ancestors(subjects)
+        self.assertEqual(subjects, expanded[:4])
+        self.assertEqual([{'qcode': '15039000', 'name': 'motor racing'}], expanded[4:])
+        self.assertEqual(('15000000', '15039000'), self.subjects.get_ancestors('15039001'))
+        self.assertEqual((), self.subjects.get_ancestors('15000000'))
+
+    def test_response_cached_until_register(self):
+        self.subjects.register({'01000000': 'arts'})
+        response = self.subjects.get_response()
+        self.assertIs(response, self.subjects.get_response())
+        self.assertEqual(1, response['_meta']['total'])
+        self.subjects.register({'01001000': 'archeology'})
+        self.assertEqual(2, self.subjects.get_response()['_meta']['total'])
+        self.assertEqual('01000000', self.subjects.get_response()['_items'][1]['parent'])
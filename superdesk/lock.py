@@ -1,12 +1,17 @@
 
 import os
 import re
+import time
 import socket
+import threading
 
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
 from mongolock import MongoLock
 from werkzeug.local import LocalProxy
 from flask import current_app as app
 from superdesk.logging import logger
+from superdesk.stats import stats
 
 
 _lock_resource_settings = {
@@ -28,38 +33,199 @@ class SuperdeskMongoLock(MongoLock):
         else:
             return super().release(key, owner)
 
+    def renew(self, key, owner, expire):
+        """Extend lock expiry if it's still owned by owner.
+
+        :param key: lock name
+        :param owner: lock owner
+        :param expire: new ttl in seconds
+        """
+        result = self.collection.update_one({'_id': key, 'owner': owner, 'locked': True},
+                                            {'$set': {'expire': datetime.utcnow() + timedelta(seconds=expire)}})
+        return result.matched_count == 1
+
+    def fence(self, key):
+        """Get next fencing token for lock.
+
+        :param key: lock name
+        """
+        fence = self.collection.find_one_and_update({'_id': 'fence:{}'.format(key)}, {'$inc': {'token': 1}},
+                                                    upsert=True, return_document=ReturnDocument.AFTER)
+        return fence['token']
+
+
+class RedisLock():
+    """Redis lock using ``SET NX PX``.
+
+    It implements the same interface as :class:`SuperdeskMongoLock`,
+    so it can be used instead via ``LOCK_BACKEND`` config.
+
+    :param client: redis client
+    """
+
+    prefix = 'lock:'
+    retry_step = 0.1
+
+    _release_script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    _renew_script = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def lock(self, key, owner, expire=None, timeout=None):
+        start = time.time()
+        while True:
+            if self.client.set(self.prefix + key, owner, nx=True, px=int(expire * 1000) if expire else None):
+                return True
+            if not timeout or time.time() - start >= timeout:
+                return False
+            time.sleep(self.retry_step)
+
+    def release(self, key, owner, remove=False):
+        return self.client.eval(self._release_script, 1, self.prefix + key, owner)
+
+    def renew(self, key, owner, expire):
+        return bool(self.client.eval(self._renew_script, 1, self.prefix + key, owner, int(expire * 1000)))
+
+    def fence(self, key):
+        return self.client.incr('{}fence:{}'.format(self.prefix, key))
+
+
+class Lease():
+    """Lock held by current process.
+
+    When heartbeat is used it renews the lock every third of its ttl till it's stopped
+    or till ``expire`` seconds passed since it was acquired, so it won't expire while
+    the task is running but it will expire soon after process dies and it's not held
+    longer than it would be without lease if it's not unlocked.
+
+    :param backend: lock backend
+    :param task: lock name
+    :param host: lock owner
+    :param ttl: lock ttl in seconds
+    :param token: fencing token
+    :param expire: max number of seconds lock is renewed for
+    """
+
+    def __init__(self, backend, task, host, ttl, token, expire=None):
+        self.backend = backend
+        self.task = task
+        self.host = host
+        self.ttl = ttl
+        self.token = token
+        self.expire = expire
+        self.lost = False
+        self.acquired = time.time()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start_heartbeat(self):
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            ttl = self.ttl
+            if self.expire is not None:
+                remaining = self.expire - (time.time() - self.acquired)
+                if remaining <= 0:
+                    logger.warning('lock lease not renewed after expiry task=%s host=%s' % (self.task, self.host))
+                    return
+                ttl = min(ttl, remaining)
+            try:
+                renewed = self.backend.renew(self.task, self.host, ttl)
+            except Exception as ex:
+                logger.warning('lock renewal failed task=%s host=%s error=%s' % (self.task, self.host, ex))
+                continue
+            if not renewed:
+                self.lost = True
+                stats.incr('lock.lost')
+                logger.error('lock lost task=%s host=%s' % (self.task, self.host))
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        stats.timing('lock.hold', int((time.time() - self.acquired) * 1000))
+
 
 def _get_lock():
-    """Get mongolock instance using app mongodb."""
+    """Get lock backend, redis if ``LOCK_BACKEND`` is set to ``redis`` or mongolock using app mongodb."""
+    if app.config.get('LOCK_BACKEND') == 'redis':
+        return RedisLock(app.redis)
     app.register_resource('_lock', _lock_resource_settings)  # setup dummy resource for locks
     return SuperdeskMongoLock(client=app.data.mongo.pymongo('_lock').db)
 
 
 _lock = LocalProxy(_get_lock)
+_leases = {}
 
 
 def get_host():
     return 'hostid:{} pid:{}'.format(socket.gethostname(), os.getpid())
 
 
-def lock(task, host=None, expire=300, timeout=None):
+def lock(task, host=None, expire=300, timeout=None, lease=False):
     """Try to lock task.
 
+    With ``lease`` the lock gets fencing token available via :func:`get_lease`,
+    and if ``LOCK_LEASE`` is set and it's lower than ``expire``, lock will be
+    acquired with lease ttl and renewed by heartbeat till it's unlocked.
+    Use it for long running tasks, not for short lived locks of items.
+
     :param task: task name
     :param host: current host id
     :param expire: lock ttl in seconds
     :param timeout: how long should it wait if task is locked
+    :param lease: use lease with fencing token
     """
     if not host:
         host = get_host()
-    got_lock = _lock.lock(task, host, expire=expire, timeout=timeout)
+    backend = _lock._get_current_object()
+    lease_ttl = app.config.get('LOCK_LEASE') if lease else None
+    ttl = lease_ttl if lease_ttl and lease_ttl < expire else expire
+    start = time.time()
+    got_lock = backend.lock(task, host, expire=ttl, timeout=timeout)
+    stats.timing('lock.wait', int((time.time() - start) * 1000))
     if got_lock:
         logger.debug('got lock task=%s host=%s' % (task, host))
+        stats.incr('lock.acquired')
+        if lease:
+            _leases[(task, host)] = Lease(backend, task, host, ttl, backend.fence(task), expire=expire)
+            if ttl < expire:
+                _leases[(task, host)].start_heartbeat()
     else:
         logger.debug('task locked already task=%s host=%s' % (task, host))
+        stats.incr('lock.busy')
     return got_lock
 
 
+def get_lease(task, host=None):
+    """Get lease for task locked by current process with ``lease``.
+
+    It can be used to get fencing token for the lock or to check if the lock
+    was lost during the task.
+
+    :param task: task name
+    :param host: current host id
+    """
+    if not host:
+        host = get_host()
+    return _leases.get((task, host))
+
+
 def unlock(task, host=None, remove=False):
     """Release lock on given task.
 
@@ -72,6 +238,9 @@ def unlock(task, host=None, remove=False):
     if not host:
         host = get_host()
     logger.debug('releasing lock task=%s host=%s' % (task, host))
+    lease = _leases.pop((task, host), None)
+    if lease is not None:
+        lease.stop()
     return _lock.release(task, host, remove)
 
 
@@ -80,6 +249,8 @@ def remove_locks():
     Removes item related locks that are not in use
     :return:
     """
+    if app.config.get('LOCK_BACKEND') == 'redis':
+        return  # redis locks expire
     result = _lock.collection.delete_many({'$or': [{'_id': re.compile('^item_move'), 'locked': False},
                                           {'_id': re.compile('^item_lock'), 'locked': False}]})
     logger.info('unused item locks deleted count={}'.format(result.deleted_count))
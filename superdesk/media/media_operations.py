@@ -38,6 +38,22 @@ def get_file_name(file):
     return hash_file(file, hashlib.sha256())
 
 
+def get_content_hash(content):
+    """Get sha256 hex digest of content, stream position is restored after reading.
+
+    :param content: bytes or binary stream
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha256(content).hexdigest()
+    position = content.tell()
+    try:
+        return hash_file(content, hashlib.sha256())
+    finally:
+        content.seek(position)
+
+
 def download_file_from_url(url):
     rv = requests.get(url, timeout=15)
     if rv.status_code not in (200, 201):
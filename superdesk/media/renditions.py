@@ -11,18 +11,27 @@
 from __future__ import absolute_import
 from PIL import Image
 from io import BytesIO
+import os
+import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 from flask import current_app as app
 from .media_operations import process_file_from_stream
-from .media_operations import crop_image
-from .image import fix_orientation
+from .image import EXIF_ORIENTATION_TAG
 from eve.utils import config
 from superdesk import get_resource_service
+from superdesk.utils import sha
 
 
 logger = logging.getLogger(__name__)
 
+ORIENTATION_TRANSPOSE = {
+    3: Image.ROTATE_180,
+    6: Image.ROTATE_270,
+    8: Image.ROTATE_90,
+}
+
 
 def generate_renditions(original, media_id, inserted, file_type, content_type,
                         rendition_config, url_for_media, insert_metadata=True):
@@ -60,30 +69,201 @@ def generate_renditions(original, media_id, inserted, file_type, content_type,
     if ext in ('JPG', 'jpg'):
         ext = 'jpeg'
     ext = ext if ext in ('jpeg', 'gif', 'tiff', 'png') else 'png'
-    for rendition, rsize in rendition_config.items():
-        cropping_data = {}
-        # reset
-        original.seek(0)
-        fix_orientation(original)
-        # create the rendition (can be based on ratio or pixels)
-        if rsize.get('width') or rsize.get('height'):
-            resized, width, height = _resize_image(original, (rsize.get('width'), rsize.get('height')), ext)
-        elif rsize.get('ratio'):
-            resized, width, height, cropping_data = _crop_image(original, ext, rsize.get('ratio'))
-        rend_content_type = 'image/%s' % ext
-        file_name, rend_content_type, metadata = process_file_from_stream(resized, content_type=rend_content_type)
+    rend_content_type = 'image/%s' % ext
+    content_hashes = {}
+    if app.config.get('MEDIA_CONTENT_ADDRESSED') and hasattr(app.media, 'content_media_id'):
+        # renditions of content addressed original are content addressed too,
+        # so for duplicate original those can be reused without rendering
+        content_hashes = {rendition: sha(json.dumps([str(media_id), rendition, rsize, ext], sort_keys=True))
+                          for rendition, rsize in rendition_config.items()}
+        stored = _get_stored_renditions(img, rendition_config, content_hashes, rend_content_type)
+        if stored is not None:
+            for rendition, (_id, width, height, cropping_data) in stored.items():
+                renditions[rendition] = {'href': url_for_media(_id, rend_content_type), 'media': _id,
+                                         'mimetype': rend_content_type, 'width': width, 'height': height}
+                renditions[rendition].update(cropping_data)
+            return renditions
+
+    rendered = render_renditions(original, rendition_config, ext, app.config.get('RENDITIONS_POOL_SIZE', 0))
+    for rendition in rendition_config:
+        if rendition not in rendered:
+            continue
+        resized, width, height, cropping_data = rendered[rendition]
+        file_name, file_content_type, metadata = process_file_from_stream(resized, content_type=rend_content_type)
         resized.seek(0)
+        kwargs = {}
+        if content_hashes:
+            kwargs['content_hash'] = content_hashes[rendition]
+            kwargs['_id'] = app.media.content_media_id(content_hashes[rendition], rend_content_type)
         _id = app.media.put(resized, filename=file_name,
-                            content_type=rend_content_type,
-                            metadata=metadata if insert_metadata else None)
+                            content_type=file_content_type,
+                            metadata=metadata if insert_metadata else None,
+                            **kwargs)
         inserted.append(_id)
-        renditions[rendition] = {'href': url_for_media(_id, rend_content_type), 'media': _id,
-                                 'mimetype': 'image/%s' % ext, 'width': width, 'height': height}
+        renditions[rendition] = {'href': url_for_media(_id, file_content_type), 'media': _id,
+                                 'mimetype': rend_content_type, 'width': width, 'height': height}
         # add the cropping data if exist
         renditions[rendition].update(cropping_data)
     return renditions
 
 
+def render_renditions(original, rendition_config, ext, pool_size=0):
+    """Render renditions from original image decoded only once.
+
+    Original is decoded and oriented according to exif once, for jpeg without crops
+    it's decoded using ``draft`` in the smallest scale which is still big enough
+    for the largest rendition. Resized renditions are derived from the smallest
+    already rendered image which is larger, so only the first one is resized
+    from full image. Encoding is done using process pool if ``pool_size`` > 1.
+
+    :param BytesIO original: original image byte stream
+    :param dict rendition_config: rendition config
+    :param str ext: format of renditions
+    :param int pool_size: number of processes used for encoding
+    :return: dict of rendition name -> (stream, width, height, cropping data)
+    """
+    original.seek(0)
+    img = Image.open(original)
+    orientation = _get_orientation(img)
+    resizes, crops = _get_renditions_sizes(img, rendition_config)
+
+    if resizes and not crops and img.format == 'JPEG':
+        draft_width = max(size[0] for size in resizes.values())
+        draft_height = max(size[1] for size in resizes.values())
+        if orientation in (6, 8):
+            draft_width, draft_height = draft_height, draft_width
+        img.draft(img.mode, (draft_width, draft_height))
+
+    if orientation in ORIENTATION_TRANSPOSE:
+        img = img.transpose(ORIENTATION_TRANSPOSE[orientation])
+    else:
+        img.load()
+
+    images = []
+    rendered = []
+    for rendition, size in sorted(resizes.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+        source = img
+        for image in rendered:
+            if image.size[0] >= size[0] and image.size[1] >= size[1]:
+                source = image
+        resized = source.resize(size, Image.ANTIALIAS)
+        rendered.append(resized)
+        images.append((rendition, resized, 85, {}))
+
+    for rendition, (crop_width, crop_height, cropping_data) in crops.items():
+        box = (cropping_data['CropLeft'], cropping_data['CropTop'],
+               cropping_data['CropRight'], cropping_data['CropBottom'])
+        images.append((rendition, img.crop(box), None, cropping_data))
+
+    encoded = _encode_images([(image, ext, quality) for rendition, image, quality, cropping_data in images], pool_size)
+    renditions = {}
+    for (rendition, image, quality, cropping_data), content in zip(images, encoded):
+        renditions[rendition] = (BytesIO(content), image.size[0], image.size[1], cropping_data)
+    return renditions
+
+
+def _get_renditions_sizes(img, rendition_config):
+    """Get sizes of renditions for image oriented according to exif.
+
+    :param img: opened image, it's not decoded
+    :param dict rendition_config: rendition config
+    :return: tuple of dicts rendition name -> (width, height) for resized renditions
+             and rendition name -> (width, height, cropping data) for cropped renditions
+    """
+    width, height = img.size
+    if _get_orientation(img) in (6, 8):
+        width, height = height, width
+
+    resizes = {}
+    crops = {}
+    for rendition, rsize in rendition_config.items():
+        # create the rendition (can be based on ratio or pixels)
+        if rsize.get('width') or rsize.get('height'):
+            resizes[rendition] = _get_resize_size(width, height, (rsize.get('width'), rsize.get('height')))
+        elif rsize.get('ratio'):
+            crops[rendition] = _get_crop_data(width, height, rsize.get('ratio'))
+    return resizes, crops
+
+
+def _get_stored_renditions(img, rendition_config, content_hashes, content_type):
+    """Get content addressed renditions stored already for the same original.
+
+    :param img: opened original image
+    :param dict rendition_config: rendition config
+    :param dict content_hashes: rendition name -> content hash
+    :param str content_type: renditions content type
+    :return: dict of rendition name -> (media id, width, height, cropping data), ``None`` if any is missing
+    """
+    resizes, crops = _get_renditions_sizes(img, rendition_config)
+    stored = {}
+    for rendition, content_hash in content_hashes.items():
+        if rendition in resizes:
+            width, height = resizes[rendition]
+            cropping_data = {}
+        elif rendition in crops:
+            width, height, cropping_data = crops[rendition]
+        else:
+            continue
+        _id = app.media.content_media_id(content_hash, content_type)
+        if not app.media.touch(_id):
+            return None
+        stored[rendition] = (_id, width, height, cropping_data)
+    return stored
+
+
+def _get_orientation(img):
+    """Get exif orientation of image if any."""
+    if not hasattr(img, '_getexif'):
+        return None
+    try:
+        exif = img._getexif()
+    except Exception:
+        return None
+    return exif.get(EXIF_ORIENTATION_TAG) if exif else None
+
+
+def _encode_image(image, ext, quality=None):
+    out = BytesIO()
+    if quality:
+        image.save(out, ext, quality=quality)
+    else:
+        image.save(out, ext)
+    return out.getvalue()
+
+
+_pool = None
+_pool_pid = None
+_pool_failed_pid = None
+
+
+def _get_pool(size):
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ProcessPoolExecutor(max_workers=size)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def _encode_images(jobs, pool_size=0):
+    """Encode list of ``(image, ext, quality)`` jobs, using process pool if ``pool_size`` > 1.
+
+    If process pool fails it's not used again in current process.
+    """
+    global _pool, _pool_failed_pid
+    if pool_size > 1 and len(jobs) > 1 and _pool_failed_pid != os.getpid():
+        try:
+            pool = _get_pool(pool_size)
+            return list(pool.map(_encode_image, *zip(*jobs)))
+        except Exception as ex:
+            # eg. daemonic processes are not allowed to have children, or pool is broken
+            logger.warning('failed to encode renditions using process pool, using sequential encoding error=%s', ex)
+            _pool_failed_pid = os.getpid()
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+    return [_encode_image(*job) for job in jobs]
+
+
 def can_generate_custom_crop_from_original(width, height, crop):
     """Checks whether custom crop can be generated or not
 
@@ -114,20 +294,14 @@ def delete_file_on_error(doc, file_id):
     app.media.delete(file_id)
 
 
-def _crop_image(content, format, ratio):
-    """Crop the image given as a binary stream
+def _get_crop_data(width, height, ratio):
+    """Get size and cropping data of centered crop with given ratio.
 
-    @param content: stream
-        The binary stream containing the image
-    @param format: str
-        The format of the resized image (e.g. png, jpg etc.)
-    @param ratio: string, int or float
-        Ratio to apply. '16:9', '1:1' etc...
-    @return: stream
-        Returns the resized image as a binary stream.
+    :param int width: image width
+    :param int height: image height
+    :param ratio: string, int or float ratio, eg. '16:9'
+    :return: tuple of width, height and cropping data
     """
-    img = Image.open(content)
-    width, height = img.size
     if type(ratio) not in [float, int]:
         ratio = ratio.split(':')
         ratio = int(ratio[0]) / int(ratio[1])
@@ -149,8 +323,7 @@ def _crop_image(content, format, ratio):
             'CropTop': 0,
             'CropBottom': new_height,
         }
-    crop, out = crop_image(content, file_name='crop.for.rendition', cropping_data=cropping_data, image_format=format)
-    return out, new_width, new_height, cropping_data
+    return new_width, new_height, cropping_data
 
 
 def to_int(x):
@@ -179,6 +352,22 @@ def _resize_image(content, size, format='png', keepProportions=True):
     assert isinstance(size, tuple)
     img = Image.open(content)
     width, height = img.size
+    new_width, new_height = _get_resize_size(width, height, size, keepProportions)
+    resized = img.resize((new_width, new_height), Image.ANTIALIAS)
+    out = BytesIO()
+    resized.save(out, format, quality=85)
+    out.seek(0)
+    return out, new_width, new_height
+
+
+def _get_resize_size(width, height, size, keepProportions=True):
+    """Get size of resized image.
+
+    :param int width: image width
+    :param int height: image height
+    :param tuple size: tuple of requested width, height, one can be ``None``
+    :param bool keepProportions: adjust requested size to keep image proportions
+    """
     new_width, new_height = [to_int(x) for x in size]
     if keepProportions:
         if new_width is None and new_height is None:
@@ -199,11 +388,7 @@ def _resize_image(content, size, format='png', keepProportions=True):
                 new_height = int(int(new_width) / original_ratio)
             else:
                 new_width = int(new_height * original_ratio)
-    resized = img.resize((new_width, new_height), Image.ANTIALIAS)
-    out = BytesIO()
-    resized.save(out, format, quality=85)
-    out.seek(0)
-    return out, new_width, new_height
+    return new_width, new_height
 
 
 def get_renditions_spec(without_internal_renditions=False, no_custom_crops=False):
@@ -332,6 +332,10 @@ metadata_schema = {
     'renditions': {
         'type': 'dict'
     },
+    # renditions are being generated asynchronously, see ``INGEST_ASYNC_RENDITIONS``
+    'renditions_pending': {
+        'type': 'boolean'
+    },
     'filemeta': {
         'type': 'dict'
     },
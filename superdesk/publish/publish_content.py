@@ -48,7 +48,7 @@ def publish():
     """Fetch items from publish queue as per the configuration, call the transmit function."""
     with ProfileManager('publish:transmit'):
         lock_name = get_lock_id("Transmit", "Articles")
-        if not lock(lock_name, expire=1810):
+        if not lock(lock_name, expire=1810, lease=True):
             logger.info('Task: {} is already running.'.format(lock_name))
             return
 
@@ -95,55 +95,56 @@ def transmit_subscriber_items(self, queue_items, subscriber):
     # Attempt to obtain a lock for transmissions to the subscriber
     lock_name = get_lock_id('Subscriber', 'Transmit', subscriber)
 
-    if not lock(lock_name, expire=610):
+    if not lock(lock_name, expire=610, lease=True):
         return
 
-    for queue_item in queue_items:
-        publish_queue_service = get_resource_service(PUBLISH_QUEUE)
-        log_msg = '_id: {_id}  item_id: {item_id}  state: {state} ' \
-                  'item_version: {item_version} headline: {headline}'.format(**queue_item)
-        try:
-            # check the status of the queue item
-            queue_item = publish_queue_service.find_one(req=None, _id=queue_item[config.ID_FIELD])
-            if queue_item.get('state') not in [QueueState.PENDING.value, QueueState.RETRYING.value]:
-                logger.info('Transmit State is not pending/retrying for queue item: {}. It is in {}'.
-                            format(queue_item.get(config.ID_FIELD), queue_item.get('state')))
-                continue
-
-            # update the status of the item to in-progress
-            queue_update = {'state': 'in-progress', 'transmit_started_at': utcnow()}
-            publish_queue_service.patch(queue_item.get(config.ID_FIELD), queue_update)
-            logger.info('Transmitting queue item {}'.format(log_msg))
-
-            destination = queue_item['destination']
-            transmitter = superdesk.publish.registered_transmitters[destination.get('delivery_type')]
-            transmitter.transmit(queue_item)
-            logger.info('Transmitted queue item {}'.format(log_msg))
-        except Exception as e:
-            logger.exception('Failed to transmit queue item {}'.format(log_msg))
-
-            max_retry_attempt = app.config.get('MAX_TRANSMIT_RETRY_ATTEMPT')
-            retry_attempt_delay = app.config.get('TRANSMIT_RETRY_ATTEMPT_DELAY_MINUTES')
+    try:
+        for queue_item in queue_items:
+            publish_queue_service = get_resource_service(PUBLISH_QUEUE)
+            log_msg = '_id: {_id}  item_id: {item_id}  state: {state} ' \
+                      'item_version: {item_version} headline: {headline}'.format(**queue_item)
             try:
-                orig_item = publish_queue_service.find_one(req=None, _id=queue_item['_id'])
-                updates = {config.LAST_UPDATED: utcnow()}
-
-                if orig_item.get('retry_attempt', 0) < max_retry_attempt and \
-                        not isinstance(e, PublishHTTPPushClientError):
-
-                    updates['retry_attempt'] = orig_item.get('retry_attempt', 0) + 1
-                    updates['state'] = QueueState.RETRYING.value
-                    updates['next_retry_attempt_at'] = utcnow() + timedelta(minutes=retry_attempt_delay)
-                else:
-                    # all retry attempts exhausted marking the item as failed.
-                    updates['state'] = QueueState.FAILED.value
-
-                publish_queue_service.system_update(orig_item.get(config.ID_FIELD), updates, orig_item)
-            except:
-                logger.error('Failed to set the state for failed publish queue item {}.'.format(queue_item['_id']))
-
-    # Release the lock for the subscriber
-    unlock(lock_name)
+                # check the status of the queue item
+                queue_item = publish_queue_service.find_one(req=None, _id=queue_item[config.ID_FIELD])
+                if queue_item.get('state') not in [QueueState.PENDING.value, QueueState.RETRYING.value]:
+                    logger.info('Transmit State is not pending/retrying for queue item: {}. It is in {}'.
+                                format(queue_item.get(config.ID_FIELD), queue_item.get('state')))
+                    continue
+
+                # update the status of the item to in-progress
+                queue_update = {'state': 'in-progress', 'transmit_started_at': utcnow()}
+                publish_queue_service.patch(queue_item.get(config.ID_FIELD), queue_update)
+                logger.info('Transmitting queue item {}'.format(log_msg))
+
+                destination = queue_item['destination']
+                transmitter = superdesk.publish.registered_transmitters[destination.get('delivery_type')]
+                transmitter.transmit(queue_item)
+                logger.info('Transmitted queue item {}'.format(log_msg))
+            except Exception as e:
+                logger.exception('Failed to transmit queue item {}'.format(log_msg))
+
+                max_retry_attempt = app.config.get('MAX_TRANSMIT_RETRY_ATTEMPT')
+                retry_attempt_delay = app.config.get('TRANSMIT_RETRY_ATTEMPT_DELAY_MINUTES')
+                try:
+                    orig_item = publish_queue_service.find_one(req=None, _id=queue_item['_id'])
+                    updates = {config.LAST_UPDATED: utcnow()}
+
+                    if orig_item.get('retry_attempt', 0) < max_retry_attempt and \
+                            not isinstance(e, PublishHTTPPushClientError):
+
+                        updates['retry_attempt'] = orig_item.get('retry_attempt', 0) + 1
+                        updates['state'] = QueueState.RETRYING.value
+                        updates['next_retry_attempt_at'] = utcnow() + timedelta(minutes=retry_attempt_delay)
+                    else:
+                        # all retry attempts exhausted marking the item as failed.
+                        updates['state'] = QueueState.FAILED.value
+
+                    publish_queue_service.system_update(orig_item.get(config.ID_FIELD), updates, orig_item)
+                except:
+                    logger.error('Failed to set the state for failed publish queue item {}.'.format(queue_item['_id']))
+    finally:
+        # Release the lock for the subscriber
+        unlock(lock_name)
 
 
 def transmit_items(queue_items):
@@ -0,0 +1,189 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""In-process index of products, global filters and subscribers used when enqueueing items.
+
+Products and global filters are loaded once instead of for every enqueued item,
+product and subscriber codes are parsed once and for every subscriber are indexed
+its existing products and their content filters.
+
+When a product or global filter is modified the index is updated in current process
+and other processes are notified via :class:`superdesk.generation_cache.GenerationCache`,
+which makes them reload the index. Subscriber entries are cached per ``_etag``,
+so changed subscriber is indexed again without notification.
+"""
+
+from eve.utils import config, ParsedRequest
+from superdesk import get_resource_service
+from superdesk.generation_cache import GenerationCache
+
+
+def get_codes(item):
+    """Get list of codes set on product or subscriber.
+
+    :param item: product or subscriber
+    """
+    if item.get('codes'):
+        return [c.strip() for c in item.get('codes').split(',') if c]
+    else:
+        return []
+
+
+class RoutingIndex(GenerationCache):
+    """Index of products, global filters and subscribers.
+
+    Returned values are shared, they must not be modified.
+    """
+
+    def __init__(self):
+        super().__init__('publish_routing')
+
+    def reset(self):
+        self._products = None
+        self._product_codes = {}
+        self._global_filters = None
+        self._subscribers = {}
+
+    def get_products(self):
+        """Get all products by id."""
+        self.check()
+        products = self._products
+        if products is None:
+            version = self.version
+            products = {product[config.ID_FIELD]: product for product in
+                        get_resource_service('products').get(req=None, lookup=None)}
+            with self._lock:
+                if self.is_current(version):
+                    self._products = products
+        return products
+
+    def get_product_codes(self, product_id):
+        """Get codes of product.
+
+        :param product_id: product id
+        """
+        codes = self._product_codes.get(product_id)
+        if codes is None:
+            version = self.version
+            product = self.get_products().get(product_id)
+            codes = get_codes(product) if product else []
+            with self._lock:
+                if self.is_current(version):
+                    self._product_codes[product_id] = codes
+        return codes
+
+    def get_global_filters(self):
+        """Get list of global content filters."""
+        self.check()
+        global_filters = self._global_filters
+        if global_filters is None:
+            version = self.version
+            req = ParsedRequest()
+            req.args = {'is_global': True}
+            global_filters = list(get_resource_service('content_filters').get(req=req, lookup=None))
+            with self._lock:
+                if self.is_current(version):
+                    self._global_filters = global_filters
+        return global_filters
+
+    def get_subscriber(self, subscriber):
+        """Get indexed subscriber.
+
+        Returns dict with ids of existing direct ``products`` and ``api_products``,
+        ids of content filters used by those products as ``filter_ids`` and ``codes``,
+        which are unique codes of subscriber and its direct products or ``None``
+        if subscriber has no existing direct product.
+
+        :param subscriber: subscriber
+        """
+        key = subscriber.get(config.ID_FIELD)
+        etag = subscriber.get(config.ETAG)
+        products = self.get_products()
+        cached = self._subscribers.get(key)
+        if cached is not None and etag is not None and cached[0] == etag:
+            return cached[1]
+        version = self.version
+        product_ids = [_id for _id in subscriber.get('products') or [] if _id in products]
+        api_product_ids = [_id for _id in subscriber.get('api_products') or [] if _id in products]
+        filter_ids = set()
+        for _id in product_ids + api_product_ids:
+            content_filter = products[_id].get('content_filter') or {}
+            if content_filter.get('filter_id') is not None:
+                filter_ids.add(content_filter['filter_id'])
+        codes = None
+        if product_ids:
+            codes = get_codes(subscriber)
+            for _id in product_ids:
+                codes.extend(self.get_product_codes(_id))
+            codes = list(set(codes))
+        indexed = {
+            'products': product_ids,
+            'api_products': api_product_ids,
+            'filter_ids': filter_ids,
+            'codes': codes,
+        }
+        if etag is not None:
+            with self._lock:
+                if self.is_current(version):
+                    self._subscribers[key] = (etag, indexed)
+        return indexed
+
+    def get_subscriber_codes(self, subscriber):
+        """Get unique codes of subscriber and its direct products.
+
+        Returns ``None`` if subscriber has no existing direct product.
+
+        :param subscriber: subscriber
+        """
+        return self.get_subscriber(subscriber)['codes']
+
+    def product_changed(self, _id):
+        """Update index after product was created, updated or deleted.
+
+        :param _id: product id
+        """
+        in_sync = self.notify()
+        with self._lock:
+            if not in_sync:
+                self.clear()
+                return
+            if self._products is not None:
+                products = dict(self._products)
+                product = get_resource_service('products').find_one(req=None, _id=_id)
+                if product is None:
+                    products.pop(_id, None)
+                else:
+                    products[_id] = product
+                self._products = products
+            self._product_codes.pop(_id, None)
+            self._subscribers = {}
+            self.version += 1
+
+    def subscriber_changed(self, _id):
+        """Remove subscriber entry after subscriber was updated or deleted.
+
+        :param _id: subscriber id
+        """
+        with self._lock:
+            self._subscribers.pop(_id, None)
+            self.version += 1
+
+    def global_filters_changed(self):
+        """Reload global filters after any content filter was created, updated or deleted."""
+        in_sync = self.notify()
+        with self._lock:
+            if in_sync:
+                self._global_filters = None
+                self.version += 1
+            else:
+                self.clear()
+
+
+routing_index = RoutingIndex()
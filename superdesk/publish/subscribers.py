@@ -20,6 +20,7 @@ from superdesk.resource import Resource, build_custom_hateoas
 from superdesk.services import BaseService
 from superdesk.errors import SuperdeskApiError
 from superdesk.publish import subscriber_types, SUBSCRIBER_TYPES  # NOQA
+from superdesk.publish.routing_index import routing_index
 from flask import current_app as app
 from superdesk.metadata.utils import ProductTypes
 
@@ -139,7 +140,11 @@ class SubscribersService(BaseService):
         subscriber.update(updates)
         self._validate_products_destinations(subscriber)
 
+    def on_updated(self, updates, original):
+        routing_index.subscriber_changed(original[config.ID_FIELD])
+
     def on_deleted(self, doc):
+        routing_index.subscriber_changed(doc[config.ID_FIELD])
         get_resource_service('sequences').delete(lookup={
             'key': 'ingest_providers_{_id}'.format(_id=doc[config.ID_FIELD])
         })
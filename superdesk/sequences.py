@@ -1,5 +1,7 @@
 import superdesk
+import threading
 import traceback
+from flask import current_app as app
 from superdesk import get_resource_service
 from .resource import Resource
 from .services import BaseService
@@ -35,6 +37,11 @@ class SequencesResource(Resource):
 
 class SequencesService(BaseService):
 
+    def __init__(self, datasource=None, backend=None):
+        super().__init__(datasource=datasource, backend=backend)
+        self._blocks = {}
+        self._blocks_lock = threading.Lock()
+
     def get_next_sequence_number(
         self,
         key_name,
@@ -53,6 +60,10 @@ class SequencesService(BaseService):
             logger.error('Empty sequence key is used: {}'.format('\n'.join(traceback.format_stack())))
             raise KeyError('Sequence key cannot be empty')
 
+        block_size = self._get_block_size(key_name)
+        if block_size > 1:
+            return self._get_from_block(key_name, block_size, max_seq_number, min_seq_number)
+
         target_resource = get_resource_service('sequences')
         sequence_number = target_resource.find_and_modify(
             query={'key': key_name},
@@ -65,9 +76,65 @@ class SequencesService(BaseService):
             if sequence_number > max_seq_number:
                 target_resource.find_and_modify(
                     query={'key': key_name},
-                    update={'sequence_number': min_seq_number},
+                    update={'$set': {'sequence_number': min_seq_number}},
                     upsert=True)
 
                 sequence_number = min_seq_number
 
         return sequence_number
+
+    def _get_block_size(self, key_name):
+        """Get block size for key from ``SEQUENCE_BLOCK_SIZES`` config.
+
+        Config keys are matched as key name prefixes.
+        """
+        for prefix, size in app.config.get('SEQUENCE_BLOCK_SIZES', {}).items():
+            if key_name.startswith(prefix):
+                return size
+        return 1
+
+    def _get_from_block(self, key_name, block_size, max_seq_number, min_seq_number):
+        """Get sequence number from block reserved by current process.
+
+        Numbers within block are contiguous, but numbers from different processes
+        are interleaved and unused numbers from a block are lost when process ends.
+        """
+        with self._blocks_lock:
+            block = self._blocks.get(key_name)
+            if block is None or block[0] > block[1]:
+                block = self._reserve_block(key_name, block_size, max_seq_number, min_seq_number)
+                self._blocks[key_name] = block
+            sequence_number = block[0]
+            block[0] += 1
+            return sequence_number
+
+    def _reserve_block(self, key_name, block_size, max_seq_number, min_seq_number):
+        """Reserve block of sequence numbers using single update.
+
+        If block reaches ``max_seq_number`` it's trimmed and the sequence is reset,
+        so the next block will start from ``min_seq_number``.
+
+        :returns: list with first and last number of the block
+        """
+        for _attempt in range(3):
+            last = self.find_and_modify(
+                query={'key': key_name},
+                update={'$inc': {'sequence_number': block_size}},
+                upsert=True,
+                new=True
+            ).get('sequence_number')
+            first = last - block_size + 1
+
+            if not max_seq_number or last < max_seq_number:
+                return [first, last]
+
+            # reset only if nobody did it meanwhile
+            self.find_and_modify(
+                query={'key': key_name, 'sequence_number': {'$gte': max_seq_number}},
+                update={'$set': {'sequence_number': min_seq_number - 1}}
+            )
+
+            if first <= max_seq_number:
+                return [first, max_seq_number]
+
+        raise RuntimeError('Could not reserve sequence block for key {}'.format(key_name))
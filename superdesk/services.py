@@ -8,16 +8,74 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import copy
 import logging
-from flask import current_app as app
+from flask import g, current_app as app
 from eve.defaults import resolve_default_values
 from eve.utils import ParsedRequest, config
 from eve.methods.common import resolve_document_etag
+from superdesk.stats import stats
 
 
 log = logging.getLogger(__name__)
 
 
+class IdentityMap():
+    """Cache of documents fetched by ``_id`` within single request or celery task.
+
+    It's stored in app context and shared by all services, documents are stored per collection
+    and invalidated by :class:`superdesk.eve_backend.EveBackend` on every write to that collection.
+    Within collection documents are stored per resource, as resources using the same collection
+    can have different datasource filter or projection.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection, resource, _id):
+        doc = self.docs.get(collection, {}).get(str(_id), {}).get(resource)
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(doc)
+
+    def set(self, collection, resource, _id, doc):
+        self.docs.setdefault(collection, {}).setdefault(str(_id), {})[resource] = copy.deepcopy(doc)
+
+    def invalidate(self, collection, _id=None):
+        if _id is None:
+            self.docs.pop(collection, None)
+        else:
+            self.docs.get(collection, {}).pop(str(_id), None)
+
+
+def get_identity_map(create=True):
+    """Get identity map for current app context.
+
+    :param create: create new one if there is none yet
+    """
+    identity_map = getattr(g, '_identity_map', None)
+    if identity_map is None and create:
+        identity_map = IdentityMap()
+        g._identity_map = identity_map
+    return identity_map
+
+
+def report_identity_map(exception=None):
+    """Report identity map hits and misses for current app context.
+
+    It's registered as app context teardown handler.
+    """
+    identity_map = get_identity_map(create=False)
+    if identity_map is not None and (identity_map.hits or identity_map.misses):
+        log.debug('identity map hits=%d misses=%d', identity_map.hits, identity_map.misses)
+        stats.incr('identity_map.hits', identity_map.hits)
+        stats.incr('identity_map.misses', identity_map.misses)
+
+
 class BaseService():
     """
     Base service for all endpoints, defines the basic implementation for CRUD datalayer functionality.
@@ -78,7 +136,14 @@ class BaseService():
         return res
 
     def find_one(self, req, **lookup):
+        use_identity_map = req is None and list(lookup.keys()) == [config.ID_FIELD] and self._use_identity_map()
+        if use_identity_map:
+            res = get_identity_map().get(self._collection, self.datasource, lookup[config.ID_FIELD])
+            if res is not None:
+                return res
         res = self.backend.find_one(self.datasource, req=req, **lookup)
+        if use_identity_map and res is not None:
+            get_identity_map().set(self._collection, self.datasource, lookup[config.ID_FIELD], res)
         return res
 
     def find(self, where, **kwargs):
@@ -159,6 +224,17 @@ class BaseService():
         """
         return self.backend.search(self.datasource, source)
 
+    def _use_identity_map(self):
+        """Test if ``find_one`` by ``_id`` should use identity map.
+
+        It's enabled for resources listed in ``IDENTITY_MAP_RESOURCES`` config.
+        """
+        return self.datasource in app.config.get('IDENTITY_MAP_RESOURCES', [])
+
+    @property
+    def _collection(self):
+        return app.data.datasource(self.datasource)[0]
+
     def remove_from_search(self, _id):
         """Remove item from search by its id.
 
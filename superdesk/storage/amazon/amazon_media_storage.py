@@ -13,8 +13,10 @@
 from io import BytesIO
 import json
 import logging
+import re
 from mimetypes import guess_extension
-from superdesk.media.media_operations import download_file_from_url
+from superdesk.media.media_operations import download_file_from_url, get_content_hash
+from superdesk.storage.desk_media_storage import is_recently_used
 import time
 
 import boto3
@@ -26,6 +28,9 @@ from os.path import splitext
 
 logger = logging.getLogger(__name__)
 MAX_KEYS = 1000
+#: key prefix of content addressed files, other keys can be hash based too (see ``get_file_name``)
+CONTENT_ADDRESSED_PREFIX = 'sha256/'
+CONTENT_ADDRESSED_KEY = re.compile(r'(^|/)%s[0-9a-f]{64}(\.\w+)?$' % CONTENT_ADDRESSED_PREFIX)
 
 
 class AmazonObjectWrapper(BytesIO):
@@ -131,10 +136,7 @@ class AmazonMediaStorage(MediaStorage):
         if not file_extension:
             extension = str(_guess_extension(content_type)) if content_type else ''
 
-        subfolder = ''
-        env_subfolder = self.app.config.get('AMAZON_S3_SUBFOLDER', 'false')
-        if env_subfolder and env_subfolder.lower() != 'false':
-            subfolder = '%s/' % env_subfolder.strip('/')
+        subfolder = self._get_subfolder()
 
         if version is True:
             # automatic version is set on 15mins granularity.
@@ -147,6 +149,24 @@ class AmazonMediaStorage(MediaStorage):
 
         return '%s%s%s%s' % (subfolder, version, filename, extension)
 
+    def content_media_id(self, content_hash, content_type=None):
+        """Get the ``media_id`` for content with given hash, used when ``MEDIA_CONTENT_ADDRESSED`` is on.
+
+        It's the same for all uploads of the content, there is no version. It uses
+        :data:`CONTENT_ADDRESSED_PREFIX` so it can be distinguished from other keys.
+
+        :param content_hash: sha256 hex digest of content
+        :param content_type: mime type
+        """
+        extension = str(_guess_extension(content_type)) if content_type else ''
+        return '%s%s%s%s' % (self._get_subfolder(), CONTENT_ADDRESSED_PREFIX, content_hash, extension)
+
+    def _get_subfolder(self):
+        env_subfolder = self.app.config.get('AMAZON_S3_SUBFOLDER', 'false')
+        if env_subfolder and env_subfolder.lower() != 'false':
+            return '%s/' % env_subfolder.strip('/')
+        return ''
+
     def fetch_rendition(self, rendition):
         stream, name, mime = download_file_from_url(rendition.get('href'))
         return stream
@@ -213,7 +233,8 @@ class AmazonMediaStorage(MediaStorage):
                         logger.exception(ex)
         return headers
 
-    def put(self, content, filename=None, content_type=None, resource=None, metadata=None, _id=None, version=True):
+    def put(self, content, filename=None, content_type=None, resource=None, metadata=None, _id=None, version=True,
+            content_hash=None, **kwargs):
         """Save a new file using the storage system, preferably with the name specified.
 
         If there already exists a file with this name name, the
@@ -221,13 +242,20 @@ class AmazonMediaStorage(MediaStorage):
         name. Depending on the storage system, a unique id or the actual name
         of the stored file will be returned. The content type argument is used
         to appropriately identify the file when it is retrieved.
+
+        With ``MEDIA_CONTENT_ADDRESSED`` content without ``_id`` is stored using key
+        derived from its hash, so if such file exists already it's not uploaded again.
         """
         # XXX: we don't use metadata here as Amazon S3 as a limit of 2048 bytes (keys + values)
         #      and they are anyway stored in MongoDB (and still part of the file). See issue SD-4231
         logger.debug('Going to save file file=%s media=%s ' % (filename, _id))
+        if not _id and (content_hash or self.app.config.get('MEDIA_CONTENT_ADDRESSED')):
+            _id = self.content_media_id(content_hash or get_content_hash(content), content_type)
         _id = _id or self.media_id(filename, content_type=content_type, version=version)
         found = self._check_exists(_id)
         if found:
+            if self._is_content_addressed(_id):
+                self.touch(_id)
             return _id
 
         try:
@@ -238,8 +266,32 @@ class AmazonMediaStorage(MediaStorage):
             logger.exception(ex)
             raise
 
+    def touch(self, id_or_filename, resource=None):
+        """Refresh last modified time of file, so it's not removed by :meth:`remove_unreferenced_files`.
+
+        :return: ``True`` if file exists
+        """
+        id_or_filename = str(id_or_filename)
+        try:
+            obj = self.client.head_object(Key=id_or_filename, Bucket=self.container_name)
+        except Exception:
+            return False
+        self.client.copy_object(Key=id_or_filename, Bucket=self.container_name,
+                                CopySource={'Bucket': self.container_name, 'Key': id_or_filename},
+                                MetadataDirective='REPLACE', ContentType=obj['ContentType'],
+                                Metadata=obj.get('Metadata', {}), **self.kwargs)
+        return True
+
     def delete(self, id_or_filename, resource=None):
+        """Delete file unless it's content addressed.
+
+        Content addressed file can be shared by multiple items,
+        so it's only removed by :meth:`remove_unreferenced_files` once not referenced.
+        """
         id_or_filename = str(id_or_filename)
+        if self._is_content_addressed(id_or_filename):
+            logger.debug('Keeping content addressed file %s' % id_or_filename)
+            return
         del_res = self.client.delete_object(Key=id_or_filename, Bucket=self.container_name)
         logger.debug('Amazon S3 file deleted %s with status' % id_or_filename, del_res)
 
@@ -271,10 +323,33 @@ class AmazonMediaStorage(MediaStorage):
             # File not found
             return False
 
+    def _is_content_addressed(self, key):
+        """Test if key is content addressed.
+
+        Keys are recognized by :data:`CONTENT_ADDRESSED_PREFIX`, so files stored while
+        ``MEDIA_CONTENT_ADDRESSED`` was on are still kept when it's turned off.
+        """
+        return bool(CONTENT_ADDRESSED_KEY.search(key))
+
+    def _is_recently_used(self, key):
+        """Test if content addressed file was uploaded or reused within grace period."""
+        if not self._is_content_addressed(key):
+            return False
+        try:
+            obj = self.client.head_object(Key=key, Bucket=self.container_name)
+        except Exception:
+            return False
+        grace_minutes = self.app.config.get('MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES', 60)
+        return is_recently_used([obj['LastModified']], grace_minutes)
+
     def remove_unreferenced_files(self, existing_files):
-        """Get the files from S3 and compare against existing and delete the orphans."""
+        """Get the files from S3 and compare against existing and delete the orphans.
+
+        Content addressed files uploaded or reused within ``MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES``
+        are kept, those could be referenced by items saved after existing files were collected.
+        """
         bucket_files = self.get_all_keys()
-        orphan_files = list(set(bucket_files) - existing_files)
+        orphan_files = [key for key in set(bucket_files) - existing_files if not self._is_recently_used(key)]
         print('There are {} orphan files...'.format(len(orphan_files)))
 
         if len(orphan_files) > 0:
@@ -12,12 +12,37 @@ import logging
 import json
 import bson
 import gridfs
+from datetime import timedelta
 from eve.io.mongo.media import GridFSMediaStorage
+from superdesk.utc import utcnow, utc
 from superdesk.utils import sha
+from superdesk.media.media_operations import get_content_hash
 
 
 logger = logging.getLogger(__name__)
 
+#: files doc field with content hash, set for content addressed files
+CONTENT_HASH = 'content_hash'
+
+
+def is_recently_used(dates, grace_minutes):
+    """Test if any of given dates is within grace period.
+
+    Used to keep content addressed files which could be reused after references were collected.
+
+    :param dates: list of datetimes, ``None`` values are ignored
+    :param grace_minutes: grace period in minutes
+    """
+    since = utcnow() - timedelta(minutes=grace_minutes)
+    for date in dates:
+        if date is None:
+            continue
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=utc)
+        if date > since:
+            return True
+    return False
+
 
 class SuperdeskGridFSMediaStorage(GridFSMediaStorage):
 
@@ -46,6 +71,14 @@ class SuperdeskGridFSMediaStorage(GridFSMediaStorage):
         except bson.errors.InvalidId:
             return bson.ObjectId(sha(str(filename))[:24])
 
+    def content_media_id(self, content_hash, content_type=None):
+        """Get media id for content with given hash, used when ``MEDIA_CONTENT_ADDRESSED`` is on.
+
+        :param content_hash: sha256 hex digest of content
+        :param content_type: mime type
+        """
+        return bson.ObjectId(content_hash[:24])
+
     def url_for_media(self, media_id, content_type=None):
         """Return url for given media id.
 
@@ -71,14 +104,55 @@ class SuperdeskGridFSMediaStorage(GridFSMediaStorage):
         :param content_type: mime type
         :param metadata: file metadata
         :param resource: type of resource
+        :param content_hash: hash identifying content, makes file content addressed
+
+        With ``MEDIA_CONTENT_ADDRESSED`` content without ``_id`` is stored using id derived
+        from its hash, so if such file exists already it's not stored again and its id is returned.
         """
+        content_hash = kwargs.pop(CONTENT_HASH, None)
+        if content_hash is None and '_id' not in kwargs and self.app.config.get('MEDIA_CONTENT_ADDRESSED'):
+            content_hash = get_content_hash(content)
         if '_id' in kwargs:
             kwargs['_id'] = bson.ObjectId(kwargs['_id'])
+        elif content_hash:
+            kwargs['_id'] = self.content_media_id(content_hash, content_type)
+        if content_hash:
+            if self.touch(kwargs['_id'], resource):
+                logger.debug('Reusing content addressed file id=%s' % kwargs['_id'])
+                return kwargs['_id']
+            kwargs[CONTENT_HASH] = content_hash
         try:
             return self.fs(resource).put(content, content_type=content_type,
                                          filename=filename, metadata=metadata, **kwargs)
         except gridfs.errors.FileExists:
             logger.info('File exists filename=%s id=%s' % (filename, kwargs['_id']))
+            if kwargs.get(CONTENT_HASH):
+                return kwargs['_id']
+
+    def touch(self, _id, resource=None):
+        """Mark file as used now, so it's not removed by :meth:`remove_unreferenced_files` in grace period.
+
+        :param _id: file id
+        :param resource: type of resource
+        :return: ``True`` if file exists
+        """
+        result = self._files(resource).update_one({'_id': bson.ObjectId(_id)}, {'$set': {'last_used': utcnow()}})
+        return result.matched_count > 0
+
+    def delete(self, _id, resource=None):
+        """Delete file unless it's content addressed.
+
+        Content addressed file can be shared by multiple items,
+        so it's only removed by :meth:`remove_unreferenced_files` once not referenced.
+        """
+        try:
+            _id = bson.ObjectId(_id)
+        except bson.errors.InvalidId:
+            pass
+        if self.fs(resource).exists({'_id': _id, CONTENT_HASH: {'$exists': True}}):
+            logger.debug('Keeping content addressed file id=%s' % _id)
+            return
+        super().delete(_id, resource)
 
     def fs(self, resource):
         resource = resource or 'upload'
@@ -88,10 +162,29 @@ class SuperdeskGridFSMediaStorage(GridFSMediaStorage):
             self._fs[px] = gridfs.GridFS(driver.pymongo(prefix=px).db)
         return self._fs[px]
 
+    def _files(self, resource):
+        resource = resource or 'upload'
+        driver = self.app.data.mongo
+        px = driver.current_mongo_prefix(resource)
+        return driver.pymongo(prefix=px).db['fs.files']
+
     def remove_unreferenced_files(self, existing_files):
-        """Get the files from Grid FS and compare agains existing files and delete the orphans."""
+        """Get the files from Grid FS and compare agains existing files and delete the orphans.
+
+        Content addressed files uploaded or reused within ``MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES``
+        are kept, those could be referenced by items saved after existing files were collected.
+        """
+        grace_minutes = self.app.config.get('MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES', 60)
         current_files = self.fs('upload').find({'_id': {'$nin': list(existing_files)}})
-        for file_id in (file._id for file in current_files if str(file._id) not in existing_files):
-            print('Removing unused file: ', file_id)
-            self.delete(file_id)
+        for file in current_files:
+            if str(file._id) in existing_files:
+                continue
+            if getattr(file, CONTENT_HASH, None):
+                if is_recently_used([file.upload_date, getattr(file, 'last_used', None)], grace_minutes):
+                    continue
+                print('Removing unused content addressed file: ', file._id)
+                self.fs('upload').delete(file._id)
+                continue
+            print('Removing unused file: ', file._id)
+            self.delete(file._id)
         print('Image cleaning completed successfully.')
@@ -19,8 +19,11 @@ from unittest.mock import patch
 from flask import json, Config
 
 from apps.ldap import ADAuth
+from apps.content_filters.content_filter.content_filter_cache import content_filter_cache
 from superdesk import get_resource_service
 from superdesk.factory import get_app
+from superdesk.publish.routing_index import routing_index
+from superdesk.vocabularies.cache import vocabulary_cache
 
 logger = logging.getLogger(__name__)
 test_user = {
@@ -161,6 +164,9 @@ def setup_config(config):
 def clean_dbs(app, force=False):
     clean_es(app, force)
     drop_mongo(app)
+    vocabulary_cache.clear()
+    content_filter_cache.clear()
+    routing_index.clear()
 
 
 def retry(exc, count=1):
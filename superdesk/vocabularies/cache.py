@@ -0,0 +1,108 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""In-process cache of vocabularies used for ingest enrichment.
+
+Vocabularies are loaded once and turned into lookup dicts, so enrichment of ingested
+items doesn't have to read vocabulary from mongo and scan its items for every story.
+
+The cache is invalidated when :class:`VocabulariesService` sends its update notification,
+see :mod:`superdesk.generation_cache`.
+"""
+
+import superdesk
+
+from superdesk.generation_cache import GenerationCache
+
+
+def _build_categories(vocabulary):
+    """Map lowercased qcode to active category."""
+    return {item['qcode'].lower(): item for item in vocabulary.get('items', [])
+            if item.get('is_active') is True and item.get('qcode')}
+
+
+def _build_category_map(vocabulary):
+    """Map subject qcode to list of ``(position, category)`` for active map entries."""
+    subjects = {}
+    for position, entry in enumerate(vocabulary.get('items', [])):
+        if entry.get('is_active') and entry.get('qcode'):
+            subjects.setdefault(entry['qcode'], []).append((position, entry.get('category')))
+    return subjects
+
+
+BUILDERS = {
+    'categories': _build_categories,
+    'iptc_category_map': _build_category_map,
+}
+
+
+class VocabularyCache(GenerationCache):
+    """Cache of precomputed vocabulary lookups.
+
+    Lookups are built using :data:`BUILDERS`, ``None`` is cached when vocabulary is missing.
+    """
+
+    def __init__(self):
+        super().__init__('vocabularies')
+
+    def reset(self):
+        self._entries = {}
+
+    def get(self, _id):
+        """Get precomputed lookup for given vocabulary.
+
+        :param _id: vocabulary id
+        """
+        self.check()
+        if _id in self._entries:
+            return self._entries[_id]
+
+        version = self.version
+        vocabulary = superdesk.get_resource_service('vocabularies').find_one(req=None, _id=_id)
+        value = BUILDERS[_id](vocabulary) if vocabulary else None
+        with self._lock:
+            if self.is_current(version):
+                self._entries[_id] = value
+        return value
+
+
+vocabulary_cache = VocabularyCache()
+
+
+def invalidate_vocabulary_cache():
+    """Invalidate vocabulary cache in current process and notify other processes."""
+    vocabulary_cache.invalidate()
+
+
+def get_active_categories():
+    """Get active anpa categories by lowercased qcode.
+
+    Returns ``None`` if there is no ``categories`` vocabulary.
+    """
+    return vocabulary_cache.get('categories')
+
+
+def get_categories_for_subjects(subjects):
+    """Get unique anpa category qcodes mapped to given subjects via ``iptc_category_map``.
+
+    Categories are returned in the order of vocabulary entries, ``None`` is returned
+    if there is no ``iptc_category_map`` vocabulary.
+
+    :param subjects: list of subject qcodes
+    """
+    subject_map = vocabulary_cache.get('iptc_category_map')
+    if subject_map is None:
+        return None
+    mapped = sorted(mapping for qcode in set(subjects) for mapping in subject_map.get(qcode, []))
+    categories = []
+    for _position, category in mapped:
+        if category not in categories:
+            categories.append(category)
+    return categories
@@ -23,6 +23,7 @@ from superdesk.services import BaseService
 from superdesk.users import get_user_from_request
 from superdesk.utc import utcnow
 from superdesk.errors import SuperdeskApiError
+from superdesk.vocabularies.cache import invalidate_vocabulary_cache
 
 logger = logging.getLogger(__name__)
 
@@ -118,6 +119,12 @@ class VocabulariesService(BaseService):
         self._filter_inactive_vocabularies(doc)
         self._cast_items(doc)
 
+    def on_created(self, docs):
+        invalidate_vocabulary_cache()
+
+    def on_deleted(self, doc):
+        invalidate_vocabulary_cache()
+
     def on_update(self, updates, original):
         """Checks the duplicates if a unique field is defined"""
         unique_field = original.get('unique_field')
@@ -181,6 +188,7 @@ class VocabulariesService(BaseService):
         """
         Sends notification about the updated vocabulary to all the connected clients.
         """
+        invalidate_vocabulary_cache()
 
         user = get_user_from_request()
         push_notification('vocabularies:updated', vocabulary=updated_vocabulary.get('display_name'),
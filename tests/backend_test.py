@@ -10,8 +10,11 @@
 
 from superdesk.tests import TestCase
 from superdesk import get_backend
+from eve.utils import ParsedRequest
 from superdesk.utc import utcnow
 from datetime import timedelta
+from unittest.mock import patch
+from superdesk.index_queue import IndexQueueError, get_index_queue
 
 
 class BackendTestCase(TestCase):
@@ -55,3 +58,95 @@ class BackendTestCase(TestCase):
             date1 = doc_old[self.app.config['DATE_CREATED']]
             date2 = doc_new[self.app.config['DATE_CREATED']]
             self.assertEqual(date1, date2)
+
+    def test_write_behind_indexing(self):
+        backend = get_backend()
+        with patch.dict(self.app.config, {'ELASTIC_WRITE_BEHIND': ['ingest']}), self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}])
+            self.assertIsNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
+            doc = backend.find_one('ingest', None, _id=ids[0])
+            backend.update('ingest', ids[0], {'name': 'bar'}, doc)
+            self.assertIsNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
+            self.assertEqual(1, backend.flush())
+            self.assertEqual('bar', self.app.data.elastic.find_one('ingest', None, _id=ids[0])['name'])
+            self.assertEqual(0, backend.flush())
+
+    def test_write_behind_flush_on_teardown(self):
+        backend = get_backend()
+        with patch.dict(self.app.config, {'ELASTIC_WRITE_BEHIND': True}), self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}])
+        with self.app.app_context():
+            self.assertIsNotNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
+
+    def test_write_behind_retries_failed_docs(self):
+        backend = get_backend()
+        elastic = self.app.data.elastic
+        config = {'ELASTIC_WRITE_BEHIND': ['ingest'], 'ELASTIC_WRITE_BEHIND_RETRIES': 1}
+        with patch.dict(self.app.config, config), self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}])
+            with patch.object(elastic, 'bulk_insert', side_effect=[Exception('timeout'), (1, [])]) as bulk_insert:
+                self.assertEqual(1, backend.flush())
+                self.assertEqual(2, bulk_insert.call_count)
+
+            with patch.object(elastic, 'bulk_insert', side_effect=Exception('timeout')):
+                backend.update('ingest', ids[0], {'name': 'bar'}, backend.find_one('ingest', None, _id=ids[0]))
+                with self.assertRaises(IndexQueueError):
+                    backend.flush()
+            self.assertTrue(get_index_queue().is_pending('ingest', ids[0]), 'failed doc is queued again')
+            self.assertEqual(1, backend.flush())
+            self.assertEqual('bar', elastic.find_one('ingest', None, _id=ids[0])['name'])
+
+    def test_delete_in_chunks(self):
+        backend = get_backend()
+        with patch.dict(self.app.config, {'DELETE_CHUNK_SIZE': 2}), self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'} for i in range(5)])
+            backend.create('ingest', [{'name': 'bar'}])
+            self.app.data.elastic.remove('ingest', {'_id': str(ids[0])})  # missing in elastic should not fail
+            self.assertEqual(5, backend.delete('ingest', {'name': 'foo'}))
+            for _id in ids:
+                self.assertIsNone(backend.find_one('ingest', None, _id=_id))
+            self.assertEqual(1, backend.find('ingest', {'name': 'bar'}).count())
+            self.assertEqual(0, backend.delete('ingest', {'name': 'foo'}))
+
+    def test_get_if_modified_since_using_change_marker(self):
+        backend = get_backend()
+        with patch.dict(self.app.config, {'CHANGE_MARKERS': ['ingest']}), self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}])
+            elastic_find = patch.object(self.app.data.elastic, 'find', wraps=self.app.data.elastic.find)
+            mongo_find = patch.object(self.app.data.mongo, 'find', wraps=self.app.data.mongo.find)
+            with elastic_find as elastic, mongo_find as mongo:
+                req = ParsedRequest()
+                req.if_modified_since = utcnow() + timedelta(seconds=10)
+                self.assertEqual(0, backend.get('ingest', req, {}).count())
+                elastic.assert_not_called()
+                mongo.assert_not_called()
+
+                req = ParsedRequest()
+                req.if_modified_since = utcnow() - timedelta(seconds=10)
+                self.assertEqual(1, backend.get('ingest', req, {}).count())
+                self.assertEqual(1, elastic.call_count + mongo.call_count)
+
+                req.if_modified_since = utcnow() + timedelta(seconds=10)
+                backend.delete('ingest', {'_id': ids[0]})
+                self.assertEqual(0, backend.get('ingest', req, {}).count())
+
+    def test_find_one_consistency(self):
+        backend = get_backend()
+        with self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}])
+            self.app.data.elastic.remove('ingest', {'_id': str(ids[0])})
+            self.assertIsNone(backend.find_one('ingest', None, consistency='search', _id=ids[0]))
+            self.assertIsNotNone(backend.find_one('ingest', None, consistency='primary', _id=ids[0]))
+            self.assertIsNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
+            self.assertIsNotNone(backend.find_one('ingest', None, consistency='reconcile', _id=ids[0]))
+            self.assertIsNotNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
+
+    def test_reconcile_search(self):
+        from superdesk.commands.reconcile_search import reconcile_resource
+        backend = get_backend()
+        with self.app.app_context():
+            ids = backend.create('ingest', [{'name': 'foo'}, {'name': 'bar'}])
+            self.app.data.elastic.remove('ingest', {'_id': str(ids[0])})
+            result = reconcile_resource('ingest', 10)
+            self.assertEqual({'checked': 2, 'missing': 1, 'stale': 0}, result)
+            self.assertIsNotNone(self.app.data.elastic.find_one('ingest', None, _id=ids[0]))
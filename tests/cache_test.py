@@ -1,8 +1,9 @@
 
 import random
-from time import sleep
+from time import sleep, time
+from unittest.mock import patch
 
-from superdesk.cache import cache
+from superdesk.cache import cache, LocalCache, SuperdeskCacheBackend, SuperdeskMangler
 from superdesk.tests import TestCase
 from bson import ObjectId
 
@@ -60,3 +61,97 @@ class CacheTestCase(TestCase):
 
         users = get_users()
         self.assertEqual(users, get_users())
+
+    def test_cache_uses_fetch(self):
+        calls = []
+
+        @cache(ttl=5)
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        with patch.object(cache.backend, 'fetch', wraps=cache.backend.fetch) as fetch:
+            self.assertEqual(1, compute())
+            self.assertEqual(1, compute())
+            self.assertEqual(2, fetch.call_count)
+        self.assertEqual(1, len(calls))
+
+
+class LocalCacheTestCase(TestCase):
+
+    def test_lru(self):
+        local = LocalCache(size=2, ttl=10)
+        local.set('foo', {'foo': 1})
+        local.set('bar', 2)
+        self.assertEqual({'foo': 1}, local.get('foo'))
+        local.set('baz', 3)
+        self.assertIsNone(local.get('bar'), 'least recently used')
+        self.assertEqual(3, local.get('baz'))
+        self.assertEqual(2, len(local))
+
+    def test_copy(self):
+        local = LocalCache(size=2, ttl=10)
+        local.set('foo', {'foo': 1})
+        local.get('foo')['foo'] = 2
+        self.assertEqual({'foo': 1}, local.get('foo'))
+
+    def test_ttl(self):
+        local = LocalCache(size=2, ttl=10)
+        local.set('foo', 1, ttl=1)
+        sleep(1.1)
+        self.assertIsNone(local.get('foo'))
+
+    def test_evict(self):
+        local = LocalCache(size=2, ttl=10)
+        local.set('foo', 1)
+        local.set('bar', 1)
+        local.evict(['foo'])
+        self.assertIsNone(local.get('foo'))
+        local.clear()
+        self.assertEqual(0, len(local))
+
+    def test_skip_set_after_evict(self):
+        local = LocalCache(size=2, ttl=10)
+        version = local.version
+        local.evict(['foo'])
+        local.set('foo', 1, version=version)
+        self.assertIsNone(local.get('foo'), 'value read before eviction')
+        local.set('foo', 2, version=local.version)
+        self.assertEqual(2, local.get('foo'))
+
+
+class CacheBackendTestCase(TestCase):
+
+    def setUp(self):
+        self.backend = SuperdeskCacheBackend(SuperdeskMangler())
+        self.backend.clean()
+
+    def test_load_save_many(self):
+        self.backend.save_many({'foo': 1, 'bar': {'x': 2}}, ttl=5)
+        self.assertEqual({'foo': 1, 'bar': {'x': 2}}, self.backend.load_many(['foo', 'bar', 'baz']))
+        self.assertEqual({}, self.backend.load_many([]))
+
+    def test_fetch(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(1, self.backend.fetch('foo', compute, ttl=5, beta=0))
+        self.assertEqual(1, self.backend.fetch('foo', compute, ttl=5, beta=0))
+        self.assertEqual(1, len(calls))
+
+    def test_fetch_refresh_early(self):
+        self.backend.save('foo', {'value': 1, 'delta': 100, 'expiry': time() + 1}, ttl=5)
+        self.assertEqual(2, self.backend.fetch('foo', lambda: 2, ttl=5, beta=10))
+
+    def test_fetch_serves_stale_while_locked(self):
+        self.backend.save('foo', {'value': 1, 'delta': 0, 'expiry': time() - 1}, ttl=5)
+        lock = self.backend.lock('foo')
+        lock.acquire()
+        try:
+            self.assertEqual(1, self.backend.fetch('foo', lambda: 2, ttl=5))
+        finally:
+            lock.release()
+        self.assertEqual(2, self.backend.fetch('foo', lambda: 2, ttl=5))
@@ -1,5 +1,6 @@
 
 from unittest.mock import patch
+from superdesk import get_resource_service
 from superdesk.tests import TestCase
 from apps.publish.enqueue.enqueue_service import EnqueueService
 
@@ -31,3 +32,38 @@ class NoTakesEnqueueTestCase(TestCase):
             with patch.dict('apps.publish.enqueue.enqueue_service.app.config', {'NO_TAKES': True}):
                 self.service.resend(doc, subscribers)
             resend.assert_called_with(doc, subscribers, subscriber_codes)
+
+    def test_subscriber_codes_use_routing_index(self):
+        subscribers = [s for s in self.app.data.find_all('subscribers')]
+        subscriber_id = subscribers[0]['_id']
+        self.assertEqual({subscriber_id: []}, self.service._get_subscriber_codes(subscribers))
+
+        with patch.object(get_resource_service('products'), 'get') as get:
+            self.service._get_subscriber_codes(subscribers)
+            get.assert_not_called()
+
+        get_resource_service('products').patch(self.product_ids[0], {'codes': 'foo, bar'})
+        codes = self.service._get_subscriber_codes(subscribers)
+        self.assertEqual(['bar', 'foo'], sorted(codes[subscriber_id]))
+
+    def test_subscriber_filters_use_routing_index(self):
+        filter_id = self.app.data.insert('content_filters', [{'name': 'foo', 'content_filter': []}])[0]
+        get_resource_service('products').patch(self.product_ids[0], {'content_filter': {'filter_id': filter_id}})
+        subscribers = [s for s in self.app.data.find_all('subscribers')]
+        with patch.object(get_resource_service('content_filters'), 'match_all', return_value=set()) as match_all:
+            self.service._get_matching_filters({}, subscribers, [])
+            match_all.assert_called_once_with({}, {filter_id})
+
+    def test_routing_index_skips_products_loaded_before_invalidate(self):
+        from superdesk.publish.routing_index import routing_index
+        service = get_resource_service('products')
+        get = service.get
+
+        def get_and_invalidate(**kwargs):
+            products = list(get(**kwargs))
+            routing_index.invalidate()  # changed in other thread meanwhile
+            return products
+
+        with patch.object(service, 'get', side_effect=get_and_invalidate):
+            self.assertIn(self.product_ids[0], routing_index.get_products())
+        self.assertIsNone(routing_index._products)
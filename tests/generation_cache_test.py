@@ -0,0 +1,69 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest.mock import MagicMock, patch
+from superdesk.generation_cache import GenerationCache
+from superdesk.tests import TestCase
+
+
+class FooCache(GenerationCache):
+
+    def reset(self):
+        self.data = {}
+
+
+class GenerationCacheTestCase(TestCase):
+
+    def test_check_once_per_app_context(self):
+        cache = FooCache('foo')
+        redis = MagicMock()
+        redis.get.return_value = b'1'
+        with patch.object(self.app, 'redis', redis, create=True):
+            with self.app.app_context():
+                cache.check()
+                cache.data['foo'] = 1
+                cache.check()
+                self.assertEqual(1, redis.get.call_count)
+                self.assertEqual({'foo': 1}, cache.data)
+
+            redis.get.return_value = b'2'  # changed in other process
+            with self.app.app_context():
+                cache.check()
+                self.assertEqual({}, cache.data)
+
+    def test_invalidate(self):
+        cache = FooCache('foo')
+        redis = MagicMock()
+        redis.get.return_value = b'1'
+        redis.incr.return_value = 2
+        with patch.object(self.app, 'redis', redis, create=True), self.app.app_context():
+            cache.check()
+            cache.data['foo'] = 1
+            cache.invalidate()
+            self.assertEqual({}, cache.data)
+            redis.incr.assert_called_once_with('foo:generation')
+
+    def test_notify_in_sync(self):
+        cache = FooCache('foo')
+        redis = MagicMock()
+        redis.get.return_value = b'1'
+        with patch.object(self.app, 'redis', redis, create=True), self.app.app_context():
+            cache.check()
+            redis.incr.return_value = 2
+            self.assertTrue(cache.notify())
+            redis.incr.return_value = 4  # other process changed it meanwhile
+            self.assertFalse(cache.notify())
+
+    def test_version_changed_by_clear(self):
+        cache = FooCache('foo')
+        version = cache.version
+        self.assertTrue(cache.is_current(version))
+        cache.clear()
+        self.assertFalse(cache.is_current(version), 'data loaded before clear must not be stored')
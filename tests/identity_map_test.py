@@ -0,0 +1,64 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from unittest.mock import patch
+from superdesk import get_resource_service
+from superdesk.services import get_identity_map
+from superdesk.tests import TestCase
+
+
+class IdentityMapTestCase(TestCase):
+
+    def test_find_one_uses_identity_map(self):
+        service = get_resource_service('ingest')
+        with patch.dict(self.app.config, {'IDENTITY_MAP_RESOURCES': ['ingest']}), self.app.app_context():
+            ids = service.post([{'name': 'foo'}])
+            item = service.find_one(req=None, _id=ids[0])
+            item['name'] = 'changed'
+            self.assertEqual('foo', service.find_one(req=None, _id=ids[0])['name'])
+            self.assertEqual(1, get_identity_map().hits)
+            self.assertEqual(1, get_identity_map().misses)
+
+            service.patch(ids[0], {'name': 'bar'})
+            self.assertEqual('bar', service.find_one(req=None, _id=ids[0])['name'])
+
+    def test_find_one_without_identity_map(self):
+        service = get_resource_service('ingest')
+        with self.app.app_context():
+            ids = service.post([{'name': 'foo'}])
+            service.find_one(req=None, _id=ids[0])
+            service.find_one(req=None, _id=ids[0])
+            self.assertIsNone(get_identity_map(create=False))
+
+    def test_backend_writes_invalidate_identity_map(self):
+        service = get_resource_service('ingest')
+        with patch.dict(self.app.config, {'IDENTITY_MAP_RESOURCES': ['ingest']}), self.app.app_context():
+            ids = service.post([{'name': 'foo'}])
+            original = service.find_one(req=None, _id=ids[0])
+            service.backend.update_in_mongo('ingest', ids[0], {'name': 'bar'}, original)
+            self.assertEqual('bar', service.find_one(req=None, _id=ids[0])['name'])
+
+            service.backend.find_and_modify('ingest', query={'_id': ids[0]}, update={'$set': {'name': 'baz'}})
+            self.assertEqual('baz', service.find_one(req=None, _id=ids[0])['name'])
+
+            service.backend.delete('ingest', {'_id': ids[0]})
+            self.assertIsNone(service.find_one(req=None, _id=ids[0]))
+
+    def test_identity_map_per_resource(self):
+        ids = self.app.data.insert('users', [{'username': 'foo', 'user_preferences': {}}])
+        resources = {'IDENTITY_MAP_RESOURCES': ['users', 'preferences']}
+        with patch.dict(self.app.config, resources), self.app.app_context():
+            preferences = get_resource_service('preferences').find_one(req=None, _id=ids[0])
+            self.assertNotIn('username', preferences)
+            user = get_resource_service('users').find_one(req=None, _id=ids[0])
+            self.assertEqual('foo', user['username'])
+
+            get_resource_service('users').backend.system_update('users', ids[0], {'username': 'bar'}, user)
+            self.assertIsNone(get_identity_map().get('users', 'preferences', ids[0]), 'invalidated for collection')
@@ -12,14 +12,21 @@
 import os
 import unittest
 
+from io import BytesIO
+from copy import deepcopy
+from lxml import etree
 from xml.etree import ElementTree
 from superdesk.io.feed_parsers.newsml_2_0 import NewsMLTwoFeedParser
 
 
+def get_fixture_path(filename):
+    dirname = os.path.dirname(os.path.realpath(__file__))
+    return os.path.normpath(os.path.join(dirname, '../fixtures', filename))
+
+
 class BaseNewMLTwoTestCase(unittest.TestCase):
     def setUp(self):
-        dirname = os.path.dirname(os.path.realpath(__file__))
-        fixture = os.path.normpath(os.path.join(dirname, '../fixtures', self.filename))
+        fixture = get_fixture_path(self.filename)
         provider = {'name': 'Test'}
         with open(fixture, 'rb') as f:
             parser = NewsMLTwoFeedParser()
@@ -47,3 +54,27 @@ class ResutersResultsTestCase(BaseNewMLTwoTestCase):
     def test_results(self):
         self.assertTrue(self.item[0].get('body_html').startswith(
             '<p>Jan 30 (Gracenote) - Results and standings from the Turkish championship matches on Monday <br/>'))
+
+
+class ParseIterTestCase(unittest.TestCase):
+
+    def test_parse_iter(self):
+        fixture = get_fixture_path('tag:reuters.com,0000:newsml_L4N1FL0N0:1132689232')
+        with open(fixture, 'rb') as f:
+            items = list(NewsMLTwoFeedParser().parse_iter(f, {'name': 'Test'}))
+        with open(fixture, 'rb') as f:
+            self.assertEqual(NewsMLTwoFeedParser().parse(etree.parse(f).getroot()), items)
+
+    def test_parse_iter_multiple_items(self):
+        with open(get_fixture_path('tag:reuters.com,0000:newsml_L4N1FL0N0:1132689232'), 'rb') as f:
+            xml = etree.parse(f).getroot()
+        item_set = xml.find('{http://iptc.org/std/nar/2006-10-01/}itemSet')
+        for version in range(2, 4):
+            item = deepcopy(item_set[0])
+            item.set('version', str(version))
+            item_set.append(item)
+
+        items = list(NewsMLTwoFeedParser().parse_iter(BytesIO(etree.tostring(xml)), {'name': 'Test'}))
+        self.assertEqual(3, len(items))
+        self.assertEqual(['1', '2', '3'], [item['version'] for item in items])
+        self.assertEqual(NewsMLTwoFeedParser().parse(xml), items)
@@ -19,7 +19,7 @@ from superdesk.io.feed_parsers.scoop_newsml_2_0 import ScoopNewsMLTwoFeedParser
 class ScoopTestCase(unittest.TestCase):
     def setUp(self):
         dirname = os.path.dirname(os.path.realpath(__file__))
-        fixture = os.path.normpath(os.path.join(dirname, '../fixtures', self.filename))
+        self.fixture = fixture = os.path.normpath(os.path.join(dirname, '../fixtures', self.filename))
         provider = {'name': 'Test'}
         with open(fixture, 'rb') as f:
             parser = ScoopNewsMLTwoFeedParser()
@@ -42,3 +42,7 @@ class AAPTestCase(ScoopTestCase):
 
     def test_can_parse(self):
         self.assertTrue(ScoopNewsMLTwoFeedParser().can_parse(self.xml.getroot()))
+
+    def test_parse_iter(self):
+        with open(self.fixture, 'rb') as f:
+            self.assertEqual(self.item, list(ScoopNewsMLTwoFeedParser().parse_iter(f, {'name': 'Test'})))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from unittest import mock
+from superdesk.tests import TestCase
+from superdesk.errors import ParserError
+from superdesk.io.feeding_services.file_service import FileFeedingService
+from superdesk.io.feeding_services.file_watcher import DirectoryWatcher
+
+
+class DirectoryWatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='test_superdesk_')
+        self.addCleanup(shutil.rmtree, self.path)
+        self.changed = threading.Event()
+        self.watcher = DirectoryWatcher(self.path, on_change=self.changed.set, max_queued=3)
+        self.addCleanup(self.watcher.close)
+
+    def write(self, filename, path=None):
+        with open(os.path.join(path or self.path, filename), 'w') as f:
+            f.write(filename)
+
+    def wait_for_files(self, count):
+        for i in range(100):
+            if len(self.watcher._files) >= count:
+                return
+            time.sleep(0.02)
+
+    def test_pop_files(self):
+        self.assertIsNone(self.watcher.pop_files(), 'should scan after start')
+        self.assertEqual([], self.watcher.pop_files())
+
+        self.write('a.xml')
+        self.assertTrue(self.changed.wait(2))
+        os.mkdir(os.path.join(self.path, '_PROCESSED'))
+        self.write('c.xml', os.path.join(self.path, '_PROCESSED'))
+        os.rename(os.path.join(self.path, '_PROCESSED', 'c.xml'), os.path.join(self.path, 'b.xml'))
+        self.write('a.xml')
+        self.wait_for_files(2)
+        self.assertEqual(['b.xml', 'a.xml'], self.watcher.pop_files())
+        self.assertEqual([], self.watcher.pop_files())
+
+    def test_pop_files_rescan(self):
+        self.assertIsNone(self.watcher.pop_files(rescan_after=60))
+        self.assertEqual([], self.watcher.pop_files(rescan_after=60))
+        self.watcher._scanned -= 61
+        self.assertIsNone(self.watcher.pop_files(rescan_after=60))
+
+    def test_pop_files_scan_when_queue_is_full(self):
+        self.watcher.pop_files()
+        for i in range(4):
+            self.write('%d.xml' % i)
+        self.assertTrue(self.changed.wait(2))
+        time.sleep(0.1)
+        self.assertIsNone(self.watcher.pop_files())
+
+    def test_requeue_files(self):
+        self.watcher.pop_files()
+        self.write('c.xml')
+        self.wait_for_files(1)
+        self.watcher.requeue_files(['a.xml', 'b.xml'])
+        self.assertEqual(['a.xml', 'b.xml', 'c.xml'], self.watcher.pop_files())
+
+
+class FileServiceWatchTestCase(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='test_superdesk_')
+        self.addCleanup(shutil.rmtree, self.path)
+        for filename in ('a.txt', 'b.txt', 'c.txt'):
+            with open(os.path.join(self.path, filename), 'w') as f:
+                f.write(filename)
+
+    def test_requeue_files_on_error(self):
+        service = FileFeedingService()
+        provider = {'name': 'foo', 'feed_parser': 'dpa_iptc7901', 'config': {'path': self.path}}
+        watcher = mock.Mock()
+        watcher.pop_files.return_value = ['a.txt', 'b.txt', 'c.txt']
+        parser = mock.Mock()
+        parser.parse.side_effect = [{'guid': 'a'}, Exception('parse error')]
+        with mock.patch.dict(self.app.config, {'FILE_INGEST_WATCH': True}), \
+                mock.patch('superdesk.io.feeding_services.file_service.get_watcher', return_value=watcher), \
+                mock.patch.object(service, 'get_feed_parser', return_value=parser):
+            updates = service._update(provider, {})
+            self.assertEqual([{'guid': 'a'}], next(updates))
+            with self.assertRaises(ParserError):
+                next(updates)
+        watcher.requeue_files.assert_called_once_with(['b.txt', 'c.txt'])
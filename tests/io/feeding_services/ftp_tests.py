@@ -13,8 +13,17 @@ import glob
 import os
 import shutil
 import tempfile
+import threading
 import unittest
 
+from bson import ObjectId
+from datetime import timedelta
+from unittest.mock import patch
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import FTPServer
+from superdesk import get_resource_service
+from superdesk.tests import TestCase
 from superdesk.io.feeding_services.ftp import FTPFeedingService
 from superdesk.utc import utcnow
 
@@ -36,11 +45,11 @@ class FTPTestCase(unittest.TestCase):
         config['dest_path'] = tempfile.mkdtemp(prefix=PREFIX)
         provider = {'config': config}
 
-        items = service._update(provider, {})
+        items = list(service._update(provider, {}))
         self.assertEqual(266, len(items))
 
         provider['last_updated'] = utcnow()
-        self.assertEqual(0, len(service._update(provider, {})))
+        self.assertEqual(0, len(list(service._update(provider, {}))))
 
         self.assertTrue(os.path.isdir(provider['config']['dest_path']))
         self.assertEqual(266, len(os.listdir(provider['config']['dest_path'])))
@@ -48,3 +57,90 @@ class FTPTestCase(unittest.TestCase):
     def tearDown(self):
         for folder in glob.glob('/tmp/%s*' % (PREFIX)):
             shutil.rmtree(folder)
+
+
+class FTPIndexedUpdateTestCase(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix=PREFIX)
+        self.addCleanup(shutil.rmtree, self.root)
+
+        authorizer = DummyAuthorizer()
+        authorizer.add_anonymous(self.root, perm='elr')
+
+        class Handler(FTPHandler):
+            pass
+
+        Handler.authorizer = authorizer
+        self.server = FTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'timeout': 0.01, 'handle_exit': False})
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.close_all)
+
+        self.service = FTPFeedingService()
+        self.provider = {
+            '_id': ObjectId(),
+            'name': 'ftp',
+            'feed_parser': 'nitf',
+            'config': {'host': '127.0.0.1', 'port': self.server.address[1]},
+        }
+
+        p = patch.dict(self.app.config, {'FTP_INGEST_CONNECTIONS': 2})
+        p.start()
+        self.addCleanup(p.stop)
+
+    def get_index(self):
+        return get_resource_service('ingest_provider_files').get_index(self.provider['_id'])
+
+    def add_file(self, filename, fixture):
+        fixtures = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'fixtures')
+        shutil.copyfile(os.path.join(fixtures, fixture), os.path.join(self.root, filename))
+
+    def test_update_fetches_only_new_files(self):
+        self.add_file('a.xml', 'nitf-fishing.xml')
+        self.add_file('b.xml', 'nitf-fishing.xml')
+        self.add_file('c.xml', 'ap-nitf.xml')
+        self.add_file('d.txt', 'ap-nitf.xml')
+
+        batches = list(self.service._update(self.provider, {}))
+        self.assertEqual(3, len(batches))
+        self.assertEqual({}, self.get_index(), 'index is saved only after update')
+        self.service.after_update(self.provider, {})
+        self.assertEqual(['a.xml', 'b.xml', 'c.xml'], sorted(self.get_index()))
+
+        self.assertEqual([], list(self.service._update(self.provider, {})))
+        self.service.after_update(self.provider, {})
+
+        self.add_file('a.xml', 'ap-nitf.xml')
+        self.add_file('e.xml', 'nitf-fishing.xml')
+        os.remove(os.path.join(self.root, 'b.xml'))
+        batches = list(self.service._update(self.provider, {}))
+        self.assertEqual(2, len(batches))
+        self.service.after_update(self.provider, {})
+        self.assertEqual(['a.xml', 'c.xml', 'e.xml'], sorted(self.get_index()))
+
+    def test_first_update_skips_files_before_last_updated(self):
+        self.add_file('a.xml', 'nitf-fishing.xml')
+        self.provider['last_updated'] = utcnow() + timedelta(minutes=5)
+
+        self.assertEqual([], list(self.service._update(self.provider, {})))
+        self.service.after_update(self.provider, {})
+        self.assertEqual(['a.xml'], list(self.get_index()))
+
+    def test_first_update_fetches_files_without_modify(self):
+        self.add_file('a.xml', 'nitf-fishing.xml')
+        self.provider['last_updated'] = utcnow() + timedelta(minutes=5)
+        with patch.object(self.service, '_list_files', return_value=[('a.xml', 1, None)]):
+            self.assertEqual(1, len(list(self.service._update(self.provider, {}))))
+
+    def test_update_downloads_all_files_before_parsing(self):
+        self.add_file('a.xml', 'nitf-fishing.xml')
+        self.add_file('b.xml', 'ap-nitf.xml')
+        self.provider['config']['dest_path'] = tempfile.mkdtemp(prefix=PREFIX)
+        self.addCleanup(shutil.rmtree, self.provider['config']['dest_path'])
+        with patch.dict(self.app.config, {'FTP_INGEST_CONNECTIONS': 0}):
+            batches = self.service._update(self.provider, {})
+            next(batches)
+            self.assertEqual(['a.xml', 'b.xml'], sorted(os.listdir(self.provider['config']['dest_path'])))
+            self.assertEqual(1, len(list(batches)))
@@ -283,7 +283,7 @@ class UpdateMethodTestCase(RssIngestServiceTest):
         self.assertCountEqual(items, expected_items)
 
 
-@mock.patch('superdesk.io.feeding_services.rss.requests.get', requests_get)
+@mock.patch('superdesk.io.feeding_services.rss.session.get', requests_get)
 @mock.patch('superdesk.io.feeding_services.rss.IngestApiError', FakeIngestApiError)
 class FetchDataMethodTestCase(RssIngestServiceTest):
     """Tests for the _fetch_data() method."""
@@ -386,6 +386,54 @@ class FetchDataMethodTestCase(RssIngestServiceTest):
         self.assertEqual(ex.orig_ex.args[0], 'server down')
         self.assertIs(ex.provider, self.fake_provider)
 
+    def test_stores_validators_of_fetched_feed(self):
+        requests_get.return_value = MagicMock(
+            ok=True, status_code=200, content='<rss>X</rss>',
+            headers={'ETag': '"abc"', 'Last-Modified': 'Mon, 06 Feb 2017 10:51:00 GMT'})
+        config = dict(url='http://news.com/rss')
+        update = {}
+
+        response = self.instance._fetch_data(config, {'private': {'foo': 1}}, update)
+
+        self.assertEqual(response, '<rss>X</rss>')
+        self.assertEqual({}, requests_get.call_args[1]['headers'])
+        self.assertEqual({'foo': 1, 'rss_validators': {
+            'url': 'http://news.com/rss',
+            'etag': '"abc"',
+            'last_modified': 'Mon, 06 Feb 2017 10:51:00 GMT',
+        }}, update['private'])
+
+    def test_returns_none_if_not_modified(self):
+        requests_get.return_value = MagicMock(ok=False, status_code=304)
+        config = dict(url='http://news.com/rss')
+        provider = {'private': {'rss_validators': {
+            'url': 'http://news.com/rss',
+            'etag': '"abc"',
+            'last_modified': 'Mon, 06 Feb 2017 10:51:00 GMT',
+        }}}
+        update = {}
+
+        response = self.instance._fetch_data(config, provider, update)
+
+        self.assertIsNone(response)
+        self.assertEqual({}, update)
+        self.assertEqual({
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Mon, 06 Feb 2017 10:51:00 GMT',
+        }, requests_get.call_args[1]['headers'])
+
+    def test_ignores_validators_of_other_url(self):
+        requests_get.return_value = MagicMock(ok=True, status_code=200, content='<rss>X</rss>', headers={})
+        config = dict(url='http://news.com/rss')
+        provider = {'private': {'rss_validators': {'url': 'http://news.com/old', 'etag': '"abc"'}}}
+        update = {}
+
+        self.instance._fetch_data(config, provider, update)
+
+        self.assertEqual({}, requests_get.call_args[1]['headers'])
+        self.assertEqual({'url': 'http://news.com/rss', 'etag': None, 'last_modified': None},
+                         update['private']['rss_validators'])
+
 
 class ExtractImageLinksMethodTestCase(RssIngestServiceTest):
     """Tests for the _extract_image_links() method."""
@@ -673,7 +721,7 @@ class CreateItemMethodTestCase(RssIngestServiceTest):
 
     def test_guid_not_permalink(self):
         provider = {'config': {'url': 'http://example.com/rss'}}
-        with mock.patch('superdesk.io.feeding_services.rss.requests.get', return_value=RssResponse()):
+        with mock.patch('superdesk.io.feeding_services.rss.session.get', return_value=RssResponse()):
             items = self.instance._update(provider, None)[0]
         self.assertEqual(1, len(items))
         self.assertEqual('https://www.nrk.no/finnmark/stanset-ikke-for-fotgjenger-1.13362571', items[0]['uri'])
@@ -0,0 +1,99 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import time
+import threading
+
+from superdesk.tests import TestCase
+from superdesk.io.ingest_pipeline import IngestPipeline
+
+
+class IngestPipelineTestCase(TestCase):
+
+    def test_ingest_all_batches(self):
+        batches = [[{'guid': 'a'}, {'guid': 'b'}], [{'guid': 'c'}], []]
+        ingested = []
+        lock = threading.Lock()
+
+        def ingest(items):
+            with lock:
+                ingested.extend(item['guid'] for item in items)
+
+        total = IngestPipeline(2, 1).run(iter(batches), ingest)
+        self.assertEqual(3, total)
+        self.assertEqual(['a', 'b', 'c'], sorted(ingested))
+
+    def test_same_guid_is_ingested_in_order(self):
+        batches = [[{'guid': 'a', 'version': 1}], [{'guid': 'a', 'version': 2}], [{'guid': 'b', 'version': 1}]]
+        ingested = []
+
+        def ingest(items):
+            if items[0]['version'] == 1:
+                time.sleep(0.1)
+            ingested.append((items[0]['guid'], items[0]['version']))
+
+        IngestPipeline(3, 3).run(iter(batches), ingest)
+        self.assertLess(ingested.index(('a', 1)), ingested.index(('a', 2)))
+
+    def test_fetch_waits_when_queue_is_full(self):
+        fetched = []
+
+        def batches():
+            for i in range(5):
+                fetched.append(i)
+                yield [{'guid': str(i)}]
+
+        release = threading.Event()
+        max_ahead = []
+
+        def ingest(items):
+            release.wait(1)
+            max_ahead.append(len(fetched) - int(items[0]['guid']))
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        IngestPipeline(1, 1).run(batches(), ingest)
+        self.assertEqual(5, len(fetched))
+        # one ingesting, one waiting for worker, one in queue and one waiting to be put there
+        self.assertLessEqual(max(max_ahead), 4)
+
+    def test_fetch_error_is_raised(self):
+        def batches():
+            yield [{'guid': 'a'}]
+            raise ValueError('fetch failed')
+
+        ingested = []
+        with self.assertRaises(ValueError):
+            IngestPipeline(1, 1).run(batches(), ingested.extend)
+        self.assertEqual(1, len(ingested))
+
+    def test_ingest_error_is_raised(self):
+        def ingest(items):
+            raise ValueError('ingest failed')
+
+        with self.assertRaises(ValueError):
+            IngestPipeline(1, 1).run(iter([[{'guid': 'a'}]]), ingest)
+
+    def test_fetch_is_stopped_on_error(self):
+        closed = threading.Event()
+
+        def batches():
+            try:
+                while True:
+                    yield [{'guid': 'a'}]
+            finally:
+                closed.set()
+
+        def ingest(items):
+            raise ValueError('ingest failed')
+
+        with self.assertRaises(ValueError):
+            IngestPipeline(1, 1).run(batches(), ingest)
+        self.assertTrue(closed.is_set())
@@ -11,6 +11,8 @@
 import os
 import unittest
 
+from io import BytesIO
+from copy import deepcopy
 from datetime import timedelta
 from superdesk.utc import utcnow
 from superdesk.etree import etree, get_word_count, get_char_count
@@ -60,6 +62,19 @@ class UtilsTest(unittest.TestCase):
         self.assertIsInstance(FileFeedingService().get_feed_parser({'feed_parser': 'newsml12'}, etree),
                               NewsMLOneFeedParser)
 
+    def test_newsml12_parse_iter(self):
+        xml = get_etree('afp.xml')
+        item = deepcopy(xml.find('NewsItem'))
+        item.find('Identification/NewsIdentifier/PublicIdentifier').text = 'urn:newsml:afp.com:second'
+        xml.append(item)
+
+        provider = {'name': 'Test'}
+        items = list(NewsMLOneFeedParser().parse_iter(BytesIO(etree.tostring(xml)), provider))
+        self.assertEqual(2, len(items))
+        self.assertEqual(NewsMLOneFeedParser().parse(xml, provider), items[0])
+        self.assertEqual('urn:newsml:afp.com:second', items[1]['guid'])
+        self.assertEqual(items[0]['headline'], items[1]['headline'])
+
     def test_is_old_content(self):
         service = FileFeedingService()
         self.assertFalse(service.is_old_content(utcnow()))
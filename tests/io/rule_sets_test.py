@@ -0,0 +1,57 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import unittest
+
+from superdesk.io.rule_sets import CompiledRuleSet, get_compiled_rule_set, clear_compiled_rule_set
+
+
+def apply_sequentially(rules, text):
+    for rule in rules:
+        text = text.replace(rule['old'], rule['new'])
+    return text
+
+
+class CompiledRuleSetTestCase(unittest.TestCase):
+
+    def assertSameAsSequential(self, rules, text):
+        self.assertEqual(apply_sequentially(rules, text), CompiledRuleSet(rules).apply(text))
+
+    def test_independent_rules_single_pass(self):
+        rules = [{'old': '@@', 'new': '&'}, {'old': 'x', 'new': 'y'}, {'old': 'foo', 'new': 'bar'}]
+        compiled = CompiledRuleSet(rules)
+        self.assertEqual(1, len(compiled.groups))
+        self.assertEqual('&bar y&', compiled.apply('@@foo x@@'))
+
+    def test_chained_rules(self):
+        rules = [{'old': 'a', 'new': 'b'}, {'old': 'b', 'new': 'c'}]
+        self.assertEqual(2, len(CompiledRuleSet(rules).groups))
+        self.assertSameAsSequential(rules, 'ab')
+
+    def test_overlapping_rules(self):
+        rules = [{'old': 'bc', 'new': 'X'}, {'old': 'ab', 'new': 'Y'}, {'old': 'abc', 'new': 'Z'}]
+        self.assertSameAsSequential(rules, 'abcabc')
+
+    def test_match_created_by_removal(self):
+        rules = [{'old': '<br>', 'new': ''}, {'old': 'ab', 'new': 'X'}]
+        self.assertSameAsSequential(rules, 'a<br>b')
+
+    def test_none_and_empty(self):
+        self.assertEqual('a', CompiledRuleSet([{'old': 'b', 'new': None}]).apply('ab'))
+        self.assertSameAsSequential([{'old': '', 'new': '-'}, {'old': 'a', 'new': 'b'}], 'aa')
+
+    def test_cached_per_etag(self):
+        rule_set = {'_id': 'rules', '_etag': '1', 'rules': [{'old': 'a', 'new': 'b'}]}
+        compiled = get_compiled_rule_set(rule_set)
+        self.assertIs(compiled, get_compiled_rule_set(rule_set))
+        updated = dict(rule_set, _etag='2', rules=[{'old': 'a', 'new': 'c'}])
+        self.assertEqual('c', get_compiled_rule_set(updated).apply('a'))
+        clear_compiled_rule_set('rules')
+        self.assertIsNot(compiled, get_compiled_rule_set(rule_set))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from time import sleep
+from unittest.mock import patch
+from superdesk.lock import lock, unlock, get_lease
+from superdesk.tests import TestCase
+
+
+class LockTestCase(TestCase):
+
+    def test_lock_unlock(self):
+        self.assertTrue(lock('foo', host='a', expire=10))
+        self.assertFalse(lock('foo', host='b', expire=10))
+        unlock('foo', host='a')
+        self.assertTrue(lock('foo', host='b', expire=10))
+        unlock('foo', host='b')
+
+    def test_fencing_token(self):
+        self.assertTrue(lock('foo', host='a', expire=10, lease=True))
+        token = get_lease('foo', host='a').token
+        unlock('foo', host='a')
+        self.assertIsNone(get_lease('foo', host='a'))
+        self.assertTrue(lock('foo', host='b', expire=10, lease=True))
+        self.assertGreater(get_lease('foo', host='b').token, token)
+        unlock('foo', host='b')
+
+    def test_no_lease_by_default(self):
+        with patch('superdesk.lock.SuperdeskMongoLock.fence') as fence:
+            self.assertTrue(lock('foo', host='a', expire=10))
+            self.assertIsNone(get_lease('foo', host='a'))
+            unlock('foo', host='a')
+            fence.assert_not_called()
+
+    def test_lease_heartbeat(self):
+        for backend in ('mongo', 'redis'):
+            with patch.dict(self.app.config, {'LOCK_LEASE': 1, 'LOCK_BACKEND': backend}):
+                self.assertTrue(lock('foo', host='a', expire=60, lease=True))
+                sleep(2)
+                self.assertFalse(lock('foo', host='b', expire=60), 'renewed by heartbeat')
+                self.assertFalse(get_lease('foo', host='a').lost)
+                unlock('foo', host='a')
+                self.assertTrue(lock('foo', host='b', expire=60))
+                unlock('foo', host='b')
+
+    def test_lease_heartbeat_stops_after_expire(self):
+        with patch.dict(self.app.config, {'LOCK_LEASE': 1}):
+            self.assertTrue(lock('foo', host='a', expire=2, lease=True))
+            sleep(3)
+            self.assertTrue(lock('foo', host='b', expire=60), 'not renewed after expire')
+            unlock('foo', host='b')
+            unlock('foo', host='a')
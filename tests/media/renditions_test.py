@@ -0,0 +1,71 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from io import BytesIO
+from unittest import TestCase, mock
+from PIL import Image, JpegImagePlugin
+from . import get_picture_fixture
+from superdesk.media.renditions import render_renditions, _resize_image, _encode_images
+
+
+class RenderRenditionsTestCase(TestCase):
+
+    config = {
+        'thumbnail': {'width': 120, 'height': 120},
+        'viewImage': {'width': 200},
+        'baseImage': {'width': 320, 'height': 320},
+        'square': {'ratio': '1:1'},
+    }
+
+    def get_original(self):
+        with open(get_picture_fixture(), 'rb') as f:
+            return BytesIO(f.read())
+
+    def test_render_renditions(self):
+        original = self.get_original()
+        renditions = render_renditions(original, self.config, 'jpeg')
+        self.assertEqual(set(self.config.keys()), set(renditions.keys()))
+
+        for name in ('thumbnail', 'viewImage', 'baseImage'):
+            size = (self.config[name].get('width'), self.config[name].get('height'))
+            _resized, width, height = _resize_image(self.get_original(), size, 'jpeg')
+            content, rend_width, rend_height, cropping_data = renditions[name]
+            self.assertEqual((width, height), (rend_width, rend_height), name)
+            self.assertEqual((width, height), Image.open(content).size, name)
+            self.assertEqual({}, cropping_data)
+
+        content, width, height, cropping_data = renditions['square']
+        self.assertEqual((300, 300), (width, height))
+        self.assertEqual({'CropLeft': 50, 'CropRight': 350, 'CropTop': 0, 'CropBottom': 300}, cropping_data)
+        self.assertEqual('JPEG', Image.open(content).format)
+
+    def test_render_renditions_uses_draft_without_crops(self):
+        config = {'thumbnail': {'width': 100, 'height': 100}}
+        jpeg = JpegImagePlugin.JpegImageFile
+        with mock.patch.object(jpeg, 'draft', autospec=True, side_effect=jpeg.draft) as draft:
+            renditions = render_renditions(self.get_original(), config, 'jpeg')
+        self.assertEqual(1, draft.call_count)
+        self.assertEqual((100, 75), renditions['thumbnail'][1:3])
+
+    def test_render_renditions_oriented(self):
+        config = {'thumbnail': {'width': 150}}
+        with mock.patch('superdesk.media.renditions._get_orientation', return_value=6):
+            renditions = render_renditions(self.get_original(), config, 'jpeg')
+        # original is 400x300, rotated it's 300x400
+        self.assertEqual((150, 200), renditions['thumbnail'][1:3])
+        self.assertEqual((150, 200), Image.open(renditions['thumbnail'][0]).size)
+
+    def test_encode_images_pool_failure(self):
+        jobs = [(Image.new('RGB', (10, 10)), 'jpeg', 80), (Image.new('RGB', (20, 20)), 'jpeg', 80)]
+        with mock.patch('superdesk.media.renditions._pool_failed_pid', None), \
+                mock.patch('superdesk.media.renditions._get_pool', side_effect=OSError('no pool')) as get_pool:
+            self.assertEqual(2, len(_encode_images(jobs, pool_size=2)))
+            self.assertEqual(2, len(_encode_images(jobs, pool_size=2)))
+        self.assertEqual(1, get_pool.call_count, 'pool not used after failure')
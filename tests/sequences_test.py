@@ -12,6 +12,7 @@
 from superdesk import get_resource_service
 from superdesk.tests import TestCase
 from nose.tools import assert_raises
+from unittest.mock import patch
 
 
 class SequencesTestCase(TestCase):
@@ -55,3 +56,19 @@ class SequencesTestCase(TestCase):
                 min_seq_number=self.min_seq_number
             )
             self.assertEqual(last_sequence_number, self.min_seq_number)
+
+    def test_block_sequence_number(self):
+        with self.app.app_context():
+            with patch.dict(self.app.config, {'SEQUENCE_BLOCK_SIZES': {'test_block': 3}}):
+                numbers = [self.service.get_next_sequence_number('test_block_1') for i in range(5)]
+                self.assertEqual([1, 2, 3, 4, 5], numbers)
+                self.assertEqual(6, self.service.find_one(req=None, key='test_block_1')['sequence_number'])
+
+    def test_block_rotate_sequence_number(self):
+        with self.app.app_context():
+            with patch.dict(self.app.config, {'SEQUENCE_BLOCK_SIZES': {'test_block': 4}}):
+                numbers = [self.service.get_next_sequence_number('test_block_2',
+                                                                 max_seq_number=self.max_seq_number,
+                                                                 min_seq_number=self.min_seq_number)
+                           for i in range(12)]
+                self.assertEqual([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 1, 2], numbers)
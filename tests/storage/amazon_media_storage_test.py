@@ -1,5 +1,5 @@
 import time
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 
 from superdesk.tests import TestCase
 from superdesk.storage.amazon.amazon_media_storage import AmazonMediaStorage
@@ -35,6 +35,28 @@ class AmazonMediaStorageTestCase(TestCase):
             media_id = self.amazon.media_id(filename)
             self.assertEqual('%s/%s/%s' % (sub, time_id, filename), media_id)
 
+    def test_content_media_id(self):
+        content_hash = 'a' * 64
+        self.assertEqual('sha256/' + content_hash + '.jpg', self.amazon.content_media_id(content_hash, 'image/jpeg'))
+
+        with patch.dict(self.app.config, {'AMAZON_S3_SUBFOLDER': 'test-sub'}):
+            self.assertEqual('test-sub/sha256/' + content_hash, self.amazon.content_media_id(content_hash))
+
+    def test_delete_keeps_content_addressed(self):
+        self.amazon.client = Mock()
+        media_id = self.amazon.content_media_id('a' * 64, 'image/jpeg')
+        with patch.dict(self.app.config, {'MEDIA_CONTENT_ADDRESSED': True}):
+            self.amazon.delete(media_id)
+            self.assertFalse(self.amazon.client.delete_object.called)
+            self.amazon.delete('foo.jpg')
+            self.assertTrue(self.amazon.client.delete_object.called)
+
+    def test_delete_hash_named_legacy_file(self):
+        self.amazon.client = Mock()
+        with patch.dict(self.app.config, {'MEDIA_CONTENT_ADDRESSED': True}):
+            self.amazon.delete('20170101120/%s.jpg' % ('a' * 64))
+            self.assertTrue(self.amazon.client.delete_object.called)
+
     def test_url_for_media(self):
         media_id = 'test'
         self.assertEqual(
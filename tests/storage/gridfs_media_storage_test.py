@@ -6,6 +6,7 @@ import unittest
 from unittest.mock import Mock
 from superdesk.upload import bp, upload_url
 from superdesk.datalayer import SuperdeskDataLayer
+from superdesk.media.media_operations import get_content_hash
 from superdesk.storage.desk_media_storage import SuperdeskGridFSMediaStorage
 
 
@@ -53,3 +54,27 @@ class GridFSMediaStorageTestCase(unittest.TestCase):
         }
 
         gridfs.put.assert_called_once_with(data, **kwargs)
+
+    def test_put_content_addressed(self):
+        self.app.config['MEDIA_CONTENT_ADDRESSED'] = True
+        with self.app.app_context():
+            fs = self.media.fs('upload')
+            fs.delete(self.media.content_media_id(get_content_hash(b'content addressed')))
+
+            _id = self.media.put(io.BytesIO(b'content addressed'), 'foo.txt', 'text/plain')
+            self.assertEqual(_id, self.media.put(io.BytesIO(b'content addressed'), 'bar.txt', 'text/plain'))
+            self.assertEqual('foo.txt', fs.get(_id).filename)
+            self.assertNotEqual(_id, self.media.put(io.BytesIO(b'other content'), 'foo.txt', 'text/plain'))
+
+            # can be shared so it's not deleted with item
+            self.media.delete(_id)
+            self.assertTrue(fs.exists(_id))
+
+            self.media.remove_unreferenced_files(set())
+            self.assertTrue(fs.exists(_id), 'removed in grace period')
+
+            self.app.config['MEDIA_CONTENT_ADDRESSED_GRACE_MINUTES'] = -1
+            self.media.remove_unreferenced_files({str(_id)})
+            self.assertTrue(fs.exists(_id), 'removed referenced file')
+            self.media.remove_unreferenced_files(set())
+            self.assertFalse(fs.exists(_id))
@@ -102,3 +102,62 @@ class VocabulariesPopulateTest(TestCase):
 
     def tearDown(self):
         os.remove(self.filename)
+
+
+class VocabularyCacheTest(TestCase):
+
+    def setUp(self):
+        get_resource_service('vocabularies').post([
+            {'_id': 'categories', 'items': [
+                {'name': 'National', 'qcode': 'A', 'subject': '04000000', 'is_active': True},
+                {'name': 'Sport', 'qcode': 'S', 'is_active': True},
+                {'name': 'Domestic Sports', 'qcode': 'T', 'is_active': False},
+            ]},
+            {'_id': 'iptc_category_map', 'items': [
+                {'qcode': '15000000', 'category': 'S', 'is_active': True},
+                {'qcode': '04000000', 'category': 'A', 'is_active': True},
+                {'qcode': '15039001', 'category': 'S', 'is_active': True},
+                {'qcode': '01000000', 'category': 'T', 'is_active': False},
+            ]},
+        ])
+
+    def test_enrichment_uses_cache(self):
+        from superdesk.io.commands.update_ingest import process_anpa_category, derive_category, derive_subject
+        service = get_resource_service('vocabularies')
+        item = {'anpa_category': [{'qcode': 'x'}, {'qcode': 'y'}, {'qcode': 'a'}, {'qcode': 't'}]}
+        process_anpa_category(item, {})
+        self.assertEqual([{'qcode': 'A', 'name': 'National'}], item['anpa_category'])
+        derive_category({'subject': []}, {})
+
+        with patch.object(service, 'find_one', side_effect=service.find_one) as find_one:
+            item = {'subject': [{'qcode': '04000000'}, {'qcode': '15039001'}, {'qcode': '15000000'}]}
+            derive_category(item, {})
+            self.assertEqual(['S', 'A'], [c['qcode'] for c in item['anpa_category']])
+            self.assertEqual(['Sport', 'National'], [c['name'] for c in item['anpa_category']])
+
+            item = {'anpa_category': [{'qcode': 'A'}]}
+            derive_subject(item)
+            self.assertEqual([{'qcode': '04000000', 'name': 'economy, business and finance'}], item['subject'])
+            self.assertEqual(0, find_one.call_count)
+
+    def test_invalidate_on_update(self):
+        from superdesk.vocabularies.cache import get_active_categories
+        self.assertIn('s', get_active_categories())
+        service = get_resource_service('vocabularies')
+        with patch('superdesk.vocabularies.vocabularies.push_notification'):
+            service.patch('categories', {'items': [{'name': 'Sport', 'qcode': 'S', 'is_active': False}]})
+        self.assertNotIn('s', get_active_categories())
+
+    def test_skip_store_after_invalidate(self):
+        from superdesk.vocabularies.cache import vocabulary_cache
+        service = get_resource_service('vocabularies')
+        find_one = service.find_one
+
+        def find_and_invalidate(**kwargs):
+            vocabulary = find_one(**kwargs)
+            vocabulary_cache.invalidate()  # updated in other thread meanwhile
+            return vocabulary
+
+        with patch.object(service, 'find_one', side_effect=find_and_invalidate):
+            self.assertIn('s', vocabulary_cache.get('categories'))
+        self.assertNotIn('categories', vocabulary_cache._entries, 'value loaded before invalidate')